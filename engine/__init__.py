@@ -1,8 +1,13 @@
 # Command engine package init
 from .executor import CommandEngine, execute_command
-from .preprocessor import preprocess_input, detect_input_mode
+from .preprocessor import preprocess_input, detect_input_mode, parse_intent, get_spelling_stats
 from .safety import is_safe_command, get_confirmation_prompt
-from .mapper import map_nl_to_command, get_command_aliases
+from .mapper import map_nl_to_command, map_intent, get_command_aliases
+from .intent import CommandIntent
+from .session import SessionManager
+from .result_cache import ResultCache
+from .audit import AuditLogger, query_audit_log
+from .macros import MacroTable, set_macro_table
 
 __all__ = [
     'CommandEngine',
@@ -12,5 +17,15 @@ __all__ = [
     'is_safe_command',
     'get_confirmation_prompt',
     'map_nl_to_command',
-    'get_command_aliases'
+    'get_command_aliases',
+    'ResultCache',
+    'CommandIntent',
+    'parse_intent',
+    'map_intent',
+    'get_spelling_stats',
+    'SessionManager',
+    'AuditLogger',
+    'query_audit_log',
+    'MacroTable',
+    'set_macro_table'
 ]
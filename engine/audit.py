@@ -0,0 +1,264 @@
+"""
+Asynchronous audit log of translated and executed commands.
+
+Records are dicts queued by the engine and written as JSON lines by a
+background thread, so the hot path only pays for a dict and a queue put.
+Run as a module to query a log:
+    python -m engine.audit audit.jsonl --decision blocked --since 2026-01-01
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+FSYNC_POLICIES = ('none', 'batch', 'interval')
+OVERFLOW_POLICIES = ('drop', 'block')
+
+_STOP = object()
+
+
+class AuditLogger:
+    """
+    Bounded-queue, batching JSONL writer with size-based rotation
+
+    fsync: 'none' leaves durability to the OS, 'batch' fsyncs after every
+    batch, 'interval' at most every fsync_interval seconds.
+    overflow: when the queue is full, 'drop' discards the record (counted in
+    stats()['dropped']) and 'block' waits up to block_timeout seconds first.
+    Rotation keeps backup_count old files as path.1 (newest) ... path.N.
+    """
+
+    def __init__(self, path, max_queue=10000, batch_size=256, fsync='batch', fsync_interval=1.0,
+                 overflow='drop', block_timeout=0.1, max_bytes=10 * 1024 * 1024, backup_count=5):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f'fsync must be one of {FSYNC_POLICIES}')
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'overflow must be one of {OVERFLOW_POLICIES}')
+        self.path = path
+        self.batch_size = batch_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.overflow = overflow
+        self.block_timeout = block_timeout
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._counts = {'logged': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'errors': 0}
+        self._counts_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._file = None
+        self._closed = False
+        self._writer = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._writer.start()
+
+    def log(self, record):
+        """Queue a record (a JSON-serializable dict); returns False if it was dropped"""
+        record.setdefault('ts', time.time())
+        try:
+            if self.overflow == 'block':
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._counts_lock:
+                self._counts['dropped'] += 1
+            return False
+        return True
+
+    def flush(self, timeout=5.0):
+        """
+        Wait until everything queued so far has been written
+        Returns False if that did not happen within timeout seconds, including
+        when the queue stayed full.
+        """
+        deadline = time.monotonic() + timeout
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(max(0.0, deadline - time.monotonic()))
+
+    def close(self):
+        """Write out what is queued and stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def stats(self):
+        with self._counts_lock:
+            counts = dict(self._counts)
+        counts['queued'] = self._queue.qsize()
+        return counts
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = []
+            waiters = []
+            stop = False
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write_batch(batch)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                break
+        if self._file is not None:
+            self._sync(force=self.fsync != 'none')
+            self._file.close()
+            self._file = None
+
+    def _write_batch(self, batch):
+        lines = []
+        for record in batch:
+            try:
+                lines.append(json.dumps(record, default=str, separators=(',', ':')))
+            except (TypeError, ValueError):
+                with self._counts_lock:
+                    self._counts['errors'] += 1
+        data = '\n'.join(lines) + '\n' if lines else ''
+        try:
+            if self._file is None:
+                self._file = open(self.path, 'a', encoding='utf-8')
+            if self.max_bytes and self._file.tell() + len(data) > self.max_bytes and self._file.tell():
+                self._rotate()
+            self._file.write(data)
+            self._file.flush()
+            self._sync()
+        except OSError:
+            with self._counts_lock:
+                self._counts['errors'] += len(lines)
+            return
+        with self._counts_lock:
+            self._counts['logged'] += len(batch)
+            self._counts['written'] += len(lines)
+            self._counts['batches'] += 1
+
+    def _sync(self, force=False):
+        now = time.monotonic()
+        if force or self.fsync == 'batch' or (
+                self.fsync == 'interval' and now - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def _rotate(self):
+        self._sync(force=self.fsync != 'none')
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            source = f'{self.path}.{i}'
+            if os.path.exists(source):
+                os.replace(source, f'{self.path}.{i + 1}')
+        if self.backup_count > 0:
+            os.replace(self.path, f'{self.path}.1')
+        else:
+            os.remove(self.path)
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+
+def read_audit_log(path, include_rotated=True):
+    """Yield records oldest first, including rotated files (path.N ... path.1, path)"""
+    paths = []
+    if include_rotated:
+        index = 1
+        while os.path.exists(f'{path}.{index}'):
+            paths.append(f'{path}.{index}')
+            index += 1
+        paths.reverse()
+    paths.append(path)
+
+    for file_path in paths:
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue  # A torn last line after a crash
+        except FileNotFoundError:
+            continue
+
+
+def query_audit_log(path, since=None, until=None, decision=None, risk_level=None,
+                    contains=None, limit=None):
+    """
+    Filter audit records
+    since/until: epoch seconds; decision/risk_level: exact match;
+    contains: case-insensitive substring of the input or mapped command.
+    Returns the matching records, oldest first (the last `limit` if given).
+    """
+    needle = contains.lower() if contains else None
+    matches = []
+    for record in read_audit_log(path):
+        ts = record.get('ts', 0)
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts > until:
+            continue
+        if decision is not None and record.get('decision') != decision:
+            continue
+        if risk_level is not None and record.get('risk_level') != risk_level:
+            continue
+        if needle is not None:
+            haystack = f"{record.get('input') or ''}\n{record.get('command') or ''}".lower()
+            if needle not in haystack:
+                continue
+        matches.append(record)
+    return matches[-limit:] if limit else matches
+
+
+def _parse_time(value):
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Query the command audit log')
+    parser.add_argument('path', help='audit log file (rotated files are read too)')
+    parser.add_argument('--since', type=_parse_time, help='epoch seconds or ISO date/time')
+    parser.add_argument('--until', type=_parse_time, help='epoch seconds or ISO date/time')
+    parser.add_argument('--decision', help='executed, blocked, confirm, clarify, error, ...')
+    parser.add_argument('--risk', dest='risk_level', help='safe, high, critical')
+    parser.add_argument('--contains', help='substring of the input or command')
+    parser.add_argument('--limit', type=int, help='only the last N matches')
+    parser.add_argument('--json', action='store_true', help='print raw JSON lines')
+    args = parser.parse_args(argv)
+
+    records = query_audit_log(args.path, args.since, args.until, args.decision,
+                              args.risk_level, args.contains, args.limit)
+    for record in records:
+        if args.json:
+            print(json.dumps(record, default=str))
+            continue
+        when = datetime.fromtimestamp(record.get('ts', 0)).isoformat(sep=' ', timespec='seconds')
+        print(f"{when}  {record.get('decision', '?'):<8} {record.get('risk_level') or '-':<8} "
+              f"exit={record.get('exit_code')}  {record.get('input')!r} -> {record.get('command')!r}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Splits compound natural language requests into steps and runs them as a DAG.
+"""
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from .preprocessor import KNOWN_ACTION_WORDS, parse_intent
+
+# Conjunctions between steps; a separator containing 'then' orders the steps around it
+SEPARATOR_PATTERN = re.compile(
+    r'(\s*[,;]\s*(?:and\s+)?(?:then\s+)?|\s+and\s+then\s+|\s+then\s+|\s+and\s+)', re.IGNORECASE)
+THEN_PATTERN = re.compile(r'\bthen\b', re.IGNORECASE)
+
+# A part is a step of its own only if it starts with one of these ("new stuff" does not)
+STEP_VERBS = KNOWN_ACTION_WORDS - {'new'}
+
+# What each action does to the names it mentions and to the directory listing
+MUTATING_ACTIONS = {'create', 'delete', 'copy', 'move'}
+LISTING_ACTIONS = {'list', 'find'}
+# Actions with effects we cannot see (cwd changes, arbitrary programs) run alone
+BARRIER_ACTIONS = {'navigate', 'run', None}
+
+MAX_WORKERS = 4
+
+
+class Step:
+    """One part of a compound request and the names it reads and writes"""
+    __slots__ = ('index', 'text', 'intent', 'command', 'risk_level', 'deps', 'after_then',
+                 'reads', 'writes', 'reads_dir', 'changes_dir', 'barrier')
+
+    def __init__(self, index, text, intent, after_then=False):
+        self.index = index
+        self.text = text
+        self.intent = intent
+        self.command = None
+        self.risk_level = 'safe'
+        self.deps = set()
+        self.after_then = after_then
+        components = intent.components
+        action = components.get('action')
+        # The parser may put a source name in target or filename; count both
+        sources = {_name(components.get('target')), _name(components.get('filename'))}
+        destination = _name(components.get('destination'))
+
+        self.reads = set()
+        self.writes = set()
+        self.reads_dir = action in LISTING_ACTIONS and sources == {None}
+        self.changes_dir = action in MUTATING_ACTIONS
+        self.barrier = action in BARRIER_ACTIONS
+        if action == 'copy':
+            self.reads.update(sources)
+            self.writes.add(destination)
+        elif action in MUTATING_ACTIONS:
+            self.writes.update(sources)
+            self.writes.add(destination)
+        else:
+            self.reads.update(sources)
+        self.reads.discard(None)
+        self.writes.discard(None)
+
+    def conflicts_with(self, other):
+        """True if other (an earlier step) must finish before this one starts"""
+        if self.barrier or other.barrier:
+            return True
+        if self.writes & (other.reads | other.writes) or self.reads & other.writes:
+            return True
+        return (self.reads_dir and other.changes_dir) or (self.changes_dir and other.reads_dir)
+
+    def __repr__(self):
+        return f'Step({self.index}, {self.text!r}, deps={sorted(self.deps)})'
+
+
+def _name(value):
+    if not value:
+        return None
+    return os.path.normcase(os.path.normpath(value.strip('"\''))).lower()
+
+
+def split_compound(text, intent=None, cwd=None):
+    """
+    Split text on 'and', 'then', commas and semicolons
+    A part is a step of its own only if it starts with an action verb; others
+    ('copy a.txt to x and y', 'delete folder old and new stuff') are kept with
+    the part before them, which keeps its own action.
+    intent: the CommandIntent already parsed from text, if any; an input
+    without separators is then returned without another scan
+    cwd: directory names are relative to; when given, a part is also kept with
+    the one before it if together they name something that exists
+    ('show files in folder tools and start menu')
+    Returns: [(text, intent, after_then)] - a single entry when the input is
+    not compound.
+    """
+    if intent is not None and not (',' in intent.lower or ';' in intent.lower
+                                   or 'and' in intent.tokens or 'then' in intent.tokens):
+        return [(text, intent, False)]
+    pieces = SEPARATOR_PATTERN.split(text.strip())
+    if len(pieces) == 1:
+        return [(text, intent, False)]
+
+    parts = []  # [text, intent, after_then, action]
+    separator = None
+    for i, piece in enumerate(pieces):
+        if i % 2:
+            separator = piece
+            continue
+        if not piece.strip():
+            continue
+        piece_intent = parse_intent(piece)
+        if parts and not _is_step(piece_intent, f'{parts[-1][0]}{separator}{piece}', cwd):
+            # Not a step of its own: glue it back on, separator and all
+            parts[-1][0] = f'{parts[-1][0]}{separator}{piece}'
+            parts[-1][1] = None
+            continue
+        parts.append([piece, piece_intent, bool(separator and THEN_PATTERN.search(separator)),
+                      piece_intent.action])
+
+    if len(parts) == 1:
+        parts[0][0] = text
+        parts[0][1] = intent
+    for part in parts:
+        if part[1] is None:
+            part[1] = parse_intent(part[0])
+        # "delete folder old and new stuff" parses as create; the verb it starts with wins
+        if part[3] is not None and part[1].action != part[3]:
+            part[1].components['action'] = part[3]
+    return [tuple(part[:3]) for part in parts]
+
+
+def _is_step(intent, joined, cwd):
+    """True if intent, the part after a separator, is a step rather than part of a name"""
+    tokens = intent.tokens
+    if tokens[:1] == ['please']:
+        tokens = tokens[1:]
+    if intent.action is None or not tokens or tokens[0] not in STEP_VERBS:
+        return False
+    if cwd is None:
+        return True
+    components = parse_intent(joined).components
+    name = components.get('target') or components.get('filename')
+    if not name:
+        return True
+    start = joined.lower().find(name)
+    if start >= 0:
+        name = joined[start:start + len(name)]  # As written, not lowercased
+    drive = components.get('drive')
+    base = (drive + os.sep) if drive else cwd
+    return not os.path.lexists(os.path.join(base, name.strip('"\'')))
+
+
+def build_steps(parts):
+    """
+    Turn split_compound() output into Steps with dependencies
+    A step depends on an earlier one when they share a name one of them writes,
+    when one lists the directory the other changes, when either is a barrier
+    (cd, run, unknown action), or when 'then' separates them.
+    """
+    steps = [Step(i, text, intent, after_then) for i, (text, intent, after_then) in enumerate(parts)]
+    for step in steps:
+        for earlier in steps[:step.index]:
+            if step.after_then or step.conflicts_with(earlier):
+                step.deps.add(earlier.index)
+    return steps
+
+
+def run_steps(steps, run, max_workers=MAX_WORKERS):
+    """
+    Run steps on a thread pool, each once all its dependencies succeeded
+    run(step) returns a (success, stdout, stderr) result. After a failure no
+    new steps start; steps already running finish.
+    Returns: one result per step, None for steps that were skipped
+    """
+    results = [None] * len(steps)
+    waiting = {step.index: set(step.deps) for step in steps}
+    dependents = {step.index: [] for step in steps}
+    for step in steps:
+        for dep in step.deps:
+            dependents[dep].append(step.index)
+
+    ready = sorted(index for index, deps in waiting.items() if not deps)
+    failed = False
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(steps)))) as pool:
+        running = {}
+        while ready or running:
+            if not failed:
+                for index in ready:
+                    running[pool.submit(run, steps[index])] = index
+            ready = []
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in sorted(done, key=running.get):
+                index = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = (False, '', f'Error: {e}')
+                results[index] = result
+                if not result[0]:
+                    failed = True
+                    continue
+                for dependent in dependents[index]:
+                    waiting[dependent].discard(index)
+                    if not waiting[dependent]:
+                        ready.append(dependent)
+            ready.sort()
+    return results
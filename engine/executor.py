@@ -9,55 +9,537 @@ from .mapper import map_nl_to_command
 """
 Executes validated commands in the system shell and orchestrates command engine logic.
 """
+import os
 import subprocess
 import platform
+import shlex
+import shutil
+import signal
+import threading
+import time
+from collections import deque
 import psutil
-from .preprocessor import preprocess_input
-from .safety import is_safe_command, get_confirmation_prompt
-from .mapper import map_nl_to_command
+from .preprocessor import preprocess_input, parse_intent, parse_bulk_request, GLOB_CHARS
+from .safety import is_safe_command, get_confirmation_prompt, get_affected_paths, is_protected_path
+from .mapper import map_nl_to_command, map_intent
+from .resolver import TargetResolver, RESOLVED_ACTIONS, format_clarification
+from .shell_ast import parse_command, simple_argv, single_command, ShellSyntaxError
+from .macros import get_macro_table
+from .compound import split_compound, build_steps, run_steps
+from .result import CommandResult
+from system.filesystem import BulkFileOperation, ImpactEstimator, expand_pattern
+from system.paged_file import PagedFileCache
+from system.process import run_process, poll_with_usage, new_usage, kill_process_tree, TimeoutPolicy
+from utils.formatting import format_size
+
+PAGE_LINES = 200  # Lines per page when a file is read through the paged viewer
+SEARCH_LIMIT = 500  # Matching lines shown for "search for X in file"
 
 class CommandEngine:
-    def __init__(self):
-        self.running_processes = {}  # PID -> process info
+    """
+    Orchestrates the pipeline for one terminal
+
+    Safe to share between threads: the background process table is guarded by
+    a lock (read paths work on snapshots), each managed process has its own lock
+    for polling/reaping, and last_result is kept per thread. What a confirmation
+    prompt waits for (pending_command) and the file being paged (page) belong to
+    the engine, i.e. the terminal, so the user's answer or next scroll may
+    arrive on any thread.
+    """
+
+    def __init__(self, result_cache=None, limits_policy=None, timeout_policy=None,
+                 target_resolver=None, cwd=None, env=None, history_size=100,
+                 audit_log=None, session_id=None, direct_exec=False, macros=None):
+        """
+        result_cache: optional ResultCache; when given, output of side-effect-free
+        commands is reused until the inputs change or a mutating command runs
+        limits_policy: optional system.process.LimitsPolicy choosing CPU/memory/
+        priority limits per intent or risk level for every spawned command
+        timeout_policy: system.process.TimeoutPolicy; defaults to a flat 30 seconds
+        target_resolver: TargetResolver to share with other engines; a private one by default
+        cwd/env: working directory (default: the current one) and environment
+        (default: inherited) that this engine's commands run with; 'cd' changes cwd
+        history_size: number of recent inputs kept in history
+        audit_log: optional engine.audit.AuditLogger recording every processed input
+        session_id: tag for this engine's audit records
+        direct_exec: run plain commands (no pipes, redirections, expansions or
+        builtins) without a shell, saving a shell startup per command (POSIX only)
+        macros: engine.macros.MacroTable expanded before parsing; defaults to
+        the shared table from the user's macro file
+        """
+        self.running_processes = {}  # PID -> process info, guarded by _process_lock
+        self._process_lock = threading.Lock()
+        self._local = threading.local()  # Per-thread last_result
+        self._pending = (None, None)  # (command to confirm, callable running it), see set_pending
+        self._pending_lock = threading.Lock()
+        self._page = None
+        self.result_cache = result_cache
+        self.limits_policy = limits_policy
+        self.timeout_policy = timeout_policy if timeout_policy is not None else TimeoutPolicy()
         self.is_windows = platform.system().lower() == 'windows'
+        self.bulk_operations = set()  # In-flight BulkFileOperations, guarded by _process_lock
+        # Set to None to skip target checks
+        self.target_resolver = target_resolver if target_resolver is not None else TargetResolver()
+        self.cwd = os.path.abspath(cwd) if cwd else os.getcwd()
+        self._cwd_lock = threading.Lock()  # Serializes cd so concurrent moves don't interleave
+        self.env = env
+        self.history = deque(maxlen=history_size)
+        self.audit_log = audit_log
+        self.session_id = session_id
+        self.direct_exec = direct_exec
+        self.paged_files = PagedFileCache()  # Files opened by the read intent
+        self.macros = macros
+
+    @property
+    def pending_command(self):
+        """Last command the user was asked to confirm"""
+        return self._pending[0]
+
+    @pending_command.setter
+    def pending_command(self, command):
+        self.set_pending(command)
+
+    def set_pending(self, command, run=None):
+        """
+        Remember what the confirmation prompt for command is about
+        run: callable doing what command stands for (compound steps, bulk
+        operations); None runs command itself
+        """
+        with self._pending_lock:
+            self._pending = (command, run)
+
+    @property
+    def page(self):
+        """(path, next line) of the file being paged through, or None"""
+        return self._page
+
+    @page.setter
+    def page(self, page):
+        self._page = page
+
+    @property
+    def last_result(self):
+        """CommandResult of this thread's last foreground command"""
+        return getattr(self._local, 'last_result', None)
+
+    @last_result.setter
+    def last_result(self, result):
+        self._local.last_result = result
 
     def process_input(self, user_input):
         """
         Main entry point for processing user input
         Returns: (success, output, error_msg)
         """
+        if self.audit_log is None:
+            return self._process_input(user_input, None)
+
+        record = {'ts': time.time(), 'session': self.session_id, 'input': user_input}
+        started = time.perf_counter()
+        result = self._process_input(user_input, record)
+        record['total_ms'] = round((time.perf_counter() - started) * 1000, 3)
+        record['exit_code'] = getattr(result, 'exit_code', None)
+        if 'decision' not in record:
+            record['decision'] = 'executed' if result[0] else 'failed'
+        self.audit_log.log(record)
+        return result
+
+    def _process_input(self, user_input, record):
+        """process_input body; fills record (when auditing) as each stage completes"""
         try:
-            # Stage 1: Input Pre-Processor
-            normalized, mode, components = preprocess_input(user_input)
+            self.history.append(user_input)
+            self.page = None
+            
+            # User macros and aliases replace the input before any parsing
+            macros = self.macros if self.macros is not None else get_macro_table()
+            expansion = macros.expand(user_input) if macros else None
+            if expansion is not None:
+                return self.run_macro(expansion, record)
+            
+            # Stage 1: Input Pre-Processor; later stages reuse its mode and text
+            intent = parse_intent(user_input)
+
+            # "create folder a, create folder b and list files" runs as several steps
+            if intent.mode == 'nl':
+                parts = split_compound(intent.text, intent, self.cwd)
+                if len(parts) > 1:
+                    return self.run_compound(parts, record)
+
+            # "copy all the logs to backup" or "delete folder old" run on the bulk engine
+            bulk = parse_bulk_request(intent.text)
+            if bulk is not None and self.is_bulk_request(bulk[1]):
+                return self.run_bulk_request(*bulk, record=record)
+
+            if record is not None:
+                record['mode'] = intent.mode
+                record['components'] = intent.components
+            
+            # Check named targets against the real directory before building a command
+            clarification = self.resolve_targets(intent)
+            if clarification:
+                if record is not None:
+                    record['decision'] = 'clarify'
+                return False, '', clarification
             
             # Stage 2: Command Mapper
-            command = self.map_command(normalized, mode, components)
+            command = map_intent(intent)
             
             # Stage 3: Safety Net & Validator
             is_safe_result, risk_level, safety_msg = is_safe_command(command)
+            if record is not None:
+                record['command'] = command
+                record['risk_level'] = risk_level
             if not is_safe_result:
                 if risk_level == 'critical':
+                    if record is not None:
+                        record['decision'] = 'blocked'
                     return False, '', safety_msg
                 else:
                     # Return confirmation prompt for GUI to handle
+                    self.pending_command = command
+                    if record is not None:
+                        record['decision'] = 'confirm'
                     return False, '', get_confirmation_prompt(command, risk_level)
             
             # Stage 4: Execution Manager
-            return self.execute_command(command)
+            if record is not None:
+                executed = time.perf_counter()
+                result = self._execute(command, intent, risk_level)
+                record['exec_ms'] = round((time.perf_counter() - executed) * 1000, 3)
+                return result
+            return self._execute(command, intent, risk_level)
             
         except Exception as e:
+            if record is not None:
+                record['decision'] = 'error'
+                record['error'] = str(e)
             return False, '', f"Error processing command: {str(e)}"
 
+    def run_macro(self, expansion, record=None):
+        """
+        Run the steps of a MacroExpansion in order, stopping at the first failure
+        Every step is safety-checked before any runs; one risky step asks for
+        confirmation of the whole macro (as a single && chain).
+        """
+        steps = expansion.steps
+        command = ' && '.join(steps)
+        verdicts = [is_safe_command(step) for step in steps]
+        risk_level = 'safe'
+        for is_safe_result, level, safety_msg in verdicts:
+            if level == 'critical':
+                risk_level = level
+                break
+            if not is_safe_result:
+                risk_level = 'high'
+        if record is not None:
+            record['mode'] = 'macro'
+            record['components'] = {'macro': expansion.name, 'values': expansion.values}
+            record['command'] = command
+            record['risk_level'] = risk_level
+        if risk_level == 'critical':
+            if record is not None:
+                record['decision'] = 'blocked'
+            return False, '', next(msg for _, level, msg in verdicts if level == 'critical')
+        if risk_level != 'safe':
+            self.pending_command = command
+            if record is not None:
+                record['decision'] = 'confirm'
+            return False, '', get_confirmation_prompt(command, risk_level)
+
+        outputs = []
+        result = None
+        for step in steps:
+            result = self.execute_command(step)
+            if result[1]:
+                outputs.append(result[1] if result[1].endswith('\n') else result[1] + '\n')
+            if not result[0]:
+                break
+        return CommandResult(result[0], ''.join(outputs), result[2], getattr(result, 'exit_code', None),
+                             getattr(result, 'usage', None), getattr(result, 'timed_out', False))
+
+    def run_compound(self, parts, record=None):
+        """
+        Run a compound request split by compound.split_compound()
+        Every step is mapped and safety-checked first: nothing runs if a step is
+        blocked, and one risky step asks for confirmation of the whole request
+        (run_confirmed() then runs the same steps). Steps that depend on earlier
+        ones have their targets resolved just before they start, so names those
+        steps create and directories they enter are seen.
+        Returns: CommandResult with per-step output labelled [n/total] and .steps
+        """
+        steps = build_steps(parts)
+        for step in steps:
+            if not step.deps:
+                # Runs against the tree as it is now, so ask before anything starts
+                clarification = self.resolve_targets(step.intent)
+                if clarification:
+                    if record is not None:
+                        record['decision'] = 'clarify'
+                    return False, '', f'Step {step.index + 1} ({step.text.strip()}): {clarification}'
+            step.command = map_intent(step.intent)
+            is_safe_result, step.risk_level, safety_msg = is_safe_command(step.command)
+            if step.risk_level == 'critical':
+                if record is not None:
+                    record['decision'] = 'blocked'
+                return False, '', safety_msg
+
+        command = ' && '.join(step.command for step in steps)  # For prompts and the audit log
+        risky = [step.risk_level for step in steps if step.risk_level != 'safe']
+        if record is not None:
+            record['mode'] = 'compound'
+            record['components'] = [step.intent.components for step in steps]
+            record['command'] = command
+            record['risk_level'] = risky[0] if risky else 'safe'
+        if risky:
+            self.set_pending(command, lambda: self.run_compound_steps(steps, confirmed=True))
+            if record is not None:
+                record['decision'] = 'confirm'
+            return False, '', get_confirmation_prompt(command, risky[0])
+        return self.run_compound_steps(steps)
+
+    def run_confirmed(self):
+        """
+        Run what the last confirmation prompt asked about, once the user
+        agreed: the steps of a compound request, a bulk operation, or the
+        pending command. Runs it at most once, whichever thread confirms.
+        """
+        with self._pending_lock:
+            (command, run), self._pending = self._pending, (None, None)
+        if run is not None:
+            return run()
+        if not command:
+            return False, '', 'Nothing to confirm'
+        _, risk_level, safety_msg = is_safe_command(command)
+        if risk_level == 'critical':
+            return False, '', safety_msg
+        return self.execute_command(command, risk_level=risk_level)
+
+    def is_bulk_request(self, sources):
+        """True if a parsed bulk request names many files: a glob or an existing directory"""
+        return any(GLOB_CHARS & set(source) or os.path.isdir(os.path.join(self.cwd, source))
+                   for source in sources)
+
+    def bulk_paths(self, sources, destination=None):
+        """Absolute paths a bulk operation would touch: every source match and the destination"""
+        paths = []
+        for source in sources:
+            path = os.path.join(self.cwd, source)
+            paths.extend(expand_pattern(path) if GLOB_CHARS & set(source) else [path])
+        if destination:
+            paths.append(os.path.join(self.cwd, destination))
+        return paths
+
+    def is_inside_cwd(self, path):
+        """True if path is the session's working directory or below it"""
+        cwd = os.path.abspath(self.cwd)
+        path = os.path.abspath(path)
+        try:
+            return os.path.commonpath([cwd, path]) == cwd
+        except ValueError:
+            return False  # Different drives
+
+    def run_bulk_request(self, action, sources, destination=None, record=None):
+        """
+        Run a request from parse_bulk_request() with bulk_file_operation()
+        The equivalent shell command is what gets safety-checked, shown in the
+        confirmation prompt and audited; run_confirmed() runs the operation.
+        Protected paths and filesystem roots are blocked, and sources or a
+        destination outside the working directory always need confirmation.
+        """
+        names = [f'"{name}"' if ' ' in name else name for name in sources]
+        if action == 'delete':
+            command = f"del /s /q {' '.join(names)}" if self.is_windows else f"rm -r {' '.join(names)}"
+        else:
+            target = f'"{destination}"' if ' ' in destination else destination
+            verb = {'copy': 'copy' if self.is_windows else 'cp -r',
+                    'move': 'move' if self.is_windows else 'mv'}[action]
+            command = f"{verb} {' '.join(names)} {target}"
+        is_safe_result, risk_level, safety_msg = is_safe_command(command)
+        # The bulk engine has no --preserve-root and copies whole trees: judge the real paths too
+        paths = self.bulk_paths(sources, destination)
+        if any(is_protected_path(path) for path in paths):
+            is_safe_result, risk_level = False, 'critical'
+            safety_msg = f'CRITICAL: "{command}" touches a protected system path and is blocked.'
+        elif is_safe_result and any(not self.is_inside_cwd(path) for path in paths):
+            is_safe_result, risk_level = False, 'high'
+        if record is not None:
+            record['mode'] = 'bulk'
+            record['components'] = {'action': action, 'sources': sources, 'destination': destination}
+            record['command'] = command
+            record['risk_level'] = risk_level
+        if risk_level == 'critical':
+            if record is not None:
+                record['decision'] = 'blocked'
+            return False, '', safety_msg
+        if not is_safe_result:
+            self.set_pending(command, lambda: self.bulk_file_operation(action, sources, destination))
+            if record is not None:
+                record['decision'] = 'confirm'
+            return False, '', get_confirmation_prompt(command, risk_level)
+        return self.bulk_file_operation(action, sources, destination)
+
+    def run_compound_steps(self, steps, confirmed=False):
+        """
+        Run mapped compound steps: independent ones concurrently, dependent ones
+        in order, and no new step after one fails
+        """
+        results = run_steps(steps, lambda step: self._run_step(step, confirmed))
+        total = len(steps)
+        outputs, errors = [], []
+        for step, result in zip(steps, results):
+            label = f'[{step.index + 1}/{total}] {step.command}'
+            if result is None:
+                errors.append(f'{label}: skipped')
+                continue
+            outputs.append(f'{label}\n{result[1]}' if result[1] else label)
+            if not result[0]:
+                errors.append(f'{label}: {result[2] or "failed"}')
+        success = all(result is not None and result[0] for result in results)
+        text = '\n'.join(output.rstrip('\n') for output in outputs) + '\n'
+        outcome = CommandResult(success, text, '\n'.join(errors), 0 if success else 1, steps=results)
+        # Steps ran on pool threads; hand their state to the caller's thread and the engine
+        self.last_result = outcome
+        pages = [result.page for result in results if getattr(result, 'page', None) is not None]
+        self.page = pages[-1] if pages else None
+        return outcome
+
+    def _run_step(self, step, confirmed):
+        """Resolve (if it depends on earlier steps), re-check and run one compound step"""
+        if step.deps:
+            clarification = self.resolve_targets(step.intent)
+            if clarification:
+                return False, '', clarification
+            command = map_intent(step.intent)
+            if command != step.command:
+                is_safe_result, risk_level, safety_msg = is_safe_command(command)
+                if risk_level == 'critical':
+                    return False, '', safety_msg
+                if not is_safe_result and not confirmed:
+                    return False, '', get_confirmation_prompt(command, risk_level)
+                step.command, step.risk_level = command, risk_level
+        return self._execute(step.command, step.intent, step.risk_level)
+
+    def _execute(self, command, intent, risk_level):
+        """Run a validated intent: reads of regular files are served natively, the rest by the shell"""
+        if intent.action == 'read' and intent.mode == 'nl':
+            result = self.read_file(intent)
+            if result is not None:
+                return result
+        return self.execute_command(command, intent.action, risk_level)
+
+    def read_file(self, intent):
+        """
+        Serve a read intent from a paged view of the file instead of cat/type
+        Plain reads show the first PAGE_LINES lines; next_page() continues from there.
+        Returns: CommandResult, or None if the target is not a regular file
+        """
+        name = intent.components.get('target') or intent.components.get('filename')
+        if not name:
+            return None
+        drive = intent.components.get('drive')
+        path = os.path.join((drive + os.sep) if drive else self.cwd, os.path.expanduser(name))
+        if not os.path.isfile(path):
+            return None
+        try:
+            paged = self.paged_files.open(path)
+        except (OSError, ValueError):
+            return None
+
+        view = intent.components.get('view')
+        kind = view[0] if view else None
+        if kind == 'head':
+            lines = paged.head(view[1])
+        elif kind == 'tail':
+            lines = paged.tail(view[1])
+        elif kind == 'range':
+            first, last = view[1], max(view[1], view[2])
+            lines = paged.lines(max(first, 1) - 1, last - max(first, 1) + 1)
+        elif kind == 'search':
+            matches = paged.search(view[1], limit=SEARCH_LIMIT, ignore_case=True)
+            lines = [f'{number + 1}:{text}' for number, text in matches]
+        else:
+            lines = paged.head(PAGE_LINES)
+
+        page = (path, PAGE_LINES) if kind is None and len(lines) == PAGE_LINES else None
+        result = CommandResult(True, '\n'.join(lines) + '\n' if lines else '', '', 0, page=page)
+        self.page = page
+        self.last_result = result
+        return result
+
+    def next_page(self):
+        """Next page of the file last read, or '' when there is no more"""
+        page = self.page
+        if page is None:
+            return ''
+        path, line = page
+        try:
+            # Through the cache, which reopens the file if it changed or was evicted
+            lines = self.paged_files.open(path).lines(line, PAGE_LINES)
+        except (OSError, ValueError):
+            lines = []
+        self.page = (path, line + PAGE_LINES) if len(lines) == PAGE_LINES else None
+        return '\n'.join(lines)
+
+    def record_confirmation(self, command, confirmed):
+        """Audit the user's answer to a confirmation prompt"""
+        if self.audit_log is not None:
+            self.audit_log.log({
+                'session': self.session_id,
+                'command': command,
+                'decision': 'confirmed' if confirmed else 'declined',
+            })
+
+    def resolve_targets(self, intent):
+        """
+        Match the parsed target/filename against the directory it refers to
+        Fixes case-only mismatches in place; returns a clarification question
+        when only near misses exist, otherwise None.
+        """
+        if self.target_resolver is None or intent.mode != 'nl':
+            return None
+        if intent.action not in RESOLVED_ACTIONS:
+            return None
+
+        drive = intent.components.get('drive')
+        base = (drive + os.sep) if drive else self.cwd
+        for field in self.source_fields(intent):
+            value = intent.components.get(field)
+            if not value or any(ch in value for ch in '*?'):
+                continue
+            parent, name = os.path.split(value)
+            status, result = self.target_resolver.resolve(name, os.path.join(base, parent))
+            if status == 'corrected':
+                intent.components[field] = os.path.join(parent, result)
+            elif status == 'ambiguous':
+                intent.candidates = result
+                return format_clarification(value, result)
+        return None
+
+    @staticmethod
+    def source_fields(intent):
+        """
+        Components naming things that must already exist
+        For copy/move, target is the source only when a separate destination was
+        parsed ("move folder src to dst"); otherwise it holds the destination
+        ("copy file notes.txt to backup2"), which need not exist yet.
+        """
+        components = intent.components
+        if intent.action in ('copy', 'move') and (components.get('filename') or not components.get('destination')):
+            return ('filename',)
+        return ('filename', 'target')
+
     def map_command(self, normalized, mode, components):
         """Map natural language to system command if needed"""
         if mode == 'nl':
             return map_nl_to_command(normalized, components)
         return normalized
 
-    def execute_command(self, command):
+    def execute_command(self, command, intent=None, risk_level='safe'):
         """
         Execute a validated command
-        Returns: (success, stdout, stderr)
+        intent/risk_level select resource limits from the limits policy
+        Returns: CommandResult - unpacks as (success, stdout, stderr) and carries
+        exit_code and usage (wall/user/system time, max RSS, I/O bytes)
         """
         if not command:
             return False, '', 'Empty command'
@@ -66,65 +548,206 @@ class CommandEngine:
             # Handle special commands
             if command.startswith('bg '):
                 # Background process
-                return self.start_background_process(command[3:])
+                self.invalidate_results()
+                return self.start_background_process(command[3:], self.limits_for(intent, risk_level))
             elif command.startswith('kill '):
                 # Kill process
+                self.invalidate_results()
                 return self.kill_process(command[5:])
             elif command == 'ps' or command == 'processes':
                 # List processes
                 return self.list_processes()
+            elif self.is_lone_cd(command):
+                # Change this engine's working directory (a shell cd would not outlive the shell)
+                return self.change_directory(command[2:].strip())
+            
+            # Serve side-effect-free commands from the result cache
+            cache_key = None
+            if self.result_cache is not None:
+                cache_key, cached = self.result_cache.lookup(command, self.cwd, self.env)
+                if cached is not None:
+                    return cached
+                if cache_key is None:
+                    self.invalidate_results()
             
             # Execute regular command
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30  # 30 second timeout
+            timeout = self.timeout_policy.timeout_for(command, intent)
+            argv = self.direct_argv(command)
+            result = run_process(
+                argv if argv is not None else command,
+                timeout=timeout,
+                limits=self.limits_for(intent, risk_level),
+                cwd=self.cwd,
+                env=self.env
             )
+            self.timeout_policy.record(command, result['usage']['wall_time'])
             
-            if result.returncode == 0:
-                return True, result.stdout, result.stderr
+            if result['timed_out']:
+                # Keep whatever the command printed before it was killed
+                notice = f'Command "{command}" timed out after {timeout:g} seconds (partial output shown)'
+                stderr = f"{result['stderr'].rstrip()}\n{notice}" if result['stderr'].strip() else notice
+                outcome = CommandResult(False, result['stdout'], stderr,
+                                        result['exit_code'], result['usage'], timed_out=True)
             else:
-                return False, result.stdout, result.stderr
+                outcome = CommandResult(result['exit_code'] == 0, result['stdout'], result['stderr'],
+                                        result['exit_code'], result['usage'])
+            self.last_result = outcome
+            
+            if cache_key is not None:
+                if outcome[0]:
+                    self.result_cache.store(cache_key, outcome)
+            else:
+                # The command may have changed what cached commands would print
+                self.invalidate_results()
+            return outcome
                 
-        except subprocess.TimeoutExpired:
-            return False, '', f'Command "{command}" timed out after 30 seconds'
         except Exception as e:
             return False, '', f'Execution error: {str(e)}'
 
-    def start_background_process(self, command):
+    def direct_argv(self, command):
+        """argv to run command without a shell, or None when it needs one"""
+        if not self.direct_exec or self.is_windows:
+            return None
+        try:
+            argv = simple_argv(parse_command(command))
+        except ShellSyntaxError:
+            return None
+        if argv is None:
+            return None
+        program = argv[0]
+        if os.sep in program:
+            found = os.access(os.path.join(self.cwd, program), os.X_OK)
+        else:
+            path = (self.env if self.env is not None else os.environ).get('PATH')
+            found = shutil.which(program, path=path) is not None
+        # Unknown programs go through the shell so the error message stays the same
+        return argv if found else None
+
+    def is_lone_cd(self, command):
+        """True if command is a single cd; 'cd build && make' and the like go to the shell"""
+        if command != 'cd' and not command.startswith('cd '):
+            return False
+        try:
+            simple = single_command(parse_command(command, posix=not self.is_windows))
+        except ShellSyntaxError:
+            return False
+        return simple is not None and simple.words[0].value == 'cd'
+
+    def change_directory(self, argument):
+        """
+        Handle 'cd': with no argument show the working directory, otherwise move to it
+        Accepts the Windows '/d' switch, quotes and '~'.
+        Returns: (success, output, error)
+        """
+        if argument.lower().startswith('/d'):
+            argument = argument[2:].strip()
+        if not argument:
+            return True, self.cwd, ''
+        try:
+            parts = shlex.split(argument, posix=not self.is_windows)
+        except ValueError:
+            parts = [argument]
+        path = os.path.expanduser(' '.join(part.strip('"') for part in parts))
+        if self.is_windows and len(path) == 2 and path[1] == ':':
+            path += os.sep  # 'D:' alone means the drive root here
+        with self._cwd_lock:
+            target = os.path.normpath(os.path.join(self.cwd, path))
+            if not os.path.isdir(target):
+                return False, '', f'cd: no such directory: {path}'
+            self.cwd = target
+        return True, target, ''
+
+    def invalidate_results(self):
+        """Forget cached command results after anything that may mutate state"""
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+
+    def limits_for(self, intent=None, risk_level=None):
+        """ResourceLimits for a command, or None when no policy is configured"""
+        if self.limits_policy is None:
+            return None
+        return self.limits_policy.limits_for(intent, risk_level)
+
+    def start_background_process(self, command, limits=None):
         """Start a process in the background"""
         try:
+            args = limits.wrap(command) if limits is not None else command
             process = subprocess.Popen(
-                command,
-                shell=True,
+                args,
+                shell=isinstance(args, str),
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True
+                text=True,
+                cwd=self.cwd,
+                env=self.env,
+                start_new_session=not self.is_windows  # Lets kill reach the whole job
             )
+            if limits is not None:
+                limits.apply_to(process.pid)
             
-            self.running_processes[process.pid] = {
-                'process': process,
-                'command': command,
-                'started': True
-            }
+            with self._process_lock:
+                self.running_processes[process.pid] = {
+                    'process': process,
+                    'command': command,
+                    'started': True,
+                    'start_time': time.monotonic(),
+                    'usage': new_usage(),
+                    'lock': threading.Lock()  # Serializes polling/reaping of this process
+                }
             
             return True, f'Background process started with PID: {process.pid}', ''
             
         except Exception as e:
             return False, '', f'Failed to start background process: {str(e)}'
 
+    def background_usage(self, pid):
+        """
+        Current resource usage of a managed background process
+        Returns: (exit_code or None while running, usage dict), or None if unknown
+        """
+        with self._process_lock:
+            info = self.running_processes.get(pid)
+        if info is None:
+            return None
+        with info['lock']:
+            exit_code = poll_with_usage(info['process'], info['usage'], info['start_time'])
+            return exit_code, dict(info['usage'])
+
+    @staticmethod
+    def _stop_process(info, grace=1.0):
+        """
+        Terminate a managed process and everything it spawned, then reap it so
+        it does not linger as a zombie
+        """
+        with info['lock']:
+            process = info['process']
+            try:
+                if process.returncode is not None:
+                    return
+                kill_process_tree(process, getattr(signal, 'SIGTERM', None))
+                try:
+                    process.wait(timeout=grace)
+                except subprocess.TimeoutExpired:
+                    kill_process_tree(process)
+                    process.wait()
+            except OSError:
+                pass
+            finally:
+                # Nobody reads a background job's pipes once it is gone; release the fds
+                for stream in (process.stdout, process.stderr):
+                    if stream is not None:
+                        stream.close()
+
     def kill_process(self, pid_or_name):
         """Kill a process by PID or name"""
         try:
             # Try to parse as PID first
             try:
                 pid = int(pid_or_name)
-                if pid in self.running_processes:
-                    process = self.running_processes[pid]['process']
-                    process.terminate()
-                    del self.running_processes[pid]
+                with self._process_lock:
+                    info = self.running_processes.pop(pid, None)
+                if info is not None:
+                    self._stop_process(info)
                     return True, f'Process {pid} terminated', ''
                 else:
                     # Kill system process
@@ -146,14 +769,76 @@ class CommandEngine:
         except Exception as e:
             return False, '', f'Failed to kill process: {str(e)}'
 
+    def bulk_file_operation(self, action, sources, destination=None, progress=None):
+        """
+        Copy, move or delete many files in-process on a thread pool
+        sources may contain glob patterns; progress receives per-file events.
+        Returns: (success, output, error)
+        """
+        operation = None
+        if isinstance(sources, str):
+            sources = [sources]
+        if any(is_protected_path(path) for path in self.bulk_paths(sources, destination)):
+            return False, '', f'Bulk {action} refused: it touches a protected system path'
+        sources = [os.path.join(self.cwd, source) for source in sources]
+        if destination:
+            destination = os.path.join(self.cwd, destination)
+        try:
+            operation = BulkFileOperation(action, sources, destination, progress=progress)
+            with self._process_lock:
+                self.bulk_operations.add(operation)
+            summary = operation.run()
+        except Exception as e:
+            return False, '', f'Bulk {action} failed: {str(e)}'
+        finally:
+            with self._process_lock:
+                self.bulk_operations.discard(operation)
+            self.invalidate_results()  # Whatever was copied, moved or deleted changed the tree
+
+        output = (f"{summary['action'].capitalize()}: {summary['completed']}/{summary['total']} "
+                  f"file(s), {summary['bytes']} bytes")
+        if summary['cancelled']:
+            return False, output, 'Operation cancelled'
+        if summary['errors']:
+            errors = '\n'.join(f'{path}: {msg}' for path, msg in summary['errors'])
+            return False, output, errors
+        return True, output, ''
+
+    def estimate_impact(self, command, deadline=2.0, progress=None):
+        """
+        Start counting the files and bytes a risky command would touch
+        Returns a running ImpactEstimator (poll snapshot() or pass progress),
+        or None when the command has no path arguments.
+        """
+        paths = [os.path.join(self.cwd, path) for path in get_affected_paths(command)]
+        if not paths:
+            return None
+        return ImpactEstimator(paths, deadline=deadline, progress=progress).start()
+
+    def cancel_bulk_operation(self):
+        """Cancel the running bulk file operations, if any"""
+        with self._process_lock:
+            operations = list(self.bulk_operations)
+        for operation in operations:
+            operation.cancel()
+        return bool(operations)
+
     def list_processes(self):
         """List running processes"""
         try:
             processes = []
             
-            # Add our managed processes
-            for pid, info in self.running_processes.items():
-                processes.append(f"[MANAGED] PID: {pid}, Command: {info['command']}")
+            # Add our managed processes, from a snapshot so others can start/kill meanwhile
+            with self._process_lock:
+                managed = list(self.running_processes.items())
+            for pid, info in managed:
+                with info['lock']:
+                    exit_code = poll_with_usage(info['process'], info['usage'], info['start_time'])
+                    usage = dict(info['usage'])
+                status = 'running' if exit_code is None else f'exited {exit_code}'
+                cpu_time = usage['user_time'] + usage['system_time']
+                processes.append(f"[MANAGED] PID: {pid}, Command: {info['command']}, {status}, "
+                                 f"CPU: {cpu_time:.2f}s, RSS: {format_size(usage['max_rss'])}")
             
             # Add system processes (top 10 by CPU usage)
             system_procs = []
@@ -174,13 +859,16 @@ class CommandEngine:
             return False, '', f'Failed to list processes: {str(e)}'
 
     def cleanup(self):
-        """Clean up any running background processes"""
-        for pid, info in self.running_processes.items():
+        """Clean up any running background processes and open file views"""
+        self.paged_files.close_all()
+        with self._process_lock:
+            managed = list(self.running_processes.values())
+            self.running_processes.clear()
+        for info in managed:
             try:
-                info['process'].terminate()
+                self._stop_process(info)
             except:
                 pass
-        self.running_processes.clear()
 
 # Legacy function for backward compatibility
 def execute_command(command):
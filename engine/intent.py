@@ -0,0 +1,59 @@
+"""
+CommandIntent: the single object that flows through the command pipeline.
+"""
+
+
+class CommandIntent:
+    """
+    One user input on its way through the pipeline
+
+    Created once per input by preprocessor.parse_intent(); later stages fill
+    in fields instead of re-deriving them from the raw string.
+        raw         - input exactly as typed
+        text        - stripped input (original case, used for direct commands)
+        lower       - lowercased text, computed once for all regex stages
+                      (spelling-corrected for natural language input)
+        tokens      - whitespace tokens of lower (split on first use)
+        mode        - 'direct' or 'nl'
+        components  - dict from parse_nl_components (action, target, ...)
+        confidence  - 0..1, how sure the parser is about the action/target
+        command     - mapped shell command, set by mapper.map_intent
+        candidates  - ranked (name, score) near misses when the target did not resolve
+    """
+    __slots__ = ('raw', 'text', 'lower', '_tokens', 'mode', 'components', 'confidence', 'command',
+                 'candidates')
+
+    def __init__(self, raw, mode='nl', components=None, confidence=0.0, command=None):
+        self.raw = raw
+        self.text = raw.strip() if raw else ''
+        self.lower = self.text.lower()
+        self._tokens = None
+        self.mode = mode
+        self.components = components if components is not None else {}
+        self.confidence = confidence
+        self.command = command
+        self.candidates = []
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            self._tokens = self.lower.split()
+        return self._tokens
+
+    def set_lower(self, lower):
+        """Replace the lowercased text (e.g. after spelling correction)"""
+        if lower != self.lower:
+            self.lower = lower
+            self._tokens = None
+
+    @property
+    def action(self):
+        return self.components.get('action')
+
+    def as_tuple(self):
+        """Legacy (normalized, mode, components) view used by preprocess_input"""
+        return self.text, self.mode, self.components
+
+    def __repr__(self):
+        return (f'CommandIntent(text={self.text!r}, mode={self.mode!r}, '
+                f'action={self.action!r}, confidence={self.confidence}, command={self.command!r})')
@@ -0,0 +1,280 @@
+"""
+User-defined aliases and macros, expanded before any natural language parsing.
+
+Definitions live in a JSON file (default ~/.nl_terminal/macros.json, or the
+NL_TERMINAL_MACROS environment variable):
+    {
+        "aliases": {"ll": "ls -la"},
+        "macros": {
+            "deploy logs {service}": ["cd /srv/{service}", "tail -n 200 logs/deploy.log"],
+            "grep code {pattern} {paths*}": "grep -rn {pattern} {paths}"
+        }
+    }
+Literal words match case-insensitively, {name} captures one word and a final
+{name*} captures the rest of the input. Words left over after a match are
+appended to the last step, like a shell alias. Steps are shell commands.
+Captured values are substituted shell-quoted ({name*} word by word), so
+"say {word}" with "a; rm x" echoes the text instead of running rm. cmd.exe
+has no such quoting, so on Windows values with its metacharacters are rejected.
+"""
+import json
+import os
+import re
+import shlex
+import subprocess
+import threading
+import time
+
+DEFAULT_MACROS_PATH = os.environ.get('NL_TERMINAL_MACROS') or \
+    os.path.join(os.path.expanduser('~'), '.nl_terminal', 'macros.json')
+RELOAD_INTERVAL = 1.0  # Seconds between checks of the file's mtime
+
+PARAM_PATTERN = re.compile(r'^\{(\w+)(\*?)\}$')
+PLACEHOLDER_PATTERN = re.compile(r'\{(\w+)\*?\}')
+WORD_PATTERN = re.compile(r'\S+')
+IS_WINDOWS = os.name == 'nt'
+CMD_METACHARACTERS = set('&|<>^%!"()')
+
+
+def quote_value(value, rest=False):
+    """
+    A captured value as shell text that the shell reads back as data
+    rest: a {name*} value, quoted word by word (quotes in it group words)
+    Raises ValueError for values that cannot be quoted safely.
+    """
+    if IS_WINDOWS:
+        if CMD_METACHARACTERS & set(value):
+            raise ValueError(f'{value!r} contains shell metacharacters')
+        return subprocess.list2cmdline(value.split() if rest else [value])
+    if rest:
+        return ' '.join(shlex.quote(word) for word in shlex.split(value))
+    return shlex.quote(value)
+
+
+class Macro:
+    """One compiled definition: its pattern, parameter names and step templates"""
+    __slots__ = ('name', 'params', 'rest', 'templates')
+
+    def __init__(self, name, steps):
+        self.name = name
+        self.params = []
+        self.rest = None  # Name of the final {name*} parameter
+        for token in name.split():
+            match = PARAM_PATTERN.match(token)
+            if match:
+                if match.group(1) in self.params:
+                    raise ValueError(f'{name!r}: parameter {match.group(1)!r} appears twice')
+                self.params.append(match.group(1))
+                if match.group(2):
+                    self.rest = match.group(1)
+        if isinstance(steps, str):
+            steps = [steps]
+        if not steps or not all(isinstance(step, str) and step.strip() for step in steps):
+            raise ValueError(f'{name!r}: steps must be a non-empty command or list of commands')
+        # Split each step once into literal text and parameter names
+        self.templates = [self._compile_step(step) for step in steps]
+
+    def _compile_step(self, step):
+        parts = []
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(step):
+            if match.group(1) not in self.params:
+                continue  # Not ours, e.g. find's {} or awk's {print}
+            parts.append(step[position:match.start()])
+            parts.append((match.group(1),))
+            position = match.end()
+        parts.append(step[position:])
+        return parts
+
+    def render(self, captured, extra=''):
+        """
+        The expanded steps, with extra appended to the last one
+        captured: parameter values in the order the parameters appear in the name
+        Raises ValueError if a value cannot be quoted (see quote_value).
+        """
+        values = {name: quote_value(value, rest=name == self.rest)
+                  for name, value in zip(self.params, captured)}
+        steps = [''.join(values[part[0]] if isinstance(part, tuple) else part for part in template)
+                 for template in self.templates]
+        if extra:
+            steps[-1] = f'{steps[-1]} {extra}'
+        return steps
+
+    def __repr__(self):
+        return f'Macro({self.name!r}, steps={len(self.templates)})'
+
+
+class _Node:
+    """Trie node keyed on lowercased words"""
+    __slots__ = ('children', 'param', 'rest', 'macro')
+
+    def __init__(self):
+        self.children = {}
+        self.param = None  # _Node after a {name} word
+        self.rest = None  # Macro ending in {name*} here
+        self.macro = None  # Macro ending here
+
+
+class MacroExpansion:
+    """A matched macro, its parameter values and the commands it expands to"""
+    __slots__ = ('macro', 'values', 'steps')
+
+    def __init__(self, macro, captured, steps):
+        self.macro = macro
+        self.values = dict(zip(macro.params, captured))
+        self.steps = steps
+
+    @property
+    def name(self):
+        return self.macro.name
+
+    def __repr__(self):
+        return f'MacroExpansion({self.name!r}, steps={self.steps!r})'
+
+
+def compile_macros(config):
+    """
+    Build the trie for a config dict ({'aliases': {...}, 'macros': {...}})
+    Raises ValueError for malformed definitions. Returns: (root, count)
+    """
+    if not isinstance(config, dict):
+        raise ValueError('Macro config must be a JSON object')
+    root = _Node()
+    count = 0
+    definitions = list((config.get('aliases') or {}).items()) + list((config.get('macros') or {}).items())
+    for name, steps in definitions:
+        macro = Macro(name, steps)
+        words = name.split()
+        if not words:
+            raise ValueError('Empty macro name')
+        node = root
+        for i, word in enumerate(words):
+            match = PARAM_PATTERN.match(word)
+            if match and match.group(2):
+                if i != len(words) - 1:
+                    raise ValueError(f'{name!r}: {word} must be the last word')
+                node.rest = macro
+                break
+            if match:
+                # Parameters are captured by position, so macros can name them differently
+                if node.param is None:
+                    node.param = _Node()
+                node = node.param
+            else:
+                node = node.children.setdefault(word.lower(), _Node())
+        else:
+            node.macro = macro
+        count += 1
+    return root, count
+
+
+class MacroTable:
+    """
+    Aliases and macros loaded from a JSON file, compiled into a word trie
+
+    expand() walks the trie once over the input's words, so its cost depends
+    on the input length, not on how many macros exist. Literal words take
+    precedence over {param} words, without backtracking, and the longest match
+    wins. The file is re-read when its mtime or size changes (checked at most
+    every reload_interval seconds); if it is invalid the previous definitions
+    stay active and the problem is kept in .error.
+    """
+
+    def __init__(self, path=DEFAULT_MACROS_PATH, reload_interval=RELOAD_INTERVAL, config=None):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.error = None
+        self.count = 0
+        self._root = _Node()
+        self._stamp = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        if config is not None:
+            self._root, self.count = compile_macros(config)
+            self.path = None
+
+    def expand(self, text):
+        """MacroExpansion for text, or None if no macro matches"""
+        if self.path is not None:
+            self.reload_if_changed()
+        root = self._root
+        if not root.children and root.param is None and root.rest is None:
+            return None
+
+        words = list(WORD_PATTERN.finditer(text))
+        node = root
+        captured = []
+        best = None  # (macro, captured values, words used)
+        for i, word in enumerate(words):
+            if node.rest is not None:
+                best = (node.rest, captured + [text[word.start():].strip()], len(words))
+            child = node.children.get(word.group().lower())
+            if child is None and node.param is not None:
+                child = node.param
+                captured.append(word.group())
+            if child is None:
+                break
+            node = child
+            if node.macro is not None:
+                best = (node.macro, list(captured), i + 1)
+        else:
+            if node.rest is not None:
+                best = (node.rest, captured + [''], len(words))
+
+        if best is None:
+            return None
+        macro, captured, used = best
+        extra = text[words[used].start():].strip() if used < len(words) else ''
+        return MacroExpansion(macro, captured, macro.render(captured, extra))
+
+    def reload_if_changed(self, force=False):
+        """Re-read the file if it changed; returns True if new definitions were loaded"""
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        self._next_check = now + self.reload_interval
+        try:
+            st = os.stat(self.path)
+            stamp = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            stamp = None
+        if stamp == self._stamp and not force:
+            return False
+
+        with self._lock:
+            if stamp == self._stamp and not force:
+                return False
+            self._stamp = stamp
+            if stamp is None:
+                # File removed: no definitions
+                self._root, self.count, self.error = _Node(), 0, None
+                return True
+            try:
+                with open(self.path, encoding='utf-8') as f:
+                    config = json.load(f)
+                root, count = compile_macros(config)
+            except (OSError, ValueError) as e:
+                self.error = f'{self.path}: {e}'
+                return False
+            self._root, self.count, self.error = root, count, None
+            return True
+
+
+_macro_table = None
+_macro_table_lock = threading.Lock()
+
+
+def get_macro_table():
+    """The shared table for DEFAULT_MACROS_PATH, created on first use (False if disabled)"""
+    global _macro_table
+    if _macro_table is None:
+        with _macro_table_lock:
+            if _macro_table is None:
+                _macro_table = MacroTable()
+    return _macro_table
+
+
+def set_macro_table(table):
+    """Install a MacroTable shared by every engine, or None to disable macros"""
+    global _macro_table
+    _macro_table = table if table is not None else False
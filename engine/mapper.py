@@ -4,11 +4,29 @@ Maps natural language to shell/system commands using intelligent parsing.
 import platform
 import re
 import os
+import shlex
 
-def map_nl_to_command(nl_input, components=None):
+# Legacy fallback patterns, matched against lowercased input
+LEGACY_LIST_PATTERN = re.compile(r'\b(list|show|display)\b.*\b(files?|contents?|directory|folder)\b')
+LEGACY_PROCESS_PATTERN = re.compile(r'\b(show|list)\b.*\b(process|processes|running)\b')
+LEGACY_SYSINFO_PATTERN = re.compile(r'\b(system info|computer info|hardware)\b')
+
+def map_intent(intent):
+    """
+    Fill in intent.command from a CommandIntent built by parse_intent
+    Direct commands pass through unchanged. Returns the command.
+    """
+    if intent.mode == 'nl':
+        intent.command = map_nl_to_command(intent.text, intent.components, intent.lower)
+    else:
+        intent.command = intent.text
+    return intent.command
+
+def map_nl_to_command(nl_input, components=None, text_lower=None):
     """
     Map natural language input to system commands using parsed components
     Supports both Windows and Unix-like systems
+    text_lower: already lowercased nl_input, reused by the fallback parsers
     """
     if not nl_input:
         return nl_input
@@ -16,9 +34,12 @@ def map_nl_to_command(nl_input, components=None):
     # Determine OS for appropriate command mapping
     is_windows = platform.system().lower() == 'windows'
     
+    if text_lower is None:
+        text_lower = nl_input.lower()
+    
     # If components not provided, do basic parsing
     if not components:
-        components = parse_basic_components(nl_input)
+        components = parse_basic_components(nl_input, text_lower)
     
     # Handle different actions based on parsed components
     action = components.get('action')
@@ -57,14 +78,14 @@ def map_nl_to_command(nl_input, components=None):
     
     # Read/View commands
     elif action == 'read':
-        return build_read_command(target or filename, is_windows)
+        return build_read_command(target or filename, is_windows, components.get('view'))
     
     # Run/Execute commands
     elif action == 'run':
         return build_run_command(target or filename)
     
     # Fallback to legacy pattern matching
-    return legacy_pattern_matching(nl_input, is_windows)
+    return legacy_pattern_matching(nl_input, is_windows, text_lower)
 
 def build_navigation_command(target, drive, is_windows):
     """Build navigation command (cd) with intelligent path construction"""
@@ -217,8 +238,12 @@ def build_find_command(target, drive, is_windows):
     else:
         return f'find . -name "*{target}*"'
 
-def build_read_command(target, is_windows):
-    """Build read/view file command"""
+def build_read_command(target, is_windows, view=None):
+    """
+    Build read/view file command
+    view: optional ('head', n), ('tail', n), ('range', first, last) with 1-based
+    line numbers, or ('search', text)
+    """
     if not target:
         return 'echo "Please specify file to read"'
     
@@ -226,6 +251,25 @@ def build_read_command(target, is_windows):
     if ' ' in target:
         target = f'"{target}"'
     
+    kind = view[0] if view else None
+    if kind == 'head':
+        return (f'powershell -Command "Get-Content {target} -TotalCount {view[1]}"' if is_windows
+                else f'head -n {view[1]} {target}')
+    if kind == 'tail':
+        return (f'powershell -Command "Get-Content {target} -Tail {view[1]}"' if is_windows
+                else f'tail -n {view[1]} {target}')
+    if kind == 'range':
+        first, last = view[1], max(view[1], view[2])
+        if is_windows:
+            return (f'powershell -Command "Get-Content {target} | Select-Object -Skip {first - 1} '
+                    f'-First {last - first + 1}"')
+        return f"sed -n '{first},{last}p' {target}"
+    if kind == 'search':
+        if is_windows:
+            text = view[1].replace('"', '')
+            return f'findstr /n /i "{text}" {target}'
+        return f'grep -n -i {shlex.quote(view[1])} {target}'
+    
     return f'type {target}' if is_windows else f'cat {target}'
 
 def build_run_command(target):
@@ -239,11 +283,12 @@ def build_run_command(target):
     
     return target
 
-def parse_basic_components(nl_input):
+def parse_basic_components(nl_input, text_lower=None):
     """Basic component parsing for fallback"""
     components = {'action': None, 'target': None, 'drive': None}
     
-    text_lower = nl_input.lower()
+    if text_lower is None:
+        text_lower = nl_input.lower()
     
     # Basic action detection
     if any(word in text_lower for word in ['go', 'navigate', 'cd']):
@@ -255,20 +300,20 @@ def parse_basic_components(nl_input):
     
     return components
 
-def legacy_pattern_matching(nl_input, is_windows):
+def legacy_pattern_matching(nl_input, is_windows, text_lower=None):
     """Legacy pattern matching for backward compatibility"""
-    nl_lower = nl_input.lower().strip()
+    nl_lower = (text_lower if text_lower is not None else nl_input.lower()).strip()
     
     # File listing commands
-    if re.search(r'\b(list|show|display)\b.*\b(files?|contents?|directory|folder)\b', nl_lower):
+    if LEGACY_LIST_PATTERN.search(nl_lower):
         return 'dir' if is_windows else 'ls -la'
     
     # Process management
-    if re.search(r'\b(show|list)\b.*\b(process|processes|running)\b', nl_lower):
+    if LEGACY_PROCESS_PATTERN.search(nl_lower):
         return 'tasklist' if is_windows else 'ps aux'
     
     # System information
-    if re.search(r'\b(system info|computer info|hardware)\b', nl_lower):
+    if LEGACY_SYSINFO_PATTERN.search(nl_lower):
         return 'systeminfo' if is_windows else 'uname -a'
     
     # If no mapping found, return original input
@@ -3,6 +3,348 @@ Handles input pre-processing and normalization.
 """
 import re
 import os
+import json
+import shutil
+import threading
+from functools import lru_cache
+from .intent import CommandIntent
+
+# Patterns are compiled once at import; every input is matched against its lowercased text
+DRIVE_PATTERNS = [re.compile(p) for p in (
+    r'\bdrive\s+([a-z])\b',
+    r'\bon\s+drive\s+([a-z])\b',
+    r'\bin\s+drive\s+([a-z])\b'
+)]
+
+FOLDER_PATTERNS = [re.compile(p) for p in (
+    r'\bfolder\s+called\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bfolder\s+named\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bfolder\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bdirectory\s+called\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bdirectory\s+named\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bdirectory\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\bto\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)'
+)]
+TARGET_CLEANUP = re.compile(r'\b(in|on|at|from|to)\b.*$')
+
+FILE_PATTERNS = [re.compile(p) for p in (
+    r'\bfile\s+([\w\.-]+\.[\w]{1,4})\b',
+    r'\bdocument\s+([\w\.-]+\.[\w]{1,4})\b',
+    r'\bnamed\s+([\w\.-]+\.[\w]{1,4})\b',
+    r'\bcalled\s+([\w\.-]+\.[\w]{1,4})\b',
+    r'\bfile\s+called\s+([\w\.-]+\.[\w]{1,4})\b'
+)]
+
+# Actions with priority order
+ACTION_PATTERNS = [(re.compile(p), action) for p, action in (
+    (r'\b(go|navigate|change)\s+to\b', 'navigate'),
+    (r'\b(cd)\b', 'navigate'),
+    (r'\b(list|show|display|see|view)\b.*\b(files?|contents?|directory|folder)\b', 'list'),
+    (r'\b(dir|ls)\b', 'list'),
+    (r'\b(create|make|new)\b', 'create'),
+    (r'\b(mkdir)\b', 'create'),
+    (r'\b(delete|remove|erase)\b', 'delete'),
+    (r'\b(del|rm)\b', 'delete'),
+    (r'\b(copy|duplicate|cp)\b', 'copy'),
+    (r'\b(move|relocate|mv)\b', 'move'),
+    (r'\b(find|search|locate)\b', 'find'),
+    (r'\b(read|open|cat|type)\b', 'read'),
+    (r'\b(run|execute|start|launch)\b', 'run')
+)]
+
+DESTINATION_PATTERNS = [re.compile(p) for p in (
+    r'\bto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
+    r'\binto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s*$)',
+    r'\bdestination\s+([\w\s]+?)(?:\s*$)'
+)]
+
+# Partial views of a file ("last 100 lines of server.log"); these make the action 'read'
+VIEW_PATTERNS = [(re.compile(p), view) for p, view in (
+    (r'\b(?:last|final|bottom)\s+(\d+)\s+lines?\b', 'tail'),
+    (r'\b(?:first|top)\s+(\d+)\s+lines?\b', 'head'),
+    (r'\blines?\s+(\d+)\s*(?:to|through|until|-)\s*(\d+)\b', 'range'),
+    (r'\b(?:search|grep|look)\s+(?:for\s+)?["\']?(.+?)["\']?\s+in\s+(?:the\s+)?(?:file\s+)?'
+     r'[\w\./-]+\.\w{1,4}\b', 'search'),
+)]
+# File named by a read request that FILE_PATTERNS miss ("open server.log", "... of app.log")
+READ_FILE_PATTERN = re.compile(
+    r'\b(?:of|in|from|read|open|view|cat|type)\s+(?:the\s+)?(?:file\s+)?([\w\./-]+\.\w{1,4})\b')
+
+# Requests naming many files at once ("copy all the logs to backup", "delete *.tmp")
+BULK_REQUEST_PATTERN = re.compile(
+    r'^(copy|move|delete|remove)\s+(.+?)'
+    r'(?:\s+(?:to|into)\s+(?:the\s+)?(?:(?:folder|directory)\s+)?(.+?))?\s*$', re.IGNORECASE)
+BULK_ALL_PATTERN = re.compile(r'^all\s+(?:of\s+)?(?:the\s+)?(?:\.?(\w+)\s+)?(files|\w+?s)$', re.IGNORECASE)
+BULK_NOUN_PREFIX = re.compile(r'^(?:the\s+)?(?:(?:folder|directory|files?)\s+)?', re.IGNORECASE)
+BULK_TYPE_EXTENSIONS = {'python': 'py', 'text': 'txt', 'image': 'png', 'markdown': 'md'}
+GLOB_CHARS = set('*?[')
+
+# Direct command patterns
+DIRECT_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'^(cd|ls|dir|mkdir|rmdir|rm|del|cp|copy|mv|move|cat|type|echo|pwd|ps|kill|grep|find|curl|wget)\b',
+    r'^[a-zA-Z]:[/\\]',  # Windows path
+    r'^[/~]',  # Unix path
+    r'^\w+\.(exe|bat|sh|py|js)\b',  # Executable files
+    r'^[a-zA-Z_]\w*\s*=',  # Variable assignment
+)]
+
+# Natural language indicators
+NL_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'\b(please|can you|could you|help me|i want to|i need to|show me|tell me|go to|navigate to)\b',
+    r'\b(what|where|how|why|when)\b',
+    r'\b(folder|directory|file|document|drive)\b',
+    r'\b(create|delete|remove|list|find|show|display|see|view)\b'
+)]
+
+# Actions that make sense without naming a file or folder
+STANDALONE_ACTIONS = {'list', 'navigate', 'find'}
+
+# Vocabulary the spelling corrector corrects towards, in priority order for ties
+ACTION_WORDS = (
+    'list', 'show', 'display', 'view', 'navigate', 'change', 'create', 'make', 'delete', 'remove',
+    'erase', 'copy', 'duplicate', 'move', 'relocate', 'find', 'search', 'locate', 'read', 'open',
+    'execute', 'start', 'launch', 'mkdir'
+)
+OBJECT_WORDS = (
+    'file', 'files', 'folder', 'folders', 'directory', 'directories', 'contents', 'document',
+    'drive', 'process', 'processes', 'running', 'system', 'info', 'computer', 'hardware'
+)
+MODIFIER_WORDS = ('called', 'named', 'into', 'destination', 'please', 'current')
+
+# Tokens after these words are names chosen by the user and are never corrected
+NAME_INTRODUCERS = {'folder', 'directory', 'file', 'document', 'called', 'named', 'to', 'into',
+                    'destination'}
+
+# Words VIEW_PATTERNS look for; never corrected ("last" is not a typo of "list")
+VIEW_WORDS = {'last', 'final', 'bottom', 'first', 'top', 'line', 'lines', 'through', 'until'}
+
+# Every word that already marks an action, including short forms the corrector never targets
+KNOWN_ACTION_WORDS = set(ACTION_WORDS) | {'go', 'cd', 'see', 'new', 'dir', 'ls', 'del', 'rm', 'cp',
+                                          'mv', 'cat', 'type', 'run'}
+
+@lru_cache(maxsize=1024)
+def is_program(name):
+    """True if name is an executable on PATH, i.e. a real command rather than a typo"""
+    return shutil.which(name) is not None
+
+def is_substitution(a, b):
+    """True if a and b have the same length and differ in exactly one position"""
+    return len(a) == len(b) and sum(x != y for x, y in zip(a, b)) == 1
+
+def edit_distance(a, b, limit):
+    """Optimal string alignment distance (adjacent swaps cost 1), capped at limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2 = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous2 is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+class SpellingCorrector:
+    """
+    SymSpell-style corrector over the engine vocabulary
+
+    Every vocabulary word is indexed under all its variants with up to
+    max_distance characters deleted. A token is looked up by generating its own
+    deletes, so finding candidates costs a handful of dict lookups no matter
+    how big the vocabulary is. Results are memoized per token. Safe to share
+    between threads.
+    """
+
+    MIN_TOKEN_LENGTH = 4  # Shorter tokens are too ambiguous to correct ('cd' vs 'cp')
+    CACHE_SIZE = 4096
+
+    def __init__(self, vocabulary=None, max_distance=2, deletes=None):
+        if vocabulary is None:
+            vocabulary = ACTION_WORDS + OBJECT_WORDS + MODIFIER_WORDS
+        self.vocabulary = [word for word in vocabulary if len(word) >= self.MIN_TOKEN_LENGTH]
+        self.words = set(self.vocabulary)
+        self.rank = {word: i for i, word in enumerate(self.vocabulary)}
+        self.actions = set(ACTION_WORDS)
+        self.max_distance = max_distance
+        self.deletes = deletes if deletes is not None else self._build_deletes()
+        self._cache = {}
+        self._stats_lock = threading.Lock()
+        self.stats_counts = {'inputs': 0, 'tokens': 0, 'corrected': 0, 'cache_hits': 0}
+
+    def _build_deletes(self):
+        deletes = {}
+        for word in self.vocabulary:
+            for variant in self._variants(word, self.max_distance):
+                deletes.setdefault(variant, []).append(word)
+        return deletes
+
+    @staticmethod
+    def _variants(word, distance):
+        """word plus every string made by deleting up to distance characters"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def allowed_distance(token):
+        return 1 if len(token) <= 5 else 2
+
+    def lookup(self, token):
+        """Best vocabulary word within the allowed distance of token, or None"""
+        cached = self._cache.get(token, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            with self._stats_lock:
+                self.stats_counts['cache_hits'] += 1
+            return cached
+
+        best = None
+        if token not in self.words and len(token) >= self.MIN_TOKEN_LENGTH and token.isalpha():
+            limit = min(self.allowed_distance(token), self.max_distance)
+            candidates = set()
+            for variant in self._variants(token, limit):
+                candidates.update(self.deletes.get(variant, ()))
+            ranked = []
+            for word in candidates:
+                distance = edit_distance(token, word, limit)
+                if distance <= limit:
+                    ranked.append((distance, self.rank[word], word))
+            if ranked:
+                best = min(ranked)[2]
+
+        if len(self._cache) >= self.CACHE_SIZE:
+            self._cache.clear()
+        self._cache[token] = best
+        return best
+
+    def correct(self, text_lower):
+        """
+        Correct misspelled vocabulary words in lowercased text
+        Names that follow 'folder', 'called', 'to', ... are left alone, and no
+        token is turned into an action word if the text already has an action.
+        A first word that is a program on PATH ("head", "more", "stat") is a
+        command, not a typo, and short words one letter away from an action
+        ("take", "mode") are words of their own, so neither becomes an action.
+        """
+        tokens = text_lower.split()
+        has_action = any(token in KNOWN_ACTION_WORDS for token in tokens)
+
+        corrected = 0
+        protected = False
+        for i, token in enumerate(tokens):
+            if protected:
+                protected = False
+                continue
+            if (token in self.words or len(token) < self.MIN_TOKEN_LENGTH or token in VIEW_WORDS
+                    or (i == 0 and is_program(token))):
+                correction = None  # Known words and short tokens never change, skip the lookup
+            else:
+                correction = self.lookup(token)
+            if correction in self.actions and len(token) <= 5 and is_substitution(token, correction):
+                correction = None
+            if correction is not None and not (has_action and correction in self.actions):
+                tokens[i] = correction
+                corrected += 1
+                has_action = has_action or correction in self.actions
+            protected = tokens[i] in NAME_INTRODUCERS
+
+        with self._stats_lock:
+            self.stats_counts['inputs'] += 1
+            self.stats_counts['tokens'] += len(tokens)
+            self.stats_counts['corrected'] += corrected
+        return ' '.join(tokens) if corrected else text_lower
+
+    def stats(self):
+        """Counters since startup: inputs, tokens, corrected, cache_hits"""
+        with self._stats_lock:
+            return dict(self.stats_counts)
+
+    def save(self, path):
+        """Serialize the delete index so startup can skip building it"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'max_distance': self.max_distance, 'vocabulary': self.vocabulary,
+                       'deletes': self.deletes}, f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data['vocabulary'], data['max_distance'], data['deletes'])
+
+_NOT_CACHED = object()
+_spelling_corrector = None
+_spelling_corrector_lock = threading.Lock()
+
+def get_spelling_corrector():
+    """The shared corrector, built on first use"""
+    global _spelling_corrector
+    if _spelling_corrector is None:
+        with _spelling_corrector_lock:
+            if _spelling_corrector is None:
+                _spelling_corrector = SpellingCorrector()
+    return _spelling_corrector
+
+def set_spelling_corrector(corrector):
+    """Install a corrector (e.g. SpellingCorrector.load(path)), or None to disable correction"""
+    global _spelling_corrector
+    _spelling_corrector = corrector if corrector is not None else False
+
+def get_spelling_stats():
+    """Correction counters of the shared corrector"""
+    corrector = get_spelling_corrector()
+    return corrector.stats() if corrector else {}
+
+def parse_intent(user_input):
+    """
+    Build the CommandIntent for one input: normalize once, then fill in mode,
+    components and confidence from the shared lowercased text
+    """
+    intent = CommandIntent(user_input or '')
+    if not intent.text:
+        intent.mode = 'direct'
+        return intent
+
+    intent.mode = detect_input_mode(intent.text)
+    components = None
+    if intent.mode == 'nl':
+        # Fix typos like "lsit" or "delte" before any pattern sees the text
+        corrector = get_spelling_corrector()
+        corrected = corrector.correct(intent.lower) if corrector else intent.lower
+        if corrected != intent.lower:
+            original = parse_nl_components(intent.text, intent.lower)
+            components = parse_nl_components(intent.text, corrected)
+            if original['action'] is not None and components['action'] != original['action']:
+                # The input already meant something; a correction must not change the action
+                components = original
+            else:
+                intent.set_lower(corrected)
+    
+    intent.components = components or parse_nl_components(intent.text, intent.lower)
+    intent.confidence = estimate_confidence(intent.mode, intent.components)
+    return intent
+
+def estimate_confidence(mode, components):
+    """Rough confidence that the parsed components capture what the user meant"""
+    if mode == 'direct':
+        return 1.0
+    action = components.get('action')
+    if not action:
+        return 0.3
+    if components.get('target') or components.get('filename') or action in STANDALONE_ACTIONS:
+        return 0.9
+    return 0.6
 
 def preprocess_input(user_input):
     """
@@ -14,20 +356,12 @@ def preprocess_input(user_input):
     if not user_input:
         return "", "direct", {}
     
-    # Normalize input
-    normalized = user_input.strip()
-    
-    # Parse natural language components
-    components = parse_nl_components(normalized)
-    
-    # Detect mode based on patterns
-    mode = detect_input_mode(normalized)
-    
-    return normalized, mode, components
+    return parse_intent(user_input).as_tuple()
 
-def parse_nl_components(input_text):
+def parse_nl_components(input_text, text_lower=None):
     """
     Extract meaningful components from natural language input
+    text_lower: already lowercased input_text, to avoid lowercasing again
     Returns dict with action, target, location, modifiers, etc.
     """
     components = {
@@ -40,90 +374,65 @@ def parse_nl_components(input_text):
         'modifiers': []
     }
     
-    text_lower = input_text.lower()
+    if text_lower is None:
+        text_lower = input_text.lower()
     
+    # Each group of patterns is only tried when the text has a word they all need
     # Extract drive information - improved pattern
-    drive_patterns = [
-        r'\bdrive\s+([a-z])\b',
-        r'\bon\s+drive\s+([a-z])\b',
-        r'\bin\s+drive\s+([a-z])\b'
-    ]
-    
-    for pattern in drive_patterns:
-        drive_match = re.search(pattern, text_lower)
+    for pattern in DRIVE_PATTERNS if 'drive' in text_lower else ():
+        drive_match = pattern.search(text_lower)
         if drive_match:
             components['drive'] = drive_match.group(1).upper() + ':'
             break
     
     # Extract folder/directory names - improved patterns
-    folder_patterns = [
-        r'\bfolder\s+called\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bfolder\s+named\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bfolder\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bdirectory\s+called\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bdirectory\s+named\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bdirectory\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-        r'\bto\s+([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)'
-    ]
-    
-    for pattern in folder_patterns:
-        folder_match = re.search(pattern, text_lower)
+    has_folder = 'folder' in text_lower or 'directory' in text_lower or 'to' in text_lower
+    for pattern in FOLDER_PATTERNS if has_folder else ():
+        folder_match = pattern.search(text_lower)
         if folder_match:
             target = folder_match.group(1).strip()
             # Clean up common words that shouldn't be in target
-            target = re.sub(r'\b(in|on|at|from|to)\b.*$', '', target).strip()
+            target = TARGET_CLEANUP.sub('', target).strip()
             if target and len(target) > 0:
                 components['target'] = target
                 break
     
     # Extract file names with extensions
-    file_patterns = [
-        r'\bfile\s+([\w\.-]+\.[\w]{1,4})\b',
-        r'\bdocument\s+([\w\.-]+\.[\w]{1,4})\b',
-        r'\bnamed\s+([\w\.-]+\.[\w]{1,4})\b',
-        r'\bcalled\s+([\w\.-]+\.[\w]{1,4})\b',
-        r'\bfile\s+called\s+([\w\.-]+\.[\w]{1,4})\b'
-    ]
-    
-    for pattern in file_patterns:
-        file_match = re.search(pattern, text_lower)
+    for pattern in FILE_PATTERNS if '.' in text_lower else ():
+        file_match = pattern.search(text_lower)
         if file_match:
             components['filename'] = file_match.group(1)
             break
     
     # Extract actions with priority order
-    action_patterns = [
-        (r'\b(go|navigate|change)\s+to\b', 'navigate'),
-        (r'\b(cd)\b', 'navigate'),
-        (r'\b(list|show|display|see|view)\b.*\b(files?|contents?|directory|folder)\b', 'list'),
-        (r'\b(dir|ls)\b', 'list'),
-        (r'\b(create|make|new)\b', 'create'),
-        (r'\b(mkdir)\b', 'create'),
-        (r'\b(delete|remove|erase)\b', 'delete'),
-        (r'\b(del|rm)\b', 'delete'),
-        (r'\b(copy|duplicate|cp)\b', 'copy'),
-        (r'\b(move|relocate|mv)\b', 'move'),
-        (r'\b(find|search|locate)\b', 'find'),
-        (r'\b(read|open|cat|type)\b', 'read'),
-        (r'\b(run|execute|start|launch)\b', 'run')
-    ]
-    
-    for pattern, action in action_patterns:
-        if re.search(pattern, text_lower):
+    for pattern, action in ACTION_PATTERNS:
+        if pattern.search(text_lower):
             components['action'] = action
             break
     
+    # Partial views ("last 100 lines of x.log") are always reads
+    has_view = any(word in text_lower for word in ('line', 'search', 'grep', 'look'))
+    for pattern, view in VIEW_PATTERNS if has_view else ():
+        view_match = pattern.search(text_lower)
+        if view_match:
+            components['action'] = 'read'
+            if view == 'range':
+                components['view'] = ('range', int(view_match.group(1)), int(view_match.group(2)))
+            elif view == 'search':
+                components['view'] = ('search', view_match.group(1))
+            else:
+                components['view'] = (view, int(view_match.group(1)))
+            break
+    
+    if components['action'] == 'read' and not components['filename']:
+        read_match = READ_FILE_PATTERN.search(text_lower)
+        if read_match:
+            components['filename'] = read_match.group(1)
+    
     # Extract destination for move/copy operations
     if components['action'] in ['copy', 'move']:
-        dest_patterns = [
-            r'\bto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s+on\s+drive|\s*$)',
-            r'\binto\s+(?:folder\s+)?([\w\s]+?)(?:\s+in\s+drive|\s*$)',
-            r'\bdestination\s+([\w\s]+?)(?:\s*$)'
-        ]
-        
-        for pattern in dest_patterns:
-            dest_match = re.search(pattern, text_lower)
+        for pattern in DESTINATION_PATTERNS:
+            dest_match = pattern.search(text_lower)
             if dest_match:
                 dest = dest_match.group(1).strip()
                 # Don't use target as destination
@@ -133,35 +442,52 @@ def parse_nl_components(input_text):
     
     return components
 
+def parse_bulk_request(input_text):
+    """
+    Parse a copy/move/delete request that may name many files
+    'all the logs' becomes '*.log', 'all txt files' '*.txt' and 'all files' '*';
+    other sources are kept as written (globs split on whitespace). Whether a
+    plain name is a directory is left to the caller.
+    Returns: (action, sources, destination) or None
+    """
+    match = BULK_REQUEST_PATTERN.match(input_text.strip())
+    if not match:
+        return None
+    action = match.group(1).lower()
+    action = 'delete' if action == 'remove' else action
+    phrase, destination = match.group(2), match.group(3)
+    if (action == 'delete') != (destination is None):
+        return None  # Deletes take no destination, copies and moves need one
+
+    every = BULK_ALL_PATTERN.match(phrase)
+    if every:
+        kind, noun = every.group(1), every.group(2).lower()
+        if noun == 'files':
+            sources = [f'*.{BULK_TYPE_EXTENSIONS.get(kind.lower(), kind)}' if kind else '*']
+        elif kind:
+            return None  # "all the old logs": not a file type we can name
+        else:
+            kind = noun[:-1]
+            sources = [f'*.{BULK_TYPE_EXTENSIONS.get(kind, kind)}']
+    else:
+        phrase = BULK_NOUN_PREFIX.sub('', phrase, count=1)
+        if not phrase:
+            return None
+        sources = phrase.split() if GLOB_CHARS & set(phrase) else [phrase]
+    return action, sources, destination
+
 def detect_input_mode(input_text):
     """
     Detect if input is a direct command or natural language
     """
-    # Direct command patterns
-    direct_patterns = [
-        r'^(cd|ls|dir|mkdir|rmdir|rm|del|cp|copy|mv|move|cat|type|echo|pwd|ps|kill|grep|find|curl|wget)\b',
-        r'^[a-zA-Z]:[/\\]',  # Windows path
-        r'^[/~]',  # Unix path
-        r'^\w+\.(exe|bat|sh|py|js)\b',  # Executable files
-        r'^[a-zA-Z_]\w*\s*=',  # Variable assignment
-    ]
-    
     # Check for direct command patterns
-    for pattern in direct_patterns:
-        if re.match(pattern, input_text, re.IGNORECASE):
+    for pattern in DIRECT_PATTERNS:
+        if pattern.match(input_text):
             return 'direct'
     
-    # Natural language indicators
-    nl_patterns = [
-        r'\b(please|can you|could you|help me|i want to|i need to|show me|tell me|go to|navigate to)\b',
-        r'\b(what|where|how|why|when)\b',
-        r'\b(folder|directory|file|document|drive)\b',
-        r'\b(create|delete|remove|list|find|show|display|see|view)\b'
-    ]
-    
     # Check for natural language patterns
-    for pattern in nl_patterns:
-        if re.search(pattern, input_text, re.IGNORECASE):
+    for pattern in NL_PATTERNS:
+        if pattern.search(input_text):
             return 'nl'
     
     # Default to natural language if unclear
@@ -0,0 +1,165 @@
+"""
+Resolves parsed targets against the real contents of a directory.
+"""
+import heapq
+import os
+import threading
+from bisect import bisect_left
+from collections import Counter, OrderedDict
+from itertools import chain
+
+# Actions whose target must already exist; create/find are free to name anything
+RESOLVED_ACTIONS = {'navigate', 'list', 'delete', 'copy', 'move', 'read', 'run'}
+
+# Trigrams found in more than this share of a big directory's entries ('.lo',
+# 'log' among thousands of *.log files) say little about a name, so search
+# does not walk their postings
+COMMON_TRIGRAM_SHARE = 0.5
+COMMON_TRIGRAM_MIN_ENTRIES = 1000
+
+
+def trigrams(text):
+    """Trigram set of text, padded so short names and prefixes still overlap"""
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DirectoryIndex:
+    """Trigram index over the entry names of one directory"""
+    __slots__ = ('mtime_ns', 'names', 'sizes', 'by_lower', 'postings')
+
+    def __init__(self, names, mtime_ns=None):
+        self.mtime_ns = mtime_ns
+        self.names = names
+        self.sizes = []
+        self.by_lower = {}  # lowercased name -> entry ids
+        self.postings = {}  # trigram -> entry ids
+        for i, name in enumerate(names):
+            lowered = name.lower()
+            self.by_lower.setdefault(lowered, []).append(i)
+            grams = trigrams(lowered)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+
+    def search(self, query, limit=5, min_score=0.4):
+        """
+        Rank entries by trigram similarity to query
+        In big directories, entries that share only common trigrams with query
+        are not considered.
+        Returns: [(name, score)] best first; case-insensitive equality scores 1.0
+        """
+        lowered = query.lower()
+        query_grams = trigrams(lowered)
+        postings = [self.postings.get(gram, ()) for gram in query_grams]
+        common = []
+        if len(self.names) >= COMMON_TRIGRAM_MIN_ENTRIES:
+            cap = len(self.names) * COMMON_TRIGRAM_SHARE
+            rare = [posting for posting in postings if len(posting) <= cap]
+            if rare:
+                common = [posting for posting in postings if len(posting) > cap]
+                postings = rare
+        # Counter tallies the chained postings in C, which keeps big directories fast
+        shared = Counter(chain.from_iterable(postings))
+        if common:
+            # Postings are in entry order, so the skipped ones can be checked
+            # for just the entries found through the rare ones
+            for i in shared:
+                shared[i] += sum(_contains(posting, i) for posting in common)
+
+        exact = set(self.by_lower.get(lowered, ()))
+        scored = []
+        for i, count in shared.items():
+            score = 1.0 if i in exact else 2.0 * count / (len(query_grams) + self.sizes[i])
+            if score >= min_score:
+                scored.append((score, i))
+
+        best = heapq.nlargest(limit, scored, key=lambda item: (item[0], -item[1]))
+        return [(self.names[i], round(score, 3)) for score, i in best]
+
+
+def _contains(posting, i):
+    """True if i is in posting, a sorted list of entry ids"""
+    position = bisect_left(posting, i)
+    return position < len(posting) and posting[position] == i
+
+
+class TargetResolver:
+    """
+    Matches names against directory contents using per-directory trigram
+    indexes, cached in a bounded LRU and rebuilt when the directory mtime changes
+    """
+
+    def __init__(self, max_directories=64, limit=5, min_score=0.4):
+        self.max_directories = max_directories
+        self.limit = limit
+        self.min_score = min_score
+        self._indexes = OrderedDict()  # directory -> DirectoryIndex
+        self._lock = threading.Lock()
+
+    def index_for(self, directory):
+        """Get the index for directory, or None if it cannot be read"""
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+
+        with self._lock:
+            index = self._indexes.get(directory)
+            if index is not None and index.mtime_ns == mtime_ns:
+                self._indexes.move_to_end(directory)
+                return index
+
+        try:
+            with os.scandir(directory) as it:
+                names = [entry.name for entry in it]
+        except OSError:
+            return None
+        index = DirectoryIndex(names, mtime_ns)
+
+        with self._lock:
+            self._indexes[directory] = index
+            self._indexes.move_to_end(directory)
+            while len(self._indexes) > self.max_directories:
+                self._indexes.popitem(last=False)
+        return index
+
+    def candidates(self, name, directory):
+        """Ranked [(entry_name, score)] for name inside directory"""
+        index = self.index_for(directory)
+        if index is None:
+            return []
+        return index.search(name, self.limit, self.min_score)
+
+    def resolve(self, name, directory):
+        """
+        Resolve name inside directory
+        Returns: (status, value)
+            'exact'     - name exists as given; value is name
+            'corrected' - exactly one entry differs only by case; value is that entry
+            'ambiguous' - near misses exist; value is the ranked candidate list
+            'missing'   - nothing similar (or directory unreadable); value is []
+        """
+        # Most names are typed right; only a miss needs the directory index
+        if name and os.path.lexists(os.path.join(directory, name)):
+            return 'exact', name
+        index = self.index_for(directory)
+        if index is None:
+            return 'missing', []
+
+        same_case = index.by_lower.get(name.lower(), ())
+        if any(index.names[i] == name for i in same_case):
+            return 'exact', name
+        if len(same_case) == 1:
+            return 'corrected', index.names[same_case[0]]
+
+        ranked = index.search(name, self.limit, self.min_score)
+        if ranked:
+            return 'ambiguous', ranked
+        return 'missing', []
+
+
+def format_clarification(name, candidates):
+    """Build the question shown when a target only nearly matches"""
+    options = ', '.join(f"'{candidate}'" for candidate, _ in candidates)
+    return f"Could not find '{name}'. Did you mean: {options}?"
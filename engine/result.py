@@ -0,0 +1,43 @@
+"""
+CommandResult: the structured result of executing a command.
+"""
+
+
+class CommandResult(tuple):
+    """
+    The engine's (success, stdout, stderr) tuple with execution details attached
+
+    Unpacks and compares exactly like the plain tuple, so existing callers keep
+    working; new callers can read the extra attributes:
+        exit_code   - process exit status (None if nothing was spawned)
+        usage       - dict from system.process.run_process, or None
+        timed_out   - True if the command was killed at its timeout; stdout and
+                      stderr then hold the partial output collected until then
+        steps       - for compound requests, one result per step (None if skipped)
+        page        - for paged file reads, the (path, next line) next_page() continues from
+    """
+
+    def __new__(cls, success, stdout='', stderr='', exit_code=None, usage=None, timed_out=False,
+                steps=None, page=None):
+        result = super().__new__(cls, (success, stdout, stderr))
+        result.exit_code = exit_code
+        result.usage = usage
+        result.timed_out = timed_out
+        result.steps = steps
+        result.page = page
+        return result
+
+    def __getnewargs__(self):
+        return tuple(self) + (self.exit_code, self.usage, self.timed_out, self.steps, self.page)
+
+    @property
+    def success(self):
+        return self[0]
+
+    @property
+    def stdout(self):
+        return self[1]
+
+    @property
+    def stderr(self):
+        return self[2]
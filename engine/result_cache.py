@@ -0,0 +1,160 @@
+"""
+Execution result cache for side-effect-free commands.
+"""
+import os
+import re
+import shlex
+import threading
+import time
+from collections import OrderedDict
+
+# Read-only commands by intent. Anything not listed here is treated as mutating.
+READ_ONLY_COMMANDS = {
+    'list': {'ls', 'dir', 'tree'},
+    'read': {'cat', 'type', 'head', 'tail', 'wc'},
+    'sysinfo': {'uname', 'systeminfo', 'hostname', 'whoami', 'pwd', 'df'},
+    'process': {'ps', 'tasklist'},
+}
+
+# Seconds a cached result stays valid, per intent
+DEFAULT_TTLS = {
+    'list': 5.0,
+    'read': 5.0,
+    'sysinfo': 300.0,
+    'process': 1.0,
+}
+
+# Pipes, chaining, redirection and substitution make a command impossible to classify
+SHELL_METACHARACTERS = re.compile(r'[|;&<>`$(){}]')
+
+_COMMAND_INTENTS = {name: intent for intent, names in READ_ONLY_COMMANDS.items() for name in names}
+
+
+def classify_command(command):
+    """
+    Classify a shell command as a read-only intent
+    Returns: (intent, path_arguments) or (None, []) for commands that may mutate state
+    """
+    if not command or SHELL_METACHARACTERS.search(command):
+        return None, []
+    try:
+        tokens = shlex.split(command, posix=os.name != 'nt')
+    except ValueError:
+        return None, []
+    if not tokens:
+        return None, []
+
+    intent = _COMMAND_INTENTS.get(tokens[0].lower())
+    if intent is None:
+        return None, []
+
+    paths = [t.strip('"') for t in tokens[1:]
+             if not t.startswith('-') and not re.match(r'^/[a-zA-Z?]$', t)]
+    if intent == 'list' and not paths:
+        paths = ['.']
+    return intent, paths
+
+
+def _fingerprint(paths, cwd):
+    """Stat each touched path so any change to it produces a different key"""
+    prints = []
+    for path in paths:
+        full = os.path.join(cwd, path)
+        try:
+            st = os.stat(full)
+            prints.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            prints.append((path, None, None))
+    return tuple(prints)
+
+
+class ResultCache:
+    """
+    Size- and byte-bounded LRU of (success, stdout, stderr) results
+
+    Entries are keyed on command, cwd, environment and the mtime/size of the
+    paths the command touches, and expire after a per-intent TTL. The
+    environment is part of the key because it changes what a command prints
+    (~ expands to $HOME, LANG and LS_COLORS change listings). Directory listings see
+    entries being added or removed; in-place edits to listed files are only
+    picked up once the TTL expires.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=8 * 1024 * 1024, ttls=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries = OrderedDict()  # key -> (expires, size, result)
+        self._bytes = 0
+        self._generation = 0  # Bumped by invalidate() so in-flight misses are not stored
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, command, cwd=None, env=None):
+        """
+        Find a cached result for command
+        env: the environment the command runs with (None for this process's)
+        Returns: (key, result) - result is None on a miss, key is None if uncacheable
+        """
+        intent, paths = classify_command(command)
+        if intent is None:
+            return None, None
+        cwd = cwd or os.getcwd()
+        fingerprint = _fingerprint(paths, cwd)
+        env_key = frozenset(env.items()) if env is not None else None
+
+        with self._lock:
+            key = (command, cwd, env_key, intent, fingerprint, self._generation)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return key, entry[2]
+                self._discard(key)
+            self.misses += 1
+        return key, None
+
+    def store(self, key, result):
+        """
+        Remember the result of a lookup() miss
+        Dropped if the cache was invalidated since the lookup, because a mutating
+        command may have run while this one was executing.
+        """
+        if key is None:
+            return
+        size = sum(len(part) for part in result[1:] if part)
+        if size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttls.get(key[3], 0)
+        with self._lock:
+            if key[-1] != self._generation:
+                return
+            self._discard(key)
+            self._entries[key] = (expires, size, result)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate(self):
+        """Drop every entry, e.g. after a mutating command ran"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._generation += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+    def _discard(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
@@ -3,6 +3,10 @@ Safety net and command validation logic.
 """
 import re
 import os
+import platform
+from functools import lru_cache
+from utils.formatting import format_size
+from .shell_ast import parse_command, iter_simple_commands, effective_words, ShellSyntaxError
 
 # Risky commands that require confirmation
 RISKY_COMMANDS = {
@@ -22,52 +26,77 @@ PROTECTED_PATHS = [
     'C:\\Windows', 'C:\\Program Files', 'C:\\Program Files (x86)', 'C:\\System32'
 ]
 
+# Rules are compiled once at import and shared by every engine and session
+OS_TYPE = 'windows' if platform.system().lower() == 'windows' else 'unix'
+POSIX_SHELL = OS_TYPE != 'windows'
+
+DANGEROUS_PATTERNS = [re.compile(p, re.IGNORECASE) for p in (
+    r'rm\s+-rf\s+/',
+    r'rm\s+-rf\s+\*',
+    r'del\s+/s\s+/q\s+c:\\',
+    r'format\s+c:',
+    r'dd\s+if=.*\s+of=/dev/',
+    r':\(\)\{\s*:\|\:&\s*\};\:',  # Fork bomb
+)]
+WILDCARD_DELETE_PATTERN = re.compile(r'(rm|del).*\*', re.IGNORECASE)
+DELETE_WORD_PATTERN = re.compile(r'\b(del|rm|rmdir|rd|erase|delete)\b', re.IGNORECASE)
+
+def split_commands(command):
+    """
+    argv of every simple command in command, parsed once (see shell_ast)
+    Covers pipelines, &&/||/; lists, subshells and $(...); each argv starts at
+    the program that actually runs (sudo, env VAR=1, ... are skipped).
+    Falls back to a whitespace split of the whole string if it cannot be parsed.
+    """
+    try:
+        tree = parse_command(command, POSIX_SHELL)
+    except ShellSyntaxError:
+        return [command.split()]
+    argvs = []
+    for simple in iter_simple_commands(tree):
+        words = effective_words(simple)
+        if words:
+            argvs.append([word.value for word in words])
+    return argvs
+
+@lru_cache(maxsize=1024)
 def is_safe_command(command):
     """
     Check if a command is safe to execute
+    Every rule is applied to each simple command, so `echo hi && rm -rf x` is
+    judged by its rm. Results are memoized per command string.
     Returns: (is_safe, risk_level, message)
     """
     if not command:
         return True, 'safe', ''
     
     command_lower = command.lower().strip()
+    parts = [' '.join(argv).lower() for argv in split_commands(command)]
     
-    # Check for extremely dangerous commands
-    if is_extremely_dangerous(command_lower):
+    # Check for extremely dangerous commands (the whole string too, for fork bombs)
+    if is_extremely_dangerous(command_lower) or any(is_extremely_dangerous(part) for part in parts):
         return False, 'critical', f'CRITICAL: Command "{command}" is extremely dangerous and blocked.'
     
     # Check for risky commands that need confirmation
-    if is_risky_command(command_lower):
+    if any(is_risky_command(part) for part in parts):
         return False, 'high', f'WARNING: "{command}" is a risky operation. Confirmation required.'
     
     # Check for protected paths
-    if targets_protected_path(command):
+    if any(targets_protected_path(part) for part in parts):
         return False, 'high', f'WARNING: Command targets protected system paths. Confirmation required.'
     
     return True, 'safe', ''
 
 def is_extremely_dangerous(command):
     """Check for extremely dangerous commands that should be blocked"""
-    dangerous_patterns = [
-        r'rm\s+-rf\s+/',
-        r'rm\s+-rf\s+\*',
-        r'del\s+/s\s+/q\s+c:\\',
-        r'format\s+c:',
-        r'dd\s+if=.*\s+of=/dev/',
-        r':\(\)\{\s*:\|\:&\s*\};\:',  # Fork bomb
-    ]
-    
-    for pattern in dangerous_patterns:
-        if re.search(pattern, command, re.IGNORECASE):
+    for pattern in DANGEROUS_PATTERNS:
+        if pattern.search(command):
             return True
     return False
 
 def is_risky_command(command):
     """Check if command contains risky operations"""
-    import platform
-    
-    os_type = 'windows' if platform.system().lower() == 'windows' else 'unix'
-    risky_cmds = RISKY_COMMANDS.get(os_type, [])
+    risky_cmds = RISKY_COMMANDS.get(OS_TYPE, [])
     
     # Skip cd commands - navigation should be safe
     if command.lower().startswith('cd ') or command.lower().startswith('cd /d'):
@@ -86,7 +115,7 @@ def is_risky_command(command):
             return True
     
     # Check for wildcards with delete operations
-    if re.search(r'(rm|del).*\*', command, re.IGNORECASE):
+    if WILDCARD_DELETE_PATTERN.search(command):
         return True
     
     return False
@@ -94,7 +123,7 @@ def is_risky_command(command):
 def targets_protected_path(command):
     """Check if command targets protected system paths"""
     # Only check for delete/remove operations, not navigation
-    if not re.search(r'\b(del|rm|rmdir|rd|erase|delete)\b', command, re.IGNORECASE):
+    if not DELETE_WORD_PATTERN.search(command):
         return False
         
     for protected_path in PROTECTED_PATHS:
@@ -102,15 +131,69 @@ def targets_protected_path(command):
             return True
     return False
 
+def is_protected_path(path):
+    """
+    Check if path is a filesystem root, a protected path, or a directory that
+    contains one (so copying, moving or deleting it takes the protected path along)
+    """
+    path = os.path.normcase(os.path.abspath(path))
+    if os.path.dirname(path) == path:
+        return True
+    prefix = path.rstrip(os.sep) + os.sep
+    for protected in PROTECTED_PATHS:
+        protected = os.path.normcase(protected)
+        if os.path.isabs(protected) and (protected == path or protected.startswith(prefix)):
+            return True
+    return False
+
+# Commands whose arguments are paths that get destroyed or moved
+PATH_COMMANDS = {'rm', 'rmdir', 'del', 'erase', 'rd', 'mv', 'move'}
+
+def get_affected_paths(command):
+    """Extract the paths destructive commands in command operate on (empty if unknown)"""
+    paths = []
+    for tokens in split_commands(command):
+        if not tokens or tokens[0].lower() not in PATH_COMMANDS:
+            continue
+
+        targets = []
+        for token in tokens[1:]:
+            if token.startswith('-') or re.match(r'^/[a-zA-Z]$', token):
+                continue  # Options (-rf, /s, /q)
+            targets.append(token.strip('"'))
+
+        # The last argument of a move is the destination, which is not affected
+        if tokens[0].lower() in ('mv', 'move') and len(targets) > 1:
+            targets = targets[:-1]
+        paths.extend(targets)
+    return paths
+
+def format_impact(estimate):
+    """Render an impact estimate as 'Files affected: 45 files (234.0 MB)'"""
+    if estimate is None:
+        return 'Files affected: calculating...'
+    files = estimate['files']
+    noun = 'file' if files == 1 else 'files'
+    text = f"{files} {noun} ({format_size(estimate['bytes'])})"
+    if not estimate['exact']:
+        text = f'at least {text}'
+        if not estimate['done']:
+            text += ', still counting'
+    return f'Files affected: {text}'
+
 def validate_path_exists(path):
     """Validate that a path exists"""
     return os.path.exists(path)
 
-def get_confirmation_prompt(command, risk_level):
-    """Generate appropriate confirmation prompt based on risk level"""
+def get_confirmation_prompt(command, risk_level, impact=None):
+    """
+    Generate appropriate confirmation prompt based on risk level
+    impact is an optional estimate from system.filesystem.ImpactEstimator
+    """
+    details = f"\n{format_impact(impact)}" if impact is not None else ''
     if risk_level == 'critical':
         return f"CRITICAL OPERATION BLOCKED: {command}"
     elif risk_level == 'high':
-        return f"Are you sure you want to execute '{command}'? This operation cannot be undone. (yes/no): "
+        return f"Are you sure you want to execute '{command}'? This operation cannot be undone.{details} (yes/no): "
     else:
-        return f"Confirm execution of '{command}' (y/n): "
+        return f"Confirm execution of '{command}'{details} (y/n): "
@@ -0,0 +1,172 @@
+"""
+Hosts many isolated terminal sessions in one process.
+"""
+import itertools
+import threading
+import time
+
+from .executor import CommandEngine
+from .resolver import TargetResolver
+from system.process import TimeoutPolicy
+
+
+class SessionManager:
+    """
+    Creates, looks up and evicts per-user CommandEngine sessions
+
+    Each session keeps its own cwd, env, history and background jobs. Everything
+    that is identical across users is built once and shared: compiled
+    preprocessor/mapper/safety rules (module level), the spelling corrector,
+    the directory index cache of the target resolver, the timeout policy and
+    the limits policy. A result cache can be shared too, since its keys include
+    the session's cwd and env, and so can an audit log, whose records carry the
+    session id. Sessions idle for longer than idle_timeout seconds are
+    evicted by evict_idle() (or the reaper thread) and their jobs are reaped.
+    """
+
+    def __init__(self, idle_timeout=1800.0, max_sessions=None, result_cache=None,
+                 limits_policy=None, timeout_policy=None, target_resolver=None,
+                 history_size=100, audit_log=None):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.result_cache = result_cache
+        self.limits_policy = limits_policy
+        self.timeout_policy = timeout_policy if timeout_policy is not None else TimeoutPolicy()
+        self.target_resolver = target_resolver if target_resolver is not None else TargetResolver()
+        self.history_size = history_size
+        self.audit_log = audit_log
+        self._sessions = {}  # session id -> [engine, last used (monotonic)]
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._reaper = None
+        self._stop_reaper = threading.Event()
+
+    def create_session(self, session_id=None, cwd=None, env=None):
+        """Start a session and return its id; raises RuntimeError when full"""
+        engine = CommandEngine(
+            result_cache=self.result_cache,
+            limits_policy=self.limits_policy,
+            timeout_policy=self.timeout_policy,
+            target_resolver=self.target_resolver,
+            cwd=cwd,
+            env=env,
+            history_size=self.history_size,
+            audit_log=self.audit_log
+        )
+        with self._lock:
+            if self.max_sessions is not None and len(self._sessions) >= self.max_sessions:
+                raise RuntimeError(f'Session limit of {self.max_sessions} reached')
+            if session_id is None:
+                session_id = f'session-{next(self._ids)}'
+            elif session_id in self._sessions:
+                raise ValueError(f'Session {session_id!r} already exists')
+            engine.session_id = session_id
+            self._sessions[session_id] = [engine, time.monotonic()]
+        return session_id
+
+    def get(self, session_id):
+        """The session's engine (marks it as used); raises KeyError if unknown"""
+        with self._lock:
+            entry = self._sessions[session_id]
+            entry[1] = time.monotonic()
+            return entry[0]
+
+    def process_input(self, session_id, user_input):
+        """Run user input in a session. Returns: (success, output, error_msg)"""
+        try:
+            engine = self.get(session_id)
+        except KeyError:
+            return False, '', f'Unknown session: {session_id}'
+        return engine.process_input(user_input)
+
+    def confirm(self, session_id, confirmed=True):
+        """
+        Answer the session's last confirmation prompt, from any thread
+        The answer is audited; a yes runs what was asked about, a no drops it.
+        Returns: (success, output, error_msg)
+        """
+        try:
+            engine = self.get(session_id)
+        except KeyError:
+            return False, '', f'Unknown session: {session_id}'
+        engine.record_confirmation(engine.pending_command, confirmed)
+        if confirmed:
+            return engine.run_confirmed()
+        engine.pending_command = None
+        return False, '', 'Command cancelled by user'
+
+    def close_session(self, session_id):
+        """End a session and reap its background jobs; returns False if unknown"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        entry[0].cleanup()
+        return True
+
+    def evict_idle(self, now=None):
+        """Close sessions idle for longer than idle_timeout; returns their ids"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [sid for sid, (_, last_used) in self._sessions.items()
+                    if now - last_used > self.idle_timeout]
+            evicted = [self._sessions.pop(sid) for sid in idle]
+        for engine, _ in evicted:
+            engine.cleanup()
+        return idle
+
+    def start_reaper(self, interval=60.0):
+        """Evict idle sessions every interval seconds on a daemon thread"""
+        if self._reaper is not None:
+            return
+        self._stop_reaper.clear()
+
+        def run():
+            while not self._stop_reaper.wait(interval):
+                self.evict_idle()
+
+        self._reaper = threading.Thread(target=run, name='session-reaper', daemon=True)
+        self._reaper.start()
+
+    def close_all(self):
+        """Stop the reaper and close every session"""
+        self._stop_reaper.set()
+        if self._reaper is not None:
+            self._reaper.join()
+            self._reaper = None
+        with self._lock:
+            entries = list(self._sessions.values())
+            self._sessions.clear()
+        for engine, _ in entries:
+            engine.cleanup()
+
+    def session_ids(self):
+        with self._lock:
+            return list(self._sessions)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+def measure_session_overhead(count=200):
+    """
+    Average bytes allocated per idle session, measured with tracemalloc
+    Shared structures are warmed up first so only per-session state is counted.
+    """
+    import gc
+    import tracemalloc
+
+    manager = SessionManager()
+    manager.close_session(manager.create_session())  # Warm shared state and imports
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    ids = [manager.create_session() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    allocated = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    for session_id in ids:
+        manager.close_session(session_id)
+    return allocated / count
@@ -0,0 +1,481 @@
+"""
+Parses shell command strings into a small AST shared by safety checks and execution.
+"""
+import re
+from functools import lru_cache
+
+OPERATORS = ('&&', '||', '|&', ';', '|', '&', '(', ')')
+REDIRECT_PATTERN = re.compile(r'(\d*)(&>>|&>|>>|>&|<&|<<<|<>|>\||>|<)')
+HEREDOC_PATTERN = re.compile(r'(?<![<\d])\d*<<(?!<)')
+WORD_BREAK = set(' \t\n;&|()<>')
+EXPANSION_CHARS = set('$*?[{')
+
+# Words that open or close compound commands; stripped so `if true; then rm x; fi`
+# is checked as `true` and `rm x`
+RESERVED_WORDS = {'if', 'then', 'else', 'elif', 'fi', 'do', 'done', 'while', 'until', '!', 'time'}
+
+# Programs that run their arguments as another command
+WRAPPER_COMMANDS = {'sudo', 'doas', 'nohup', 'nice', 'ionice', 'exec', 'command', 'builtin',
+                    'env', 'xargs', 'timeout', 'time', 'stdbuf', 'setsid', 'chroot'}
+# Builtins a plain exec would miss or run differently
+SHELL_BUILTINS = {'cd', 'export', 'set', 'unset', 'source', '.', 'alias', 'unalias', 'exit', 'eval',
+                  'exec', 'ulimit', 'umask', 'wait', 'jobs', 'fg', 'bg', 'type', 'hash', 'read',
+                  'shift', 'trap', 'return', 'local', 'declare', 'history', 'echo', 'printf', 'pwd',
+                  'kill', 'test', '[', 'times', 'command', 'builtin', 'getopts', 'readonly'}
+ASSIGNMENT_PATTERN = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*=')
+
+
+class ShellSyntaxError(ValueError):
+    """Raised for commands the parser cannot handle (unbalanced quotes, here-docs, ...)"""
+
+
+class Word:
+    """
+    One argument after quote removal
+        value         - text with quotes and escapes removed
+        quoted        - any part was quoted or escaped
+        expands       - contains unquoted $, globs, braces or ~ the shell would expand
+        substitutions - parsed bodies of $(...) and `...` inside the word
+        start/end     - offsets in the parsed string (the $(...) body for nested commands)
+    """
+    __slots__ = ('value', 'quoted', 'expands', 'substitutions', 'start', 'end')
+
+    def __init__(self, value, quoted=False, expands=False, substitutions=(), start=0, end=0):
+        self.value = value
+        self.quoted = quoted
+        self.expands = expands
+        self.substitutions = substitutions
+        self.start = start
+        self.end = end
+
+    def __repr__(self):
+        return f'Word({self.value!r})'
+
+
+class Redirect:
+    """A redirection: op ('>', '>>', '<', '2>' is fd=2 op='>', ...) and its target Word"""
+    __slots__ = ('op', 'fd', 'target')
+
+    def __init__(self, op, fd, target):
+        self.op = op
+        self.fd = fd
+        self.target = target
+
+    def __repr__(self):
+        return f'Redirect({self.fd if self.fd is not None else ""}{self.op} {self.target.value!r})'
+
+
+class SimpleCommand:
+    """Words and redirections of one command; text is its slice of the parsed string"""
+    __slots__ = ('words', 'redirects', 'text')
+
+    def __init__(self, words, redirects, text):
+        self.words = words
+        self.redirects = redirects
+        self.text = text
+
+    @property
+    def argv(self):
+        return [word.value for word in self.words]
+
+    def __repr__(self):
+        return f'SimpleCommand({self.argv!r}, redirects={list(self.redirects)!r})'
+
+
+class Subshell:
+    """A ( ... ) subshell or { ...; } group with its own redirections"""
+    __slots__ = ('body', 'redirects', 'brace')
+
+    def __init__(self, body, redirects=(), brace=False):
+        self.body = body
+        self.redirects = redirects
+        self.brace = brace
+
+    def __repr__(self):
+        return f'Subshell({self.body!r}, brace={self.brace})'
+
+
+class Pipeline:
+    """Commands joined by | (negated for a leading !)"""
+    __slots__ = ('commands', 'negated')
+
+    def __init__(self, commands, negated=False):
+        self.commands = commands
+        self.negated = negated
+
+    def __repr__(self):
+        return f'Pipeline({list(self.commands)!r})'
+
+
+class CommandList:
+    """
+    Pipelines joined by ;, &, && or ||
+    items: ((pipeline, separator), ...) where separator follows the pipeline (None for the last)
+    """
+    __slots__ = ('items',)
+
+    def __init__(self, items):
+        self.items = items
+
+    def __repr__(self):
+        return f'CommandList({list(self.items)!r})'
+
+
+def _find_closing_paren(source, i):
+    """Index just past the ) matching the ( before i, skipping quoted text"""
+    depth = 1
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c == '\\':
+            i += 2
+            continue
+        if c in '\'"':
+            close = source.find(c, i + 1)
+            if close < 0:
+                break
+            i = close + 1
+            continue
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+            if depth == 0:
+                return i + 1
+        i += 1
+    raise ShellSyntaxError('unterminated $(')
+
+
+def _read_word(source, i, posix):
+    """Read one word starting at i; returns (Word, next index)"""
+    start = i
+    n = len(source)
+    chars = []
+    quoted = expands = False
+    substitutions = []
+
+    while i < n and source[i] not in WORD_BREAK:
+        c = source[i]
+        if c == "'" and posix:
+            close = source.find("'", i + 1)
+            if close < 0:
+                raise ShellSyntaxError('unterminated single quote')
+            chars.append(source[i + 1:close])
+            quoted = True
+            i = close + 1
+        elif c == '"':
+            quoted = True
+            i += 1
+            while True:
+                if i >= n:
+                    raise ShellSyntaxError('unterminated double quote')
+                c = source[i]
+                if c == '"':
+                    i += 1
+                    break
+                if posix and c == '\\' and i + 1 < n and source[i + 1] in '$`"\\\n':
+                    chars.append(source[i + 1])
+                    i += 2
+                    continue
+                if posix and c in '$`':
+                    expands = True
+                    i = _read_substitution(source, i, chars, substitutions, posix)
+                    continue
+                chars.append(c)
+                i += 1
+        elif c == '\\' and posix:
+            if i + 1 >= n:
+                raise ShellSyntaxError('trailing backslash')
+            chars.append(source[i + 1])
+            quoted = True
+            i += 2
+        elif posix and c in '$`':
+            expands = True
+            i = _read_substitution(source, i, chars, substitutions, posix)
+        else:
+            if c in EXPANSION_CHARS or (c == '~' and i == start) or (c == '%' and not posix):
+                expands = True
+            chars.append(c)
+            i += 1
+
+    return Word(''.join(chars), quoted, expands, tuple(substitutions), start, i), i
+
+
+def _read_substitution(source, i, chars, substitutions, posix):
+    """Consume $..., $(...) or `...` at i, parsing command substitutions"""
+    if source[i] == '`':
+        close = source.find('`', i + 1)
+        if close < 0:
+            raise ShellSyntaxError('unterminated backquote')
+        substitutions.append(_parse(source[i + 1:close], posix))
+        chars.append(source[i:close + 1])
+        return close + 1
+    if source.startswith('$(', i):
+        end = _find_closing_paren(source, i + 2)
+        body = source[i + 2:end - 1]
+        if not body.startswith('('):  # $((...)) is arithmetic, not a command
+            substitutions.append(_parse(body, posix))
+        chars.append(source[i:end])
+        return end
+    chars.append('$')
+    return i + 1
+
+
+def _tokenize(source, posix):
+    """Split source into ('op', text, offset), ('redirect', (fd, op), offset) and ('word', Word, offset)"""
+    if posix and any(not _in_quotes(source, m.start()) for m in HEREDOC_PATTERN.finditer(source)):
+        raise ShellSyntaxError('here-documents are not supported')
+    tokens = []
+    i = 0
+    n = len(source)
+    while i < n:
+        c = source[i]
+        if c in ' \t':
+            i += 1
+            continue
+        if c == '\n':
+            tokens.append(('op', ';', i))
+            i += 1
+            continue
+        if c == '#' and posix:
+            newline = source.find('\n', i)
+            i = n if newline < 0 else newline
+            continue
+
+        match = REDIRECT_PATTERN.match(source, i)
+        if match:
+            fd = int(match.group(1)) if match.group(1) else None
+            tokens.append(('redirect', (fd, match.group(2)), i))
+            i = match.end()
+            continue
+        for op in OPERATORS:
+            if source.startswith(op, i):
+                tokens.append(('op', op, i))
+                i += len(op)
+                break
+        else:
+            word, i = _read_word(source, i, posix)
+            tokens.append(('word', word, word.start))
+    return tokens
+
+
+def _in_quotes(source, index):
+    """Rough check whether index sits inside a quoted string"""
+    single = double = False
+    for c in source[:index]:
+        if c == "'" and not double:
+            single = not single
+        elif c == '"' and not single:
+            double = not double
+    return single or double
+
+
+class _Parser:
+    """Recursive-descent parser over the token list"""
+
+    def __init__(self, source, posix):
+        self.source = source
+        self.tokens = _tokenize(source, posix)
+        self.pos = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def at_close_brace(self):
+        token = self.peek()
+        return token is not None and token[0] == 'word' and token[1].value == '}' and not token[1].quoted
+
+    def parse_list(self, closer=None):
+        items = []
+        while True:
+            token = self.peek()
+            if token is None or (closer == ')' and token[:2] == ('op', ')')) or \
+                    (closer == '}' and self.at_close_brace()):
+                break
+            if token[0] == 'op' and token[1] == ';':
+                self.pos += 1  # Empty statement (blank line)
+                continue
+            pipeline = self.parse_pipeline()
+            token = self.peek()
+            separator = None
+            if token is not None and token[0] == 'op' and token[1] in (';', '&', '&&', '||'):
+                separator = token[1]
+                self.pos += 1
+            items.append((pipeline, separator))
+            if separator is None:
+                break
+            if separator in ('&&', '||') and self.peek() is None:
+                raise ShellSyntaxError(f'nothing after {separator}')
+        return CommandList(tuple(items))
+
+    def parse_pipeline(self):
+        negated = False
+        token = self.peek()
+        if token is not None and token[0] == 'word' and token[1].value == '!' and not token[1].quoted:
+            negated = True
+            self.pos += 1
+        commands = [self.parse_command()]
+        while True:
+            token = self.peek()
+            if token is None or token[0] != 'op' or token[1] not in ('|', '|&'):
+                break
+            self.pos += 1
+            commands.append(self.parse_command())
+        return Pipeline(tuple(commands), negated)
+
+    def parse_command(self):
+        token = self.peek()
+        if token is None:
+            raise ShellSyntaxError('missing command')
+        if token[:2] == ('op', '('):
+            self.pos += 1
+            body = self.parse_list(closer=')')
+            if self.peek() is None or self.peek()[:2] != ('op', ')'):
+                raise ShellSyntaxError('unbalanced (')
+            self.pos += 1
+            return Subshell(body, self.parse_redirects())
+        if token[0] == 'word' and token[1].value == '{' and not token[1].quoted:
+            self.pos += 1
+            body = self.parse_list(closer='}')
+            if not self.at_close_brace():
+                raise ShellSyntaxError('unbalanced {')
+            self.pos += 1
+            return Subshell(body, self.parse_redirects(), brace=True)
+        return self.parse_simple()
+
+    def parse_redirects(self):
+        redirects = []
+        while self.peek() is not None and self.peek()[0] == 'redirect':
+            redirects.append(self.parse_redirect())
+        return tuple(redirects)
+
+    def parse_redirect(self):
+        fd, op = self.tokens[self.pos][1]
+        self.pos += 1
+        token = self.peek()
+        if token is None or token[0] != 'word':
+            raise ShellSyntaxError(f'missing target for {op}')
+        self.pos += 1
+        return Redirect(op, fd, token[1])
+
+    def parse_simple(self):
+        words = []
+        redirects = []
+        start = end = self.peek()[2]
+        while True:
+            token = self.peek()
+            if token is None or token[0] == 'op':
+                break
+            if token[0] == 'redirect':
+                redirect = self.parse_redirect()
+                redirects.append(redirect)
+                end = redirect.target.end
+            else:
+                words.append(token[1])
+                end = token[1].end
+                self.pos += 1
+        if not words and not redirects:
+            raise ShellSyntaxError(f'unexpected {self.peek()[1]!r}')
+        return SimpleCommand(tuple(words), tuple(redirects), self.source[start:end])
+
+
+def _parse(source, posix):
+    parser = _Parser(source, posix)
+    tree = parser.parse_list()
+    if parser.peek() is not None:
+        raise ShellSyntaxError(f'unexpected {parser.peek()[1]!r}')
+    return tree
+
+
+@lru_cache(maxsize=1024)
+def parse_command(command, posix=True):
+    """
+    Parse a command string into a CommandList (memoized; treat the result as read-only)
+    posix=False parses cmd.exe-style input: no single quotes or backslash escapes.
+    Raises ShellSyntaxError for input the parser does not understand.
+    """
+    return _parse(command, posix)
+
+
+def iter_simple_commands(node):
+    """Yield every SimpleCommand in node, including those in subshells and $(...)"""
+    if isinstance(node, CommandList):
+        for pipeline, _ in node.items:
+            yield from iter_simple_commands(pipeline)
+    elif isinstance(node, Pipeline):
+        for command in node.commands:
+            yield from iter_simple_commands(command)
+    elif isinstance(node, Subshell):
+        yield from iter_simple_commands(node.body)
+    elif isinstance(node, SimpleCommand):
+        yield node
+        for word in node.words:
+            for substitution in word.substitutions:
+                yield from iter_simple_commands(substitution)
+        for redirect in node.redirects:
+            for substitution in redirect.target.substitutions:
+                yield from iter_simple_commands(substitution)
+
+
+def effective_words(command):
+    """
+    Words of a SimpleCommand starting at the program that actually runs
+    Skips reserved words, VAR=value assignments, and wrappers such as sudo,
+    nohup or timeout along with their options (best effort).
+    """
+    words = command.words
+    i = 0
+    while i < len(words):
+        word = words[i]
+        value = word.value
+        if not word.quoted and (value in RESERVED_WORDS or ASSIGNMENT_PATTERN.match(value)):
+            i += 1
+        elif value in WRAPPER_COMMANDS:
+            i += 1
+            while i < len(words) and (words[i].value.startswith('-')
+                                      or ASSIGNMENT_PATTERN.match(words[i].value)):
+                option = words[i].value
+                i += 1
+                # Options that take a separate value (-u root, -n 10, -s KILL)
+                if option in ('-u', '-g', '-n', '-c', '-s', '-k', '-C') and i < len(words):
+                    i += 1
+            if value == 'timeout' and i < len(words):
+                i += 1  # The duration
+        else:
+            break
+    return words[i:]
+
+
+def single_command(tree):
+    """
+    The SimpleCommand if tree is exactly one command without redirections, else None
+    Rules out pipes, lists (;, &, &&, ||), negation and subshells.
+    """
+    if len(tree.items) != 1 or tree.items[0][1] not in (None, ';'):
+        return None
+    pipeline = tree.items[0][0]
+    if pipeline.negated or len(pipeline.commands) != 1:
+        return None
+    command = pipeline.commands[0]
+    if not isinstance(command, SimpleCommand) or command.redirects or not command.words:
+        return None
+    return command
+
+
+def simple_argv(tree):
+    """
+    argv if tree is one plain command that can run without a shell, else None
+    Rules out redirections, pipes, lists, subshells, expansions, substitutions,
+    assignments and shell builtins.
+    """
+    command = single_command(tree)
+    if command is None:
+        return None
+    for word in command.words:
+        if word.expands or word.substitutions:
+            return None
+    first = command.words[0]
+    if first.value in SHELL_BUILTINS or first.value in RESERVED_WORDS or \
+            ASSIGNMENT_PATTERN.match(first.value):
+        return None
+    return command.argv
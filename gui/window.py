@@ -3,9 +3,15 @@ Main window for the PyQt GUI.
 """
 from PyQt5.QtWidgets import QApplication, QMainWindow
 from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QPlainTextEdit, QLineEdit, QMessageBox
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
+from PyQt5.QtCore import Qt, QTimer
 from engine import CommandEngine
+from engine.safety import format_impact
+from utils.formatting import OutputFormatter
+
+MAX_TERMINAL_LINES = 20000
+TERMINAL_FOREGROUND = '#e6e6e6'
+TERMINAL_BACKGROUND = '#23272e'
 
 class TerminalWidget(QWidget):
     def __init__(self, parent=None):
@@ -15,7 +21,14 @@ class TerminalWidget(QWidget):
         self.terminal = QPlainTextEdit(self)
         self.terminal.setReadOnly(True)
         self.terminal.setFont(QFont('Consolas', 12))
-        self.terminal.setStyleSheet("background: #23272e; color: #e6e6e6; border-radius: 8px; padding: 8px;")
+        self.terminal.setStyleSheet(f"background: {TERMINAL_BACKGROUND}; color: {TERMINAL_FOREGROUND}; "
+                                    "border-radius: 8px; padding: 8px;")
+        # Paged file views keep appending as the user scrolls; cap what the widget holds
+        self.terminal.setMaximumBlockCount(MAX_TERMINAL_LINES)
+        self.terminal.verticalScrollBar().valueChanged.connect(self.fetch_next_page)
+        self._fetching_page = False
+        self._page_formatter = None  # Fed each page of the file being read, so colours carry over
+        self._char_formats = {}  # Style -> QTextCharFormat
         self.input = QLineEdit(self)
         self.input.setFont(QFont('Consolas', 12))
         self.input.setStyleSheet("background: #2c313c; color: #e6e6e6; border-radius: 8px; padding: 6px;")
@@ -44,30 +57,30 @@ class TerminalWidget(QWidget):
             
             if success:
                 if output:
-                    self.terminal.appendPlainText(output)
+                    self.show_output(output)
                 else:
                     self.terminal.appendPlainText("Command executed successfully (no output)")
             else:
                 # Check if this is a confirmation prompt
                 if "Are you sure" in error or "Confirm" in error:
                     # Show confirmation dialog
-                    reply = QMessageBox.question(
-                        self, 
-                        'Confirmation Required',
-                        error,
-                        QMessageBox.Yes | QMessageBox.No,
-                        QMessageBox.No
-                    )
+                    reply = self.confirm_with_impact(error, self.command_engine.pending_command)
+                    self.command_engine.record_confirmation(
+                        self.command_engine.pending_command, reply == QMessageBox.Yes)
                     
                     if reply == QMessageBox.Yes:
-                        # Re-execute with force (you might need to implement this)
                         self.terminal.appendPlainText("User confirmed. Executing command...")
-                        # For now, just show that user confirmed
-                        self.terminal.appendPlainText("(Command confirmation system not fully implemented yet)")
+                        success, output, error = self.command_engine.run_confirmed()
+                        if output:
+                            self.show_output(output)
+                        if not success:
+                            self.terminal.appendPlainText(f"Error: {error}")
                     else:
                         self.terminal.appendPlainText("Command cancelled by user.")
                 else:
-                    # Regular error
+                    # Regular error, after any output the command produced (e.g. before a timeout)
+                    if output:
+                        self.append_output(output)
                     self.terminal.appendPlainText(f"Error: {error}")
                     
         except Exception as e:
@@ -75,6 +88,107 @@ class TerminalWidget(QWidget):
         
         self.input.clear()
 
+    def show_output(self, output):
+        """Append a command's output; a paged read gets a formatter its next pages reuse"""
+        self._page_formatter = OutputFormatter() if self.command_engine.page is not None else None
+        self.append_output(output, self._page_formatter)
+
+    def append_output(self, text, formatter=None):
+        """
+        Append command output as a new paragraph, with its ANSI colours and
+        highlighted errors, paths and PIDs, in one edit block
+        formatter: fed text as the next whole lines of a longer output (a paged
+        read), so colours left on by one page carry into the next; None formats
+        text on its own
+        """
+        if formatter is None:
+            spans = OutputFormatter().format(text)
+        elif text.endswith('\n'):
+            spans = formatter.feed(text)
+        else:
+            # Pages end mid-line only because the newline is implied by the next block
+            spans = formatter.feed(text + '\n')
+            if spans:
+                last = spans.pop()
+                if len(last.text) > 1:
+                    spans.append(last._replace(text=last.text[:-1]))
+        bar = self.terminal.verticalScrollBar()
+        at_bottom = bar.value() == bar.maximum()
+        cursor = QTextCursor(self.terminal.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        if not self.terminal.document().isEmpty():
+            cursor.insertBlock()
+        for span in spans:
+            cursor.insertText(span.text, self.char_format(span.style))
+        cursor.endEditBlock()
+        if at_bottom:
+            bar.setValue(bar.maximum())
+
+    def char_format(self, style):
+        """The QTextCharFormat for a formatter Style, built once per style"""
+        char_format = self._char_formats.get(style)
+        if char_format is None:
+            char_format = QTextCharFormat()
+            fg, bg = style.fg, style.bg
+            if style.inverse:
+                fg, bg = bg or TERMINAL_BACKGROUND, fg or TERMINAL_FOREGROUND
+            if fg:
+                char_format.setForeground(QColor(fg))
+            if bg:
+                char_format.setBackground(QColor(bg))
+            if style.bold:
+                char_format.setFontWeight(QFont.Bold)
+            char_format.setFontItalic(style.italic)
+            char_format.setFontUnderline(style.underline)
+            self._char_formats[style] = char_format
+        return char_format
+
+    def fetch_next_page(self, value):
+        """Append the next page of a file being read once the view reaches the bottom"""
+        bar = self.terminal.verticalScrollBar()
+        if self._fetching_page or value < bar.maximum() or self.command_engine.page is None:
+            return
+        self._fetching_page = True
+        try:
+            text = self.command_engine.next_page()
+            if text:
+                self.append_output(text, self._page_formatter)
+                # Stay where the user was instead of following the new text to the end
+                bar.setValue(value)
+        finally:
+            self._fetching_page = False
+
+    def confirm_with_impact(self, prompt, command):
+        """
+        Ask for confirmation right away and fill in the affected file counts
+        while the impact estimate runs in the background
+        """
+        box = QMessageBox(QMessageBox.Question, 'Confirmation Required', prompt,
+                          QMessageBox.Yes | QMessageBox.No, self)
+        box.setDefaultButton(QMessageBox.No)
+
+        estimator = self.command_engine.estimate_impact(command) if command else None
+        timer = None
+        if estimator is not None:
+            box.setInformativeText(format_impact(None))
+
+            def refresh():
+                snapshot = estimator.snapshot()
+                box.setInformativeText(format_impact(snapshot))
+                if snapshot['done']:
+                    timer.stop()
+
+            timer = QTimer(box)
+            timer.timeout.connect(refresh)
+            timer.start(100)
+
+        reply = box.exec_()
+        if timer is not None:
+            timer.stop()
+            estimator.cancel()
+        return reply
+
     def closeEvent(self, event):
         """Clean up when closing"""
         self.command_engine.cleanup()
@@ -0,0 +1,46 @@
+"""
+Benchmark the streaming output formatter.
+
+Feeds a few MB of typical output (plain listings, ls --color, logs with
+errors, paths and PIDs) through OutputFormatter in 64 KB chunks, the way
+program output arrives, and reports throughput for each kind.
+Run from the project root: python scripts/bench_formatting.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.formatting import OutputFormatter
+
+CHUNK_SIZE = 64 * 1024
+TARGET_BYTES = 8 * 1024 * 1024
+
+SAMPLES = {
+    'plain': '-rw-r--r--  1 user staff   4096 Jan 12 10:31 requirements.txt\n',
+    'ls --color': 'drwxr-xr-x  5 user staff    160 Jan 12 10:31 \x1b[01;34mengine\x1b[0m\n'
+                  '-rwxr-xr-x  1 user staff   1024 Jan 12 10:31 \x1b[01;32mmain.py\x1b[0m\n',
+    'log': 'Jan 12 10:31:02 host sshd[4211]: Accepted key for user from 10.0.0.7\n'
+           'Jan 12 10:31:05 host app[77]: reading /var/lib/app/state.db\n'
+           'Jan 12 10:31:06 host app[77]: error: cannot open /var/lib/app/cache: Permission denied\n',
+}
+
+
+def bench(line):
+    data = line * (TARGET_BYTES // len(line))
+    chunks = [data[i:i + CHUNK_SIZE] for i in range(0, len(data), CHUNK_SIZE)]
+    formatter = OutputFormatter()
+    start = time.perf_counter()
+    spans = 0
+    for chunk in chunks:
+        spans += len(formatter.feed(chunk))
+    spans += len(formatter.flush())
+    elapsed = time.perf_counter() - start
+    return len(data) / elapsed / 1e6, spans
+
+
+if __name__ == '__main__':
+    for name, line in SAMPLES.items():
+        rate, spans = bench(line)
+        print(f'{name:>11}: {rate:6.1f} MB/s, {spans} spans')
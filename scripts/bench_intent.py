@@ -0,0 +1,105 @@
+"""
+Benchmark the CommandIntent pipeline against the code it replaced.
+
+The baseline is engine/preprocessor.py and engine/mapper.py as they were
+before engine/intent.py was added, loaded from git, run the way the old
+process_input did (preprocess_input, then map_nl_to_command for NL input).
+The intent side runs what CommandEngine._process_input does up to mapping:
+parse_intent once, the compound and bulk checks on its text, map_intent.
+Measures per-input time and allocations (tracemalloc).
+Run from the project root: python scripts/bench_intent.py [--baseline REV]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine.compound import split_compound
+from engine.mapper import map_intent
+from engine.preprocessor import parse_bulk_request, parse_intent
+
+INPUTS = [
+    'show me the files in games folder in d drive',
+    'go to folder projects on drive d',
+    'create folder test',
+    'delete file notes.txt',
+    'copy file a.txt to backup',
+    'show running processes',
+    'ls -la',
+]
+ROUNDS = 2000
+
+
+def git(*args):
+    return subprocess.run(['git', *args], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+
+
+def load_baseline(rev=None):
+    """(preprocessor, mapper) modules as of rev; default: the commit before CommandIntent"""
+    if rev is None:
+        added = git('log', '--diff-filter=A', '--format=%H', '--', 'engine/intent.py').split()[-1]
+        rev = f'{added}^'
+    modules = []
+    for name in ('preprocessor', 'mapper'):
+        module = types.ModuleType(f'baseline_{name}')
+        exec(compile(git('show', f'{rev}:engine/{name}.py'), f'{rev}:engine/{name}.py', 'exec'),
+             module.__dict__)
+        modules.append(module)
+    return modules
+
+
+def make_baseline_pipeline(preprocessor, mapper):
+    def baseline_pipeline(text):
+        normalized, mode, components = preprocessor.preprocess_input(text)
+        if mode == 'nl':
+            return mapper.map_nl_to_command(normalized, components)
+        return normalized
+    return baseline_pipeline
+
+
+def intent_pipeline(text):
+    intent = parse_intent(text)
+    if intent.mode == 'nl' and len(split_compound(intent.text, intent)) > 1:
+        return None
+    if parse_bulk_request(intent.text) is not None:
+        return None
+    return map_intent(intent)
+
+
+def measure(name, func):
+    for text in INPUTS:
+        func(text)  # Warm up lazily built state (pattern caches, the spelling index)
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text in INPUTS:
+            func(text)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    snapshot_before = tracemalloc.take_snapshot()
+    for _ in range(100):
+        for text in INPUTS:
+            func(text)
+    snapshot_after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = snapshot_after.compare_to(snapshot_before, 'filename')
+    allocations = sum(stat.count_diff for stat in stats if stat.count_diff > 0)
+    per_input = elapsed / (ROUNDS * len(INPUTS)) * 1e6
+    print(f'{name:>8}: {per_input:7.2f} us/input, peak {peak / 1024:7.1f} KiB, '
+          f'{allocations} live blocks after 100 rounds')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baseline', metavar='REV', help='git revision to compare against')
+    args = parser.parse_args()
+    measure('baseline', make_baseline_pipeline(*load_baseline(args.baseline)))
+    measure('intent', intent_pipeline)
@@ -0,0 +1,34 @@
+"""
+Benchmark the spelling correction stage of the preprocessor.
+
+Reports index build time and per-input correction cost for a 10-token input,
+both on first sight of its tokens (cold) and once they are memoized (warm).
+Run from the project root: python scripts/bench_spelling.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from engine.preprocessor import SpellingCorrector
+
+TEXT = 'please naviagte to the foldr called projects on drive d'
+ROUNDS = 20000
+
+
+if __name__ == '__main__':
+    start = time.perf_counter()
+    corrector = SpellingCorrector()
+    print(f'build: {(time.perf_counter() - start) * 1e3:.2f} ms, {len(corrector.deletes)} delete keys')
+
+    start = time.perf_counter()
+    corrected = corrector.correct(TEXT)
+    print(f' cold: {(time.perf_counter() - start) * 1e6:.1f} us for {len(TEXT.split())} tokens')
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        corrector.correct(TEXT)
+    print(f' warm: {(time.perf_counter() - start) / ROUNDS * 1e6:.2f} us per input')
+    print(f'{TEXT!r} -> {corrected!r}')
+    print(corrector.stats())
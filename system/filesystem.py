@@ -1,6 +1,576 @@
 """
 File system API utilities.
 """
+import errno
+import fnmatch
+import os
+import shutil
+import stat
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+
+# Errors that mean the zero-copy syscall is not usable for this pair of files
+_ZERO_COPY_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.ENOTSUP, errno.EBADF}
+if hasattr(errno, 'EOPNOTSUPP'):
+    _ZERO_COPY_UNSUPPORTED.add(errno.EOPNOTSUPP)
+
+COPY_CHUNK_SIZE = 8 * 1024 * 1024  # Bytes per zero-copy call, keeps cancellation responsive
+BULK_ACTIONS = ('copy', 'move', 'delete')
+
+
 def list_files(path):
     import os
     return os.listdir(path)
+
+
+def has_glob(pattern):
+    """Check if a path contains glob wildcards"""
+    return any(ch in pattern for ch in '*?[')
+
+
+def expand_pattern(pattern):
+    """
+    Expand a glob pattern into matching paths using os.scandir
+    Supports '*', '?', '[...]' in any component and '**' for recursive matching.
+    Returns a sorted list of paths (empty if nothing matches).
+    """
+    if not has_glob(pattern):
+        return [pattern] if os.path.lexists(pattern) else []
+
+    drive, rest = os.path.splitdrive(pattern)
+    rest = rest.replace('\\', '/') if os.sep == '\\' else rest
+    if rest.startswith('/'):
+        base = drive + os.sep
+        parts = [p for p in rest.split('/') if p]
+    else:
+        base = drive
+        parts = [p for p in rest.split('/') if p]
+
+    matches = []
+    _expand_parts(base, parts, matches)
+    return sorted(set(matches))
+
+
+def _expand_parts(base, parts, matches):
+    """Recursively match path components below base"""
+    if not parts:
+        if base:
+            matches.append(base)
+        return
+
+    part, remaining = parts[0], parts[1:]
+
+    if part == '**':
+        # Zero directories, then every directory below base
+        _expand_parts(base, remaining, matches)
+        for entry in _scan(base):
+            if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+                _expand_parts(entry.path, parts, matches)
+        return
+
+    if not has_glob(part):
+        path = os.path.join(base, part) if base else part
+        if os.path.lexists(path):
+            _expand_parts(path, remaining, matches)
+        return
+
+    for entry in _scan(base):
+        # Like the shell, wildcards do not match hidden entries unless asked to
+        if entry.name.startswith('.') and not part.startswith('.'):
+            continue
+        if not fnmatch.fnmatch(entry.name, part):
+            continue
+        if remaining and not entry.is_dir():
+            continue
+        _expand_parts(entry.path if base else entry.name, remaining, matches)
+
+
+def _scan(path):
+    """List directory entries, treating unreadable directories as empty"""
+    try:
+        with os.scandir(path or '.') as it:
+            return list(it)
+    except OSError:
+        return []
+
+
+def copy_file(src, dst, cancel_event=None):
+    """
+    Copy a single file's data and metadata using the fastest path available
+    Tries copy_file_range, then sendfile, then a userspace buffered copy.
+    Returns the number of bytes copied.
+    """
+    with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = _zero_copy(fsrc.fileno(), fdst.fileno(), size, cancel_event)
+        if copied is None:
+            fsrc.seek(0)
+            fdst.seek(0)
+            fdst.truncate()
+            shutil.copyfileobj(fsrc, fdst, COPY_CHUNK_SIZE)
+            copied = size
+    shutil.copystat(src, dst)
+    return copied
+
+
+def copy_link(src, dst):
+    """Recreate the symlink src at dst (replacing a file or link there); returns 0 bytes"""
+    target = os.readlink(src)
+    if os.path.lexists(dst) and (os.path.islink(dst) or not os.path.isdir(dst)):
+        os.unlink(dst)
+    os.symlink(target, dst, target_is_directory=os.path.isdir(src))
+    return 0
+
+
+def copy_fifo(src, dst):
+    """Create a FIFO at dst with src's permissions, without opening either (that would block)"""
+    if os.path.lexists(dst) and (os.path.islink(dst) or not os.path.isdir(dst)):
+        os.unlink(dst)
+    os.mkfifo(dst, stat.S_IMODE(os.lstat(src).st_mode))
+    return 0
+
+
+def entry_kind(path, follow_symlinks=False):
+    """
+    'file', 'link', 'fifo', 'dir' or 'special' (devices, sockets) for path
+    Paths that cannot be stat'ed count as files, so the operation reports the error.
+    """
+    try:
+        mode = os.stat(path, follow_symlinks=follow_symlinks).st_mode
+    except OSError:
+        return 'file'
+    if stat.S_ISLNK(mode):
+        return 'link'
+    if stat.S_ISREG(mode):
+        return 'file'
+    if stat.S_ISDIR(mode):
+        return 'dir'
+    if stat.S_ISFIFO(mode):
+        return 'fifo'
+    return 'special'
+
+
+def _zero_copy(infd, outfd, size, cancel_event=None):
+    """
+    Copy size bytes between file descriptors inside the kernel
+    Returns bytes copied, or None if no zero-copy syscall works for these files.
+    """
+    for name in ('copy_file_range', 'sendfile'):
+        syscall = getattr(os, name, None)
+        if syscall is None:
+            continue
+        offset = 0
+        try:
+            while offset < size:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise BulkOperationCancelled()
+                count = min(COPY_CHUNK_SIZE, size - offset)
+                if name == 'copy_file_range':
+                    sent = syscall(infd, outfd, count, offset, offset)
+                else:
+                    os.lseek(outfd, offset, os.SEEK_SET)
+                    sent = syscall(outfd, infd, offset, count)
+                if sent == 0:
+                    break
+                offset += sent
+            return offset
+        except OSError as e:
+            if e.errno not in _ZERO_COPY_UNSUPPORTED or offset:
+                raise
+            # Not supported for this file pair, try the next mechanism
+    return None
+
+
+class BulkOperationCancelled(Exception):
+    """Raised inside workers when a bulk operation has been cancelled"""
+
+
+class BulkFileOperation:
+    """
+    Copy, move or delete many files in parallel on an I/O sized thread pool
+
+    progress is called with a dict for every file that finishes:
+        {'action', 'path', 'done', 'total', 'bytes', 'error'}
+    It is called from worker threads, so GUI callers must marshal it themselves.
+    """
+
+    def __init__(self, action, sources, destination=None, max_workers=None, progress=None):
+        if action not in BULK_ACTIONS:
+            raise ValueError(f'Unsupported bulk action: {action}')
+        if action != 'delete' and not destination:
+            raise ValueError(f'A destination is required to {action} files')
+        if isinstance(sources, str):
+            sources = [sources]
+        self.action = action
+        self.sources = list(sources)
+        self.destination = destination
+        # File work is dominated by I/O waits, so oversubscribe the CPUs
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.progress = progress
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        self._total = 0
+        self._done = 0
+        self._completed = 0
+        self._bytes = 0
+
+    def cancel(self):
+        """Request cancellation; files already in flight finish or stop at the next chunk"""
+        self._cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def run(self):
+        """
+        Execute the operation
+        Returns a summary dict: action, total, completed, failed, bytes, cancelled, errors
+        """
+        paths = []
+        for source in self.sources:
+            matches = expand_pattern(source)
+            if not matches:
+                return self._summary([(source, 'No such file or directory')])
+            paths.extend(matches)
+
+        files, dirs_to_create, dirs_to_remove, errors = self._plan(paths)
+
+        for directory in dirs_to_create:
+            os.makedirs(directory, exist_ok=True)
+
+        self._total = len(files)
+        if files:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                futures = {pool.submit(self._run_one, *entry): entry[0] for entry in files}
+                drained = False
+                for future in as_completed(futures):
+                    if future.cancelled():
+                        continue
+                    error = future.result()
+                    if error and error != 'cancelled':
+                        errors.append((futures[future], error))
+                    if self.cancelled and not drained:
+                        # Drop queued work; in-flight files stop at their next chunk
+                        for pending in futures:
+                            pending.cancel()
+                        drained = True
+
+        if not self.cancelled:
+            # Deepest directories first so parents are empty when reached
+            for directory in sorted(dirs_to_remove, key=len, reverse=True):
+                try:
+                    os.rmdir(directory)
+                except OSError as e:
+                    errors.append((directory, e.strerror or str(e)))
+
+        return self._summary(errors)
+
+    def _plan(self, paths):
+        """
+        Flatten sources into (src, dst, kind) entries plus directory bookkeeping
+        kind is entry_kind()'s: symlinks inside a tree, including links to
+        directories, are deleted with unlink and copied as links, never followed.
+        FIFOs are recreated, devices and sockets are reported as errors (only
+        regular files are ever opened). Filesystem roots are refused.
+        """
+        files = []
+        dirs_to_create = []
+        dirs_to_remove = []
+        errors = []
+
+        into_directory = False
+        if self.destination:
+            into_directory = len(paths) > 1 or os.path.isdir(self.destination)
+            if len(paths) > 1 and not os.path.isdir(self.destination):
+                dirs_to_create.append(self.destination)
+
+        for path in paths:
+            absolute = os.path.abspath(path)
+            if os.path.dirname(absolute) == absolute:
+                errors.append((path, 'Refusing to operate on a filesystem root'))
+                continue
+            if self.destination:
+                target = os.path.join(self.destination, os.path.basename(path.rstrip('/\\'))) \
+                    if into_directory else self.destination
+            else:
+                target = None
+
+            if self.action == 'move' and target and _same_device(path, self.destination):
+                # A rename moves a whole tree at once, no need to walk it
+                files.append((path, target, 'file'))
+                continue
+
+            if os.path.isdir(path) and not os.path.islink(path):
+                for root, subdirs, names in os.walk(path):
+                    rel = os.path.relpath(root, path)
+                    out_root = os.path.normpath(os.path.join(target, rel)) if target else None
+                    if out_root:
+                        dirs_to_create.append(out_root)
+                    if self.action != 'copy':
+                        dirs_to_remove.append(root)
+                    # os.walk lists links to directories with the directories but never enters them
+                    linked = [name for name in subdirs if os.path.islink(os.path.join(root, name))]
+                    for name in names + linked:
+                        src = os.path.join(root, name)
+                        files.append((src, os.path.join(out_root, name) if out_root else None,
+                                      entry_kind(src)))
+            else:
+                # A link to a directory cannot be copied by content; it is copied as a link
+                linked_dir = os.path.islink(path) and os.path.isdir(path)
+                files.append((path, target, 'link' if linked_dir else entry_kind(path, follow_symlinks=True)))
+
+        return files, dirs_to_create, dirs_to_remove, errors
+
+    def _copy_entry(self, src, dst, kind):
+        """Copy one planned entry; returns bytes copied"""
+        if kind == 'link':
+            return copy_link(src, dst)
+        if kind == 'fifo':
+            return copy_fifo(src, dst)
+        if kind != 'file':
+            raise OSError(errno.EINVAL, 'Not a regular file (device or socket), skipped')
+        return copy_file(src, dst, self._cancel_event)
+
+    def _run_one(self, src, dst, kind='file'):
+        """Process one planned entry (see _plan for kind); returns an error message or None"""
+        if self.cancelled:
+            return 'cancelled'
+        size = 0
+        error = None
+        try:
+            if self.action == 'delete':
+                size = os.lstat(src).st_size
+                os.unlink(src)
+            elif self.action == 'copy':
+                size = self._copy_entry(src, dst, kind)
+            else:
+                try:
+                    os.replace(src, dst)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    size = self._copy_entry(src, dst, kind)
+                    os.unlink(src)
+        except BulkOperationCancelled:
+            error = 'cancelled'
+        except OSError as e:
+            error = e.strerror or str(e)
+
+        with self._lock:
+            self._done += 1
+            if error is None:
+                self._completed += 1
+            self._bytes += size
+            event = {
+                'action': self.action,
+                'path': src,
+                'done': self._done,
+                'total': self._total,
+                'bytes': self._bytes,
+                'error': error,
+            }
+        if self.progress:
+            self.progress(event)
+        return error
+
+    def _summary(self, errors):
+        return {
+            'action': self.action,
+            'total': self._total,
+            'completed': self._completed,
+            'failed': len(errors),
+            'bytes': self._bytes,
+            'cancelled': self.cancelled,
+            'errors': errors,
+        }
+
+
+def _same_device(path, destination):
+    """Check if a rename from path into destination can stay on one filesystem"""
+    try:
+        dest_dir = destination if os.path.isdir(destination) else os.path.dirname(destination) or '.'
+        return os.stat(path).st_dev == os.stat(dest_dir).st_dev
+    except OSError:
+        return False
+
+
+def bulk_file_operation(action, sources, destination=None, max_workers=None, progress=None):
+    """Convenience wrapper: run a BulkFileOperation and return its summary"""
+    return BulkFileOperation(action, sources, destination, max_workers, progress).run()
+
+
+class DirectoryTotalsCache:
+    """
+    Bounded LRU of per-directory totals keyed by the directory's mtime
+    Only a directory's direct entries are cached: adding or removing an entry
+    anywhere in a tree bumps that directory's mtime and invalidates just it.
+    In-place growth of an existing file does not touch the mtime and is not seen.
+    """
+
+    # Directories modified this recently may still change within the same mtime tick
+    RACY_WINDOW_NS = 2 * 1_000_000_000
+
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # path -> (mtime_ns, files, bytes, subdirs)
+        self._lock = threading.Lock()
+
+    def get(self, path, mtime_ns):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != mtime_ns:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1:]
+
+    def put(self, path, mtime_ns, files, size, subdirs):
+        if time.time_ns() - mtime_ns < self.RACY_WINDOW_NS:
+            return
+        with self._lock:
+            self._entries[path] = (mtime_ns, files, size, tuple(subdirs))
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+directory_totals_cache = DirectoryTotalsCache()
+
+
+class ImpactEstimator:
+    """
+    Count the files and bytes under a set of paths with a parallel scandir walk
+
+    The walk stops at the deadline; the result is then a lower bound
+    ('exact' is False). progress is called from the walking thread with a
+    snapshot dict {'files', 'dirs', 'bytes', 'exact', 'done'} as numbers arrive.
+    """
+
+    def __init__(self, paths, deadline=2.0, max_workers=None, progress=None, cache=None):
+        if isinstance(paths, str):
+            paths = [paths]
+        self.paths = list(paths)
+        self.deadline = deadline
+        self.max_workers = max_workers or min(32, (os.cpu_count() or 1) * 4)
+        self.progress = progress
+        self.cache = directory_totals_cache if cache is None else cache
+        self._lock = threading.Lock()
+        self._cancel_event = threading.Event()
+        self._finished = threading.Event()
+        self._thread = None
+        self._files = 0
+        self._dirs = 0
+        self._bytes = 0
+        self._exact = True
+
+    def start(self):
+        """Run the estimate on a background thread and return immediately"""
+        self._thread = threading.Thread(target=self.run, name='impact-estimator', daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def wait(self, timeout=None):
+        """Wait for the estimate to finish; returns the latest snapshot"""
+        self._finished.wait(timeout)
+        return self.snapshot()
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'files': self._files,
+                'dirs': self._dirs,
+                'bytes': self._bytes,
+                'exact': self._exact and self._finished.is_set(),
+                'done': self._finished.is_set(),
+            }
+
+    def run(self):
+        """Walk the paths, blocking until done or the deadline passes"""
+        started = time.monotonic()
+        pool = ThreadPoolExecutor(max_workers=self.max_workers)
+        pending = set()
+        try:
+            for path in self.paths:
+                for match in expand_pattern(path):
+                    if os.path.isdir(match) and not os.path.islink(match):
+                        pending.add(pool.submit(self._scan_dir, match))
+                    else:
+                        self._add_file(match)
+
+            while pending:
+                remaining = self.deadline - (time.monotonic() - started)
+                if remaining <= 0 or self._cancel_event.is_set():
+                    with self._lock:
+                        self._exact = False
+                    break
+                done, pending = wait(pending, timeout=min(remaining, 0.05),
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    for subdir in future.result():
+                        pending.add(pool.submit(self._scan_dir, subdir))
+                self._notify()
+        finally:
+            # Late workers may still add to the counts, which only raises the lower bound
+            pool.shutdown(wait=False, cancel_futures=True)
+            self._finished.set()
+            self._notify()
+        return self.snapshot()
+
+    def _scan_dir(self, path):
+        """Count the direct entries of one directory; returns its subdirectories"""
+        if self._cancel_event.is_set():
+            return ()
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return ()
+
+        cached = self.cache.get(path, mtime_ns)
+        if cached is not None:
+            files, size, subdirs = cached
+        else:
+            files = size = 0
+            subdirs = []
+            for entry in _scan(path):
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.path)
+                    else:
+                        files += 1
+                        size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+            self.cache.put(path, mtime_ns, files, size, subdirs)
+
+        with self._lock:
+            self._dirs += 1
+            self._files += files
+            self._bytes += size
+        return subdirs
+
+    def _add_file(self, path):
+        try:
+            size = os.lstat(path).st_size
+        except OSError:
+            return
+        with self._lock:
+            self._files += 1
+            self._bytes += size
+
+    def _notify(self):
+        if self.progress:
+            self.progress(self.snapshot())
+
+
+def estimate_impact(paths, deadline=2.0, progress=None):
+    """Blocking convenience wrapper around ImpactEstimator"""
+    return ImpactEstimator(paths, deadline=deadline, progress=progress).run()
@@ -0,0 +1,331 @@
+"""
+Paged access to large text files through positioned reads.
+"""
+import os
+import re
+import threading
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+
+INDEX_BLOCK_SIZE = 64 * 1024  # Bytes per line-count checkpoint
+MAX_LINE_LENGTH = 64 * 1024  # Longer lines (e.g. binary files) are truncated when shown
+NOTIFY_EVERY = 16  # Blocks indexed between wake-ups of readers waiting for the index
+READ_SIZE = 256 * 1024  # Bytes per read when scanning
+
+
+class PagedFile:
+    """
+    Read-only view of a file through positioned reads (os.pread)
+
+    head() and tail() read from the ends of the file and never wait. Line
+    numbers further in come from a sparse index built on a background thread:
+    one newline count per INDEX_BLOCK_SIZE bytes (about 1 MB of index per 8 GB
+    of file), so lines(start, count) finds the nearest checkpoint and scans at
+    most one block. Only the requested lines are ever decoded.
+
+    The file is viewed as it was when opened: size, index and line numbers
+    refer to that snapshot and later appends are not seen. Nothing is mapped
+    into memory, so a file truncated or rewritten underneath (log rotation, an
+    editor saving) yields short reads rather than SIGBUS; changed() tells
+    callers when to reopen.
+    """
+
+    def __init__(self, path, encoding='utf-8', build_index=True):
+        self.path = path
+        self.encoding = encoding
+        self._file = open(path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self.size = st.st_size
+        self.mtime_ns = st.st_mtime_ns
+        self._read_lock = threading.Lock()  # Only for platforms without os.pread
+
+        self._block_lines = array('Q', [0])  # Newlines before the start of each block
+        self._newlines = 0  # Newlines in the part indexed so far
+        self._indexed = self.size == 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._indexer = None
+        self._ends_with_newline = self.size == 0 or self._read(self.size - 1, 1) == b'\n'
+        if build_index and not self._indexed:
+            self.start_index()
+
+    def start_index(self):
+        """Start the background line indexer (idempotent)"""
+        if self._indexer is None and not self._indexed:
+            self._indexer = threading.Thread(target=self._build_index, name='paged-file-index',
+                                             daemon=True)
+            self._indexer.start()
+
+    @property
+    def indexed(self):
+        return self._indexed
+
+    @property
+    def line_count(self):
+        """Number of lines, or None while the index is still being built"""
+        if not self._indexed:
+            return None
+        if not self._ends_with_newline:
+            return self._newlines + 1  # Last line has no trailing newline
+        return self._newlines
+
+    def changed(self):
+        """True if the file's size or mtime differ from the snapshot this view shows"""
+        try:
+            st = os.fstat(self._file.fileno())
+        except (OSError, ValueError):
+            return True
+        return st.st_size != self.size or st.st_mtime_ns != self.mtime_ns
+
+    def index_progress(self):
+        """Fraction of the file indexed so far (0..1)"""
+        if self._indexed:
+            return 1.0
+        return min(1.0, (len(self._block_lines) - 1) * INDEX_BLOCK_SIZE / self.size)
+
+    def head(self, count):
+        """First count lines"""
+        return self._read_lines(0, count)
+
+    def tail(self, count):
+        """Last count lines"""
+        if not self.size or count <= 0:
+            return []
+        end = self.size - 1 if self._ends_with_newline else self.size
+        # Read backwards until the buffer holds count newlines (or the whole file)
+        start = end
+        data = b''
+        while start > 0 and data.count(b'\n') < count:
+            start = max(0, start - READ_SIZE)
+            chunk = self._read(start, end - start - len(data))
+            if not chunk:
+                break
+            data = chunk + data
+        lines = data.split(b'\n')
+        if len(lines) > count:
+            lines = lines[-count:]
+        return [self._decode(line) for line in lines]
+
+    def lines(self, start, count, wait=True):
+        """
+        count lines from line start (0-based)
+        Waits for the background index to reach start unless wait is False,
+        in which case an unindexed start is located by scanning the file.
+        """
+        offset = self.line_offset(start, wait)
+        if offset is None:
+            return []
+        return self._read_lines(offset, count)
+
+    def line_offset(self, line, wait=True):
+        """Byte offset where line starts, or None past the end of the file"""
+        if not self.size:
+            return None
+        if line <= 0:
+            return 0
+        target = line - 1  # The newline that ends the previous line
+        with self._cond:
+            if wait and self._indexer is not None:
+                self._cond.wait_for(lambda: self._newlines > target or self._indexed or self._closed)
+            if self._newlines > target or self._indexed:
+                block = bisect_right(self._block_lines, target) - 1
+                skip = target - self._block_lines[block]
+                position = block * INDEX_BLOCK_SIZE
+            else:
+                skip = target
+                position = 0
+        while position < self.size:
+            data = self._read(position, min(READ_SIZE, self.size - position))
+            if not data:
+                return None  # File shrank since it was opened
+            newlines = data.count(b'\n')
+            if newlines <= skip:
+                skip -= newlines
+                position += len(data)
+                continue
+            index = -1
+            for _ in range(skip + 1):
+                index = data.find(b'\n', index + 1)
+            offset = position + index + 1
+            return offset if offset < self.size else None
+        return None
+
+    def search(self, pattern, limit=100, regex=False, ignore_case=False, start_line=0):
+        """
+        Lines containing pattern (a literal string unless regex=True)
+        Returns: [(line_number, line)] with 0-based line numbers, at most limit
+        """
+        if not self.size:
+            return []
+        flags = re.IGNORECASE | re.MULTILINE if ignore_case else re.MULTILINE
+        source = pattern.encode(self.encoding)
+        compiled = re.compile(source if regex else re.escape(source), flags)
+        position = self.line_offset(start_line) if start_line else 0
+        if position is None:
+            return []
+        line = start_line
+        results = []
+        carry = b''  # Unfinished last line of the previous read
+        while len(results) < limit and position < self.size:
+            data = self._read(position, min(READ_SIZE, self.size - position))
+            if not data:
+                break
+            position += len(data)
+            buffer = carry + data
+            cut = buffer.rfind(b'\n') + 1
+            if position < self.size and (cut or len(buffer) <= MAX_LINE_LENGTH):
+                # Search whole lines only; an overlong line is searched in pieces
+                buffer, carry = buffer[:cut], buffer[cut:]
+            else:
+                carry = b''
+            counted_to = 0
+            search_from = 0
+            while len(results) < limit:
+                match = compiled.search(buffer, search_from)
+                if match is None:
+                    break
+                line_start = buffer.rfind(b'\n', 0, match.start()) + 1
+                line_end = buffer.find(b'\n', match.start())
+                if line_end < 0:
+                    line_end = len(buffer)
+                # Count the newlines skipped since the last match to number this line
+                line += buffer.count(b'\n', counted_to, line_start)
+                counted_to = line_start
+                results.append((line, self._decode(buffer[line_start:line_end])))
+                search_from = line_end + 1
+            line += buffer.count(b'\n', counted_to)
+        return results
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._indexer is not None:
+            self._indexer.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _read(self, offset, size):
+        """Up to size bytes at offset; fewer (or none) if the file has shrunk"""
+        if hasattr(os, 'pread'):
+            return os.pread(self._file.fileno(), size, offset)
+        with self._read_lock:
+            self._file.seek(offset)
+            return self._file.read(size)
+
+    def _build_index(self):
+        count = 0
+        blocks = 0
+        for start in range(0, self.size, INDEX_BLOCK_SIZE):
+            if self._closed:
+                return
+            try:
+                data = self._read(start, INDEX_BLOCK_SIZE)
+            except (OSError, ValueError):
+                data = b''
+            # A shrunken file gives short blocks; its tail simply has no lines
+            count += data.count(b'\n')
+            blocks += 1
+            with self._cond:
+                self._block_lines.append(count)
+                self._newlines = count
+                if blocks % NOTIFY_EVERY == 0:
+                    self._cond.notify_all()
+        with self._cond:
+            self._indexed = True
+            self._cond.notify_all()
+
+    def _read_lines(self, offset, count):
+        if count <= 0 or offset >= self.size:
+            return []
+        lines = []
+        data = b''
+        while len(lines) < count and offset < self.size:
+            if not data:
+                data = self._read(offset, min(READ_SIZE, self.size - offset))
+                if not data:
+                    break  # File shrank since it was opened
+            newline = data.find(b'\n')
+            if newline >= 0:
+                lines.append(self._decode(data[:newline]))
+                offset += newline + 1
+                data = data[newline + 1:]
+                continue
+            if offset + len(data) >= self.size or len(data) > MAX_LINE_LENGTH:
+                # Last line, or one too long to show whole: skip to its end
+                lines.append(self._decode(data[:MAX_LINE_LENGTH + 1]))
+                end = self._find_newline(offset + len(data))
+                offset = self.size if end is None else end + 1
+                data = b''
+                continue
+            more = self._read(offset + len(data), min(READ_SIZE, self.size - offset - len(data)))
+            if not more:
+                lines.append(self._decode(data))
+                break
+            data += more
+        return lines
+
+    def _find_newline(self, position):
+        """Offset of the first newline at or after position, or None"""
+        while position < self.size:
+            data = self._read(position, min(READ_SIZE, self.size - position))
+            if not data:
+                return None
+            index = data.find(b'\n')
+            if index >= 0:
+                return position + index
+            position += len(data)
+        return None
+
+    def _decode(self, data):
+        text = data[:MAX_LINE_LENGTH].decode(self.encoding, errors='replace').rstrip('\r')
+        return text + '...' if len(data) > MAX_LINE_LENGTH else text
+
+
+class PagedFileCache:
+    """
+    Keeps the most recently viewed files open so their line index is reused
+    Entries are replaced when the file's size or mtime changes.
+    """
+
+    def __init__(self, max_files=4):
+        self.max_files = max_files
+        self._files = OrderedDict()  # path -> PagedFile
+        self._lock = threading.Lock()
+
+    def open(self, path):
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        stale = None
+        with self._lock:
+            paged = self._files.get(path)
+            if paged is not None:
+                if paged.size == st.st_size and paged.mtime_ns == st.st_mtime_ns:
+                    self._files.move_to_end(path)
+                    return paged
+                stale = self._files.pop(path)
+        if stale is not None:
+            stale.close()
+
+        paged = PagedFile(path)
+        evicted = []
+        with self._lock:
+            self._files[path] = paged
+            while len(self._files) > self.max_files:
+                evicted.append(self._files.popitem(last=False)[1])
+        for old in evicted:
+            old.close()
+        return paged
+
+    def close_all(self):
+        with self._lock:
+            files = list(self._files.values())
+            self._files.clear()
+        for paged in files:
+            paged.close()
@@ -1,6 +1,392 @@
 """
 Process management utilities.
 """
+import locale
+import math
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+
+import psutil
+
+IS_POSIX = os.name == 'posix'
+SAMPLE_INTERVAL = 0.05  # Seconds between psutil samples where wait4 is unavailable
+KILL_GRACE = 1.0  # Seconds between SIGTERM and SIGKILL when a command times out
+READ_SIZE = 65536
+MAX_TIMEOUT_FACTOR = 4  # Adaptive timeouts stay within this multiple of the default
+
+
 def list_processes():
     # Dummy implementation
     return ['python.exe', 'explorer.exe']
+
+
+class ResourceLimits:
+    """
+    Limits for a child process
+    cpu_seconds and address_space (bytes) are rlimits set before the command
+    runs (see wrap()); nice lowers CPU priority and ionice_class
+    (psutil.IOPRIO_CLASS_*) lowers disk priority, both set right after spawn
+    (apply_to()). Limits the platform cannot enforce are skipped.
+    """
+    __slots__ = ('cpu_seconds', 'address_space', 'nice', 'ionice_class')
+
+    def __init__(self, cpu_seconds=None, address_space=None, nice=None, ionice_class=None):
+        self.cpu_seconds = cpu_seconds
+        self.address_space = address_space
+        self.nice = nice
+        self.ionice_class = ionice_class
+
+    def wrap(self, command):
+        """
+        command (a shell string or argv) wrapped to start under the rlimits
+        On POSIX a /bin/sh sets them with ulimit and then execs the command, so
+        the limits are in place before it runs and without a preexec_fn, which
+        can deadlock the child of a multi-threaded parent. Returns an argv, or
+        command itself when there is nothing to wrap.
+        """
+        if not IS_POSIX:
+            return command
+        settings = []
+        if self.cpu_seconds is not None:
+            # The kernel sends SIGXCPU at the soft limit and SIGKILL at the hard one
+            seconds = max(1, math.ceil(self.cpu_seconds))
+            settings.append(f'ulimit -S -t {seconds} && ulimit -H -t {seconds + 1}')
+        if self.address_space is not None:
+            settings.append(f'ulimit -v {max(1, self.address_space // 1024)}')  # In KB
+        if not settings:
+            return command
+        argv = ['/bin/sh', '-c', command] if isinstance(command, str) else list(command)
+        return ['/bin/sh', '-c', ' && '.join(settings) + ' && exec "$@"', 'sh'] + argv
+
+    def apply_to(self, pid):
+        """Apply the limits that can be set from outside to a running process"""
+        try:
+            proc = psutil.Process(pid)
+            if self.nice is not None:
+                proc.nice(self.nice)
+            if self.ionice_class is not None and hasattr(proc, 'ionice'):
+                proc.ionice(self.ionice_class)
+        except (psutil.Error, OSError):
+            pass
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__
+                           if getattr(self, name) is not None)
+        return f'ResourceLimits({fields})'
+
+
+class LimitsPolicy:
+    """
+    Chooses ResourceLimits for a command: by intent first ('find', 'list', ...),
+    then by risk level ('safe', 'high'), then the default (None = unlimited)
+    """
+
+    def __init__(self, by_intent=None, by_risk=None, default=None):
+        self.by_intent = dict(by_intent or {})
+        self.by_risk = dict(by_risk or {})
+        self.default = default
+
+    def limits_for(self, intent=None, risk_level=None):
+        if intent in self.by_intent:
+            return self.by_intent[intent]
+        if risk_level in self.by_risk:
+            return self.by_risk[risk_level]
+        return self.default
+
+
+def new_usage():
+    """An all-zero usage dict"""
+    return {
+        'wall_time': 0.0,
+        'user_time': 0.0,
+        'system_time': 0.0,
+        'max_rss': 0,
+        'read_bytes': 0,
+        'write_bytes': 0,
+    }
+
+
+def _rusage_to_usage(rusage, wall_time):
+    """Convert os.wait4 rusage to a usage dict (block counts are 512-byte units)"""
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere
+    rss_scale = 1 if sys.platform == 'darwin' else 1024
+    return {
+        'wall_time': wall_time,
+        'user_time': rusage.ru_utime,
+        'system_time': rusage.ru_stime,
+        'max_rss': rusage.ru_maxrss * rss_scale,
+        'read_bytes': rusage.ru_inblock * 512,
+        'write_bytes': rusage.ru_oublock * 512,
+    }
+
+
+def sample_usage(pid, usage=None):
+    """
+    Update a usage dict from a live process via psutil
+    CPU and I/O counters are cumulative, so the last sample wins; RSS keeps its peak.
+    """
+    usage = usage if usage is not None else new_usage()
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            cpu = proc.cpu_times()
+            usage['user_time'] = cpu.user + getattr(cpu, 'children_user', 0.0)
+            usage['system_time'] = cpu.system + getattr(cpu, 'children_system', 0.0)
+            usage['max_rss'] = max(usage['max_rss'], proc.memory_info().rss)
+            if hasattr(proc, 'io_counters'):
+                io = proc.io_counters()
+                usage['read_bytes'] = io.read_bytes
+                usage['write_bytes'] = io.write_bytes
+    except (psutil.Error, OSError):
+        pass
+    return usage
+
+
+def _read_stream(stream, chunks):
+    """Collect raw chunks as they arrive so a killed command keeps its partial output"""
+    fd = stream.fileno()
+    try:
+        while True:
+            chunk = os.read(fd, READ_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    except OSError:
+        pass
+    finally:
+        stream.close()
+
+
+def _decode(chunks):
+    text = b''.join(chunks).decode(locale.getpreferredencoding(False), errors='replace')
+    return text.replace('\r\n', '\n')
+
+
+def kill_process_tree(proc, sig=None):
+    """
+    Signal a command and everything it spawned
+    On POSIX the command leads its own session, so the whole process group is
+    signalled; elsewhere the descendants are found with psutil.
+    """
+    if IS_POSIX:
+        try:
+            os.killpg(proc.pid, sig if sig is not None else signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+        return
+    try:
+        children = psutil.Process(proc.pid).children(recursive=True)
+    except psutil.Error:
+        children = []
+    for child in children:
+        try:
+            child.kill()
+        except psutil.Error:
+            pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def run_process(command, timeout=30, limits=None, kill_grace=KILL_GRACE, cwd=None, env=None):
+    """
+    Run a command, capturing output and resource usage
+    command is a shell string, or an argv list to run without a shell.
+    cwd/env default to the current process's.
+    On timeout the whole process group gets SIGTERM, then SIGKILL after
+    kill_grace seconds; output produced up to that point is still returned.
+    Returns dict: exit_code, stdout, stderr, timed_out, usage
+    usage: wall_time, user_time, system_time (seconds), max_rss, read_bytes, write_bytes
+    """
+    start = time.monotonic()
+    if limits is not None:
+        command = limits.wrap(command)
+    proc = subprocess.Popen(
+        command,
+        shell=isinstance(command, str),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        cwd=cwd,
+        env=env,
+        start_new_session=IS_POSIX
+    )
+    if limits is not None:
+        limits.apply_to(proc.pid)
+
+    stdout_chunks, stderr_chunks = [], []
+    readers = [
+        threading.Thread(target=_read_stream, args=(proc.stdout, stdout_chunks), daemon=True),
+        threading.Thread(target=_read_stream, args=(proc.stderr, stderr_chunks), daemon=True),
+    ]
+    for reader in readers:
+        reader.start()
+
+    timed_out = threading.Event()
+    timeout_lock = threading.Lock()
+    timers = []
+
+    def on_timeout():
+        with timeout_lock:
+            if timed_out.is_set():
+                return
+            timed_out.set()
+        if IS_POSIX:
+            kill_process_tree(proc, signal.SIGTERM)
+            escalate = threading.Timer(kill_grace, kill_process_tree, args=(proc,))
+            escalate.daemon = True
+            timers.append(escalate)
+            escalate.start()
+        else:
+            kill_process_tree(proc)
+
+    if timeout:
+        timer = threading.Timer(timeout, on_timeout)
+        timer.daemon = True
+        timers.append(timer)
+        timer.start()
+
+    try:
+        if hasattr(os, 'wait4'):
+            # wait4 reaps the child and hands back its rusage (including reaped descendants)
+            _, status, rusage = os.wait4(proc.pid, 0)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            usage = _rusage_to_usage(rusage, time.monotonic() - start)
+        else:
+            usage = new_usage()
+            while proc.poll() is None:
+                sample_usage(proc.pid, usage)
+                time.sleep(SAMPLE_INTERVAL)
+            usage['wall_time'] = time.monotonic() - start
+    finally:
+        if timed_out.is_set():
+            # Make sure nothing the shell left behind keeps running or holds the pipes
+            kill_process_tree(proc)
+
+    # A background job can hold the pipes after the shell exits; the deadline
+    # covers it too, so the timers stay armed until the readers are done
+    deadline = start + timeout if timeout else None
+    for reader in readers:
+        reader.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+    if any(reader.is_alive() for reader in readers):
+        on_timeout()
+        for reader in readers:
+            # A killed tree closes its pipes quickly; don't wait forever on stragglers
+            reader.join(kill_grace + 1)
+    for timer in list(timers):
+        timer.cancel()
+    if timed_out.is_set():
+        kill_process_tree(proc)
+
+    return {
+        'exit_code': proc.returncode,
+        'stdout': _decode(stdout_chunks),
+        'stderr': _decode(stderr_chunks),
+        'timed_out': timed_out.is_set(),
+        'usage': usage,
+    }
+
+
+class TimeoutPolicy:
+    """
+    Chooses the timeout for a command
+
+    Explicit per-intent timeouts win. With adaptive=True, commands with enough
+    history get percentile(latency) * multiplier, clamped to
+    [min_timeout, max_timeout]; history is kept per exact command and per
+    program name, the latter used until the exact command has min_samples runs.
+    Runs that timed out are recorded at their timeout, so a job that keeps
+    hitting the limit earns a longer one, up to max_timeout, which defaults to
+    MAX_TIMEOUT_FACTOR times the default so a runaway command cannot grow its
+    own limit far past the configured one.
+    """
+
+    def __init__(self, default=30.0, by_intent=None, adaptive=False, percentile=95,
+                 multiplier=3.0, min_timeout=5.0, max_timeout=None, min_samples=5,
+                 history=50, max_commands=1024):
+        if max_timeout is None:
+            max_timeout = default * MAX_TIMEOUT_FACTOR
+        self.default = default
+        self.by_intent = dict(by_intent or {})
+        self.adaptive = adaptive
+        self.percentile = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.min_samples = min_samples
+        self.history = history
+        self.max_commands = max_commands
+        self._latencies = OrderedDict()  # key -> deque of wall times
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _keys(command):
+        program = command.split(None, 1)[0].lower() if command.strip() else ''
+        return ('cmd', command), ('program', program)
+
+    def timeout_for(self, command, intent=None):
+        if intent in self.by_intent:
+            return self.by_intent[intent]
+        if self.adaptive:
+            for key in self._keys(command):
+                estimate = self._percentile(key)
+                if estimate is not None:
+                    return min(self.max_timeout, max(self.min_timeout, estimate * self.multiplier))
+        return self.default
+
+    def record(self, command, wall_time):
+        """Remember how long a command ran (its timeout, if it was killed)"""
+        if not self.adaptive:
+            return
+        with self._lock:
+            for key in self._keys(command):
+                samples = self._latencies.get(key)
+                if samples is None:
+                    samples = self._latencies[key] = deque(maxlen=self.history)
+                samples.append(wall_time)
+                self._latencies.move_to_end(key)
+            while len(self._latencies) > self.max_commands:
+                self._latencies.popitem(last=False)
+
+    def _percentile(self, key):
+        with self._lock:
+            samples = self._latencies.get(key)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        # Nearest-rank percentile
+        rank = max(0, min(len(ordered) - 1, -(-self.percentile * len(ordered) // 100) - 1))
+        return ordered[int(rank)]
+
+
+def poll_with_usage(process, usage, started):
+    """
+    Poll a Popen child, keeping its usage dict current
+    While it runs usage is sampled with psutil; once it exits it is reaped with
+    wait4 so the final rusage is recorded. Returns the exit code or None.
+    """
+    if process.returncode is not None:
+        return process.returncode
+
+    if hasattr(os, 'wait4'):
+        try:
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+        except ChildProcessError:
+            # Already reaped elsewhere; fall back to Popen's own bookkeeping
+            return process.poll()
+        if pid:
+            process.returncode = os.waitstatus_to_exitcode(status)
+            usage.update(_rusage_to_usage(rusage, time.monotonic() - started))
+            return process.returncode
+    elif process.poll() is not None:
+        usage['wall_time'] = time.monotonic() - started
+        return process.returncode
+
+    sample_usage(process.pid, usage)
+    usage['wall_time'] = time.monotonic() - started
+    return None
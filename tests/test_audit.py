@@ -0,0 +1,134 @@
+"""
+Tests for the asynchronous audit log.
+"""
+import json
+import os
+import threading
+import time
+
+import pytest
+
+from engine.audit import AuditLogger, read_audit_log, query_audit_log, main
+
+
+def test_records_are_written_in_order(tmp_path):
+    path = str(tmp_path / 'audit.jsonl')
+    log = AuditLogger(path, batch_size=7)
+    for i in range(50):
+        assert log.log({'input': f'cmd {i}', 'decision': 'executed'})
+    log.close()
+
+    records = list(read_audit_log(path))
+    assert [r['input'] for r in records] == [f'cmd {i}' for i in range(50)]
+    assert all('ts' in r for r in records)
+    assert log.stats()['written'] == 50
+
+
+def test_flush_makes_records_visible(tmp_path):
+    path = str(tmp_path / 'audit.jsonl')
+    log = AuditLogger(path, fsync='none')
+    log.log({'input': 'ls'})
+    assert log.flush()
+    with open(path) as f:
+        assert json.loads(f.readline())['input'] == 'ls'
+    log.close()
+
+
+def test_full_queue_drops_and_counts(tmp_path, monkeypatch):
+    log = AuditLogger(str(tmp_path / 'audit.jsonl'), max_queue=1)
+    release = threading.Event()
+    write_batch = log._write_batch
+    monkeypatch.setattr(log, '_write_batch', lambda batch: (release.wait(), write_batch(batch)))
+
+    assert log.log({'input': 'taken by the writer'})
+    while log.stats()['queued']:
+        time.sleep(0.001)
+    assert log.log({'input': 'fills the queue'})
+    assert not log.log({'input': 'lost'})
+    assert log.stats()['dropped'] == 1
+    release.set()
+    log.close()
+    assert log.stats()['written'] == 2
+
+
+def test_flush_times_out_on_a_full_queue(tmp_path, monkeypatch):
+    log = AuditLogger(str(tmp_path / 'audit.jsonl'), max_queue=1)
+    release = threading.Event()
+    write_batch = log._write_batch
+    monkeypatch.setattr(log, '_write_batch', lambda batch: (release.wait(), write_batch(batch)))
+
+    assert log.log({'input': 'taken by the writer'})
+    while log.stats()['queued']:
+        time.sleep(0.001)
+    assert log.log({'input': 'fills the queue'})
+    assert log.flush(timeout=0.05) is False
+    release.set()
+    assert log.flush()
+    log.close()
+
+
+def test_rotation_keeps_backups_readable(tmp_path):
+    path = str(tmp_path / 'audit.jsonl')
+    log = AuditLogger(path, batch_size=1, max_bytes=200, backup_count=2)
+    for i in range(30):
+        log.log({'input': f'command number {i}'})
+    log.close()
+
+    assert os.path.exists(path + '.1') and os.path.exists(path + '.2')
+    assert not os.path.exists(path + '.3')
+    inputs = [r['input'] for r in read_audit_log(path)]
+    assert inputs[-1] == 'command number 29'
+    assert inputs == sorted(inputs, key=lambda s: int(s.rsplit(' ', 1)[1]))
+
+
+def test_query_filters(tmp_path, capsys):
+    path = str(tmp_path / 'audit.jsonl')
+    log = AuditLogger(path)
+    log.log({'ts': 100.0, 'input': 'delete temp', 'command': 'rm -rf temp',
+             'decision': 'confirm', 'risk_level': 'high'})
+    log.log({'ts': 200.0, 'input': 'list files', 'command': 'ls', 'decision': 'executed'})
+    log.log({'ts': 300.0, 'input': 'rm -rf /', 'command': 'rm -rf /',
+             'decision': 'blocked', 'risk_level': 'critical'})
+    log.close()
+
+    assert [r['ts'] for r in query_audit_log(path, since=150)] == [200.0, 300.0]
+    assert [r['decision'] for r in query_audit_log(path, contains='RM -RF')] == ['confirm', 'blocked']
+    assert query_audit_log(path, risk_level='critical')[0]['input'] == 'rm -rf /'
+    assert len(query_audit_log(path, limit=1)) == 1
+
+    assert main([path, '--decision', 'blocked', '--json']) == 0
+    assert json.loads(capsys.readouterr().out)['command'] == 'rm -rf /'
+
+
+def test_invalid_policy_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        AuditLogger(str(tmp_path / 'audit.jsonl'), fsync='sometimes')
+
+
+def test_engine_records_each_decision(tmp_path):
+    from engine import CommandEngine
+    path = str(tmp_path / 'audit.jsonl')
+    log = AuditLogger(path)
+    engine = CommandEngine(audit_log=log, cwd=str(tmp_path), session_id='s1')
+    engine.process_input('echo hello')
+    engine.process_input('rm -rf /')
+    engine.record_confirmation('rm -rf temp', False)
+    log.close()
+
+    executed, blocked, declined = read_audit_log(path)
+    assert executed['decision'] == 'executed' and executed['exit_code'] == 0
+    assert executed['command'] == 'echo hello' and executed['mode'] == 'direct'
+    assert executed['session'] == 's1' and executed['exec_ms'] <= executed['total_ms']
+    assert blocked['decision'] == 'blocked' and blocked['risk_level'] == 'critical'
+    assert declined['decision'] == 'declined'
+
+
+def test_log_call_is_cheap(tmp_path):
+    log = AuditLogger(str(tmp_path / 'audit.jsonl'), fsync='none', max_queue=100000)
+    count = 20000
+    start = time.perf_counter()
+    for i in range(count):
+        log.log({'input': 'ls', 'command': 'ls', 'decision': 'executed'})
+    per_call = (time.perf_counter() - start) / count
+    log.close()
+    assert per_call < 50e-6
@@ -0,0 +1,150 @@
+"""
+Tests for compound natural language requests.
+"""
+import threading
+import time
+
+from engine.compound import split_compound, build_steps, run_steps
+from engine.preprocessor import parse_intent
+
+
+def plan(text):
+    return [sorted(step.deps) for step in build_steps(split_compound(text))]
+
+
+def test_split_on_conjunctions():
+    parts = split_compound('create folder a, create folder b and list files')
+    assert [text for text, _, _ in parts] == ['create folder a', 'create folder b', 'list files']
+    assert [after_then for _, _, after_then in parts] == [False, False, False]
+    assert split_compound('copy file a.txt to backup and then delete file a.txt')[1][2]
+
+
+def test_parts_without_action_stay_together():
+    assert len(split_compound('search for cats and dogs in pets.txt')) == 1
+    assert len(split_compound('list files and folders')) == 1
+    assert split_compound('create folder a and b, then list files')[0][0] == 'create folder a and b'
+
+
+def test_parts_must_start_with_a_verb():
+    parts = split_compound('delete folder old and new stuff')
+    assert len(parts) == 1 and parts[0][1].action == 'delete'
+    assert len(split_compound('delete folder old and create folder new')) == 2
+
+
+def test_existing_names_are_not_split(tmp_path):
+    text = 'show files in folder Tools and Start Menu'
+    assert len(split_compound(text, cwd=str(tmp_path))) == 2
+    (tmp_path / 'Tools and Start Menu').mkdir()
+    parts = split_compound(text, cwd=str(tmp_path))
+    assert len(parts) == 1 and parts[0][1].action == 'list'
+
+
+def test_single_request_keeps_its_intent():
+    for text in ('create folder test', 'list files and folders'):
+        intent = parse_intent(text)
+        assert split_compound(intent.text, intent) == [(intent.text, intent, False)]
+
+
+def test_dependencies():
+    # Independent creates, the listing waits for both
+    assert plan('create folder a, create folder b and list files') == [[], [], [0, 1]]
+    # Shared name
+    assert plan('copy file a.txt to backup and delete file a.txt') == [[], [0]]
+    # 'then' orders everything before it
+    assert plan('create folder a, create folder b then create folder c') == [[], [], [0, 1]]
+    # cd is a barrier
+    assert plan('create folder a and go to folder b and create folder c') == [[], [0], [1]]
+
+
+class FakeStep:
+    def __init__(self, index, deps=()):
+        self.index = index
+        self.deps = set(deps)
+
+
+def test_independent_steps_run_concurrently():
+    steps = [FakeStep(0), FakeStep(1), FakeStep(2, deps=[0, 1])]
+    active = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def run(step):
+        with lock:
+            active.append(step.index)
+            peak[0] = max(peak[0], len(active))
+        time.sleep(0.2)
+        with lock:
+            active.remove(step.index)
+        return True, f'step {step.index}', ''
+
+    start = time.monotonic()
+    results = run_steps(steps, run)
+    elapsed = time.monotonic() - start
+    assert [r[1] for r in results] == ['step 0', 'step 1', 'step 2']
+    assert peak[0] == 2
+    assert elapsed < 0.55  # Critical path is two steps, not three
+
+
+def test_failure_stops_new_steps():
+    steps = [FakeStep(0), FakeStep(1, deps=[0]), FakeStep(2, deps=[1])]
+    results = run_steps(steps, lambda step: (step.index != 0, '', 'boom'))
+    assert results[0] == (False, '', 'boom')
+    assert results[1:] == [None, None]
+
+
+def test_engine_runs_compound_request(tmp_path):
+    from engine import CommandEngine
+    engine = CommandEngine(cwd=str(tmp_path))
+    result = engine.process_input('create folder alpha, create folder beta and list files')
+    assert result[0], result
+    assert (tmp_path / 'alpha').is_dir() and (tmp_path / 'beta').is_dir()
+    assert result[1].startswith('[1/3] ')
+    assert 'alpha' in result.steps[2][1] and 'beta' in result.steps[2][1]
+
+
+def test_engine_confirms_before_running_any_step(tmp_path):
+    from engine import CommandEngine
+    (tmp_path / 'old').mkdir()
+    engine = CommandEngine(cwd=str(tmp_path))
+    success, _, prompt = engine.process_input('create folder new and delete folder old')
+    assert not success and 'Are you sure' in prompt
+    assert not (tmp_path / 'new').exists()
+
+
+def test_later_steps_see_what_earlier_steps_made(tmp_path):
+    from engine import CommandEngine
+    (tmp_path / 'alphabet').mkdir()  # A near miss that must not be suggested
+    engine = CommandEngine(cwd=str(tmp_path))
+    result = engine.process_input('create folder alpha then go to folder alpha')
+    assert result[0], result
+    assert engine.cwd == str(tmp_path / 'alpha')
+    assert engine.last_result is result
+
+
+def test_confirmed_steps_keep_their_order(tmp_path):
+    from engine import CommandEngine
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'a' / 'x.txt').write_text('x')
+    engine = CommandEngine(cwd=str(tmp_path))
+    success, _, prompt = engine.process_input('go to folder a then delete file x.txt')
+    assert not success and 'Are you sure' in prompt
+    assert (tmp_path / 'a' / 'x.txt').exists()
+    result = engine.run_confirmed()
+    assert result[0], result
+    assert not (tmp_path / 'a' / 'x.txt').exists()
+    assert engine.cwd == str(tmp_path / 'a')
+    assert engine.run_confirmed()[2] == 'Nothing to confirm'
+
+
+def test_engine_parses_input_once(tmp_path, monkeypatch):
+    from engine import CommandEngine, executor
+    calls = []
+
+    def counting_parse_intent(text):
+        calls.append(text)
+        return parse_intent(text)
+
+    monkeypatch.setattr(executor, 'parse_intent', counting_parse_intent)
+    engine = CommandEngine(cwd=str(tmp_path))
+    assert engine.process_input('create folder alpha')[0]
+    assert calls == ['create folder alpha']
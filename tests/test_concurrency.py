@@ -0,0 +1,114 @@
+"""
+Stress tests for sharing one CommandEngine across threads.
+"""
+import os
+import threading
+import time
+
+import psutil
+import pytest
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason='uses sleep/sh')
+
+THREADS = 8
+ROUNDS = 10
+
+
+def _run_threads(target, count=THREADS):
+    errors = []
+
+    def wrapper(index):
+        try:
+            target(index)
+        except Exception as e:  # Surface failures from worker threads
+            errors.append(e)
+
+    threads = [threading.Thread(target=wrapper, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(60)
+    assert not errors, errors
+
+
+@posix_only
+def test_bg_kill_ps_invariants(tmp_path, monkeypatch):
+    from engine import CommandEngine, ResultCache
+    monkeypatch.chdir(tmp_path)
+    engine = CommandEngine(result_cache=ResultCache())
+    started = []
+    started_lock = threading.Lock()
+
+    def worker(index):
+        for _ in range(ROUNDS):
+            success, output, _ = engine.execute_command('bg sleep 30')
+            assert success
+            pid = int(output.rsplit(' ', 1)[1])
+            with started_lock:
+                started.append(pid)
+
+            assert engine.process_input('list files')[0]
+            success, listing, _ = engine.execute_command('ps')
+            assert success and f'PID: {pid},' in listing
+
+            success, output, _ = engine.execute_command(f'kill {pid}')
+            assert success and output == f'Process {pid} terminated'
+            assert pid not in engine.running_processes
+
+    _run_threads(worker)
+
+    assert len(set(started)) == THREADS * ROUNDS
+    assert engine.running_processes == {}
+    # Every killed job was reaped: none is left running or as a zombie
+    children = {child.pid for child in psutil.Process().children()}
+    assert not children & set(started)
+
+
+@posix_only
+def test_cleanup_races_with_starts():
+    from engine import CommandEngine
+    engine = CommandEngine()
+
+    def worker(index):
+        for _ in range(ROUNDS):
+            if index % 2:
+                engine.execute_command('bg sleep 30')
+            else:
+                engine.cleanup()
+
+    _run_threads(worker)
+    engine.cleanup()
+    assert engine.running_processes == {}
+
+
+def test_per_thread_state_is_isolated():
+    from engine import CommandEngine
+    engine = CommandEngine()
+    seen = {}
+
+    def worker(index):
+        engine.execute_command(f'echo {index}')
+        time.sleep(0.01)
+        seen[index] = engine.last_result.stdout.strip()
+
+    _run_threads(worker)
+    assert seen == {i: str(i) for i in range(THREADS)}
+
+
+@posix_only
+def test_throughput_scales_with_threads():
+    from engine import CommandEngine
+    engine = CommandEngine()
+    commands = ['sleep 0.1'] * THREADS
+
+    start = time.monotonic()
+    for command in commands:
+        engine.execute_command(command)
+    sequential = time.monotonic() - start
+
+    start = time.monotonic()
+    _run_threads(lambda index: engine.execute_command(commands[index]))
+    parallel = time.monotonic() - start
+
+    # Executions must not be serialized behind an engine-wide lock
+    assert parallel < sequential / 2
@@ -0,0 +1,188 @@
+"""
+Tests for the bulk file operations engine.
+"""
+import os
+import time
+
+import pytest
+
+
+def _make_files(root, names, content=b'data'):
+    for name in names:
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+
+def test_expand_pattern(tmp_path):
+    from system.filesystem import expand_pattern
+    _make_files(str(tmp_path), ['a.log', 'b.log', 'c.txt', '.hidden.log', 'sub/d.log'])
+    matches = expand_pattern(os.path.join(str(tmp_path), '*.log'))
+    assert [os.path.basename(m) for m in matches] == ['a.log', 'b.log']
+    recursive = expand_pattern(os.path.join(str(tmp_path), '**', '*.log'))
+    assert len(recursive) == 3
+
+
+def test_bulk_copy_reports_progress(tmp_path):
+    from system.filesystem import bulk_file_operation
+    src = tmp_path / 'logs'
+    dst = tmp_path / 'backup'
+    _make_files(str(src), [f'{i}.log' for i in range(50)] + ['nested/x.log'], b'x' * 1000)
+
+    events = []
+    summary = bulk_file_operation('copy', [str(src / '*.log')], str(dst), progress=events.append)
+    assert summary['completed'] == 50 and summary['failed'] == 0
+    assert summary['bytes'] == 50 * 1000
+    assert len(events) == 50 and max(e['done'] for e in events) == 50
+    assert sorted(os.listdir(dst)) == sorted(f'{i}.log' for i in range(50))
+
+    summary = bulk_file_operation('copy', str(src), str(tmp_path / 'tree'))
+    assert summary['completed'] == 51
+    assert (tmp_path / 'tree' / 'nested' / 'x.log').read_bytes() == b'x' * 1000
+
+
+def test_bulk_move_and_delete(tmp_path):
+    from system.filesystem import bulk_file_operation
+    _make_files(str(tmp_path / 'src'), ['a.txt', 'dir/b.txt'])
+    (tmp_path / 'dst').mkdir()
+    summary = bulk_file_operation('move', str(tmp_path / 'src' / '*'), str(tmp_path / 'dst'))
+    assert summary['failed'] == 0
+    assert os.listdir(tmp_path / 'src') == []
+    assert (tmp_path / 'dst' / 'dir' / 'b.txt').exists()
+
+    summary = bulk_file_operation('delete', str(tmp_path / 'dst'))
+    assert summary['completed'] == 2 and summary['failed'] == 0
+    assert not (tmp_path / 'dst').exists()
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink') or os.name == 'nt', reason='needs symlinks')
+def test_bulk_copy_and_delete_keep_symlinks_as_links(tmp_path):
+    from system.filesystem import bulk_file_operation
+    outside = tmp_path / 'outside'
+    _make_files(str(outside), ['keep.txt'])
+    tree = tmp_path / 'tree'
+    _make_files(str(tree), ['a.txt'])
+    os.symlink(str(outside), str(tree / 'dirlink'))
+    os.symlink('a.txt', str(tree / 'filelink'))
+
+    summary = bulk_file_operation('copy', str(tree), str(tmp_path / 'copy'))
+    assert summary['failed'] == 0 and summary['completed'] == 3
+    assert os.readlink(str(tmp_path / 'copy' / 'dirlink')) == str(outside)
+    assert os.readlink(str(tmp_path / 'copy' / 'filelink')) == 'a.txt'
+
+    summary = bulk_file_operation('delete', str(tree))
+    assert summary['failed'] == 0 and not tree.exists()
+    assert (outside / 'keep.txt').exists()  # Links are removed, not followed
+
+
+@pytest.mark.skipif(not hasattr(os, 'mkfifo'), reason='needs FIFOs')
+def test_bulk_copy_never_opens_special_files(tmp_path):
+    import socket
+    import threading
+    from system.filesystem import BulkFileOperation
+    src = tmp_path / 'src'
+    _make_files(str(src), ['a.txt'])
+    os.mkfifo(str(src / 'pipe'))
+    listener = socket.socket(socket.AF_UNIX)
+    listener.bind(str(src / 'sock'))
+
+    summaries = []
+    worker = threading.Thread(target=lambda: summaries.append(
+        BulkFileOperation('copy', [str(src)], str(tmp_path / 'dst')).run()), daemon=True)
+    worker.start()
+    worker.join(5)
+    listener.close()
+    assert summaries, 'copy blocked on a special file'
+    summary = summaries[0]
+    assert summary['completed'] == 2
+    assert [os.path.basename(path) for path, _ in summary['errors']] == ['sock']
+    assert os.path.exists(str(tmp_path / 'dst' / 'pipe'))
+    assert not os.path.isfile(str(tmp_path / 'dst' / 'pipe'))
+
+
+def test_bulk_refuses_filesystem_root(tmp_path):
+    from system.filesystem import BulkFileOperation
+    summary = BulkFileOperation('copy', [os.path.abspath(os.sep)], str(tmp_path / 'dst')).run()
+    assert summary['total'] == 0 and summary['failed'] == 1
+
+
+def test_parse_bulk_request():
+    from engine.preprocessor import parse_bulk_request
+    assert parse_bulk_request('copy all the logs to backup') == ('copy', ['*.log'], 'backup')
+    assert parse_bulk_request('move all txt files into the folder archive') == ('move', ['*.txt'], 'archive')
+    assert parse_bulk_request('delete *.tmp *.bak') == ('delete', ['*.tmp', '*.bak'], None)
+    assert parse_bulk_request('remove folder old') == ('delete', ['old'], None)
+    assert parse_bulk_request('copy notes.txt') is None
+
+
+def test_engine_routes_bulk_requests(tmp_path):
+    from engine import CommandEngine
+    _make_files(tmp_path, ['a.log', 'b.log', 'x.tmp', 'notes.txt'])
+    (tmp_path / 'backup').mkdir()
+    engine = CommandEngine(cwd=str(tmp_path))
+    result = engine.process_input('copy all the logs to backup')
+    assert result[0] and result[1].startswith('Copy: 2/2'), result
+    assert sorted(os.listdir(tmp_path / 'backup')) == ['a.log', 'b.log']
+
+    success, _, prompt = engine.process_input('delete *.tmp')
+    assert not success and 'rm -r *.tmp' in prompt
+    assert (tmp_path / 'x.tmp').exists()
+    assert engine.run_confirmed()[0]
+    assert not (tmp_path / 'x.tmp').exists() and (tmp_path / 'notes.txt').exists()
+
+
+def test_engine_blocks_protected_bulk_paths(tmp_path):
+    from engine import CommandEngine
+    _make_files(str(tmp_path / 'outside'), ['a.txt'])
+    (tmp_path / 'work').mkdir()
+    engine = CommandEngine(cwd=str(tmp_path / 'work'))
+    for text in ('delete folder /', 'remove /', 'delete /etc', 'delete the folder /usr', 'copy / to backup'):
+        success, _, message = engine.process_input(text)
+        assert not success and 'CRITICAL' in message, text
+        assert engine.pending_command is None
+    assert not (tmp_path / 'work' / 'backup').exists()
+
+    # Safe on its own, but the source is outside the working directory
+    success, _, prompt = engine.process_input(f'copy {tmp_path / "outside"} to backup')
+    assert not success and 'Are you sure' in prompt
+    assert not (tmp_path / 'work' / 'backup').exists()
+
+
+def test_bulk_cancel(tmp_path):
+    from system.filesystem import BulkFileOperation
+    _make_files(str(tmp_path / 'src'), [f'{i}.bin' for i in range(200)])
+
+    operation = BulkFileOperation('copy', str(tmp_path / 'src' / '*'), str(tmp_path / 'dst'),
+                                  max_workers=1, progress=lambda event: operation.cancel())
+    summary = operation.run()
+    assert summary['cancelled']
+    assert summary['completed'] < 200
+
+
+def test_impact_estimate_counts_tree(tmp_path):
+    from system.filesystem import DirectoryTotalsCache, ImpactEstimator
+    _make_files(str(tmp_path), ['a.bin', 'x/b.bin', 'x/y/c.bin'], b'z' * 100)
+    # Age the directories so they fall outside the cache's racy-mtime window
+    past = time.time() - 60
+    for directory in (tmp_path, tmp_path / 'x', tmp_path / 'x' / 'y'):
+        os.utime(directory, (past, past))
+    cache = DirectoryTotalsCache()
+
+    updates = []
+    result = ImpactEstimator(str(tmp_path), cache=cache, progress=updates.append).run()
+    assert result == {'files': 3, 'dirs': 3, 'bytes': 300, 'exact': True, 'done': True}
+    assert updates[-1]['done']
+    assert cache.get(str(tmp_path / 'x'), os.stat(tmp_path / 'x').st_mtime_ns) is not None
+
+    # A second pass is served from the cache; new entries invalidate only their directory
+    _make_files(str(tmp_path), ['x/y/d.bin'], b'z' * 50)
+    result = ImpactEstimator(str(tmp_path), cache=cache).run()
+    assert result['files'] == 4 and result['bytes'] == 350
+
+
+def test_impact_estimate_deadline_is_lower_bound(tmp_path):
+    from system.filesystem import ImpactEstimator
+    _make_files(str(tmp_path), ['a/b/c.bin'])
+    result = ImpactEstimator(str(tmp_path), deadline=0).run()
+    assert not result['exact'] and result['done']
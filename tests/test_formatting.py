@@ -0,0 +1,96 @@
+"""
+Tests for the streaming output formatter.
+"""
+import random
+
+import utils.formatting as formatting
+from utils.formatting import (DEFAULT_STYLE, PALETTE, RULE_STYLES, OutputFormatter, apply_sgr,
+                              format_output, strip_ansi)
+
+SAMPLE = ('total 8\n'
+          'drwxr-xr-x 2 user \x1b[01;34mengine\x1b[0m\n'
+          '\x1b[38;5;196mred\x1b[39m and \x1b[1mbold /etc/hosts\x1b[0m\r\n'
+          'sshd[4211]: reading /var/log/auth.log\n'
+          'app: ERROR cannot open ~/cache: Permission denied\n'
+          '\x1b]0;window title\x07plain ./run.sh pid=77')
+
+
+def texts(spans):
+    return [(span.text, span.style) for span in spans]
+
+
+def test_sgr_state():
+    style = apply_sgr(DEFAULT_STYLE, '01;34')
+    assert style.bold and style.fg == PALETTE[4]
+    assert apply_sgr(style, '22').fg == PALETTE[4] and not apply_sgr(style, '22').bold
+    assert apply_sgr(style, '') == DEFAULT_STYLE
+    assert apply_sgr(DEFAULT_STYLE, '38;5;196').fg == '#ff0000'
+    assert apply_sgr(DEFAULT_STYLE, '48;2;1;2;3').bg == '#010203'
+    assert apply_sgr(DEFAULT_STYLE, '38;5;232').fg == '#080808'
+
+
+def test_escapes_are_removed_and_applied():
+    spans = format_output(SAMPLE, highlight=False)
+    assert ''.join(span.text for span in spans) == strip_ansi(SAMPLE).replace('\r\n', '\n')
+    engine = next(span for span in spans if span.text == 'engine')
+    assert engine.style.fg == PALETTE[4] and engine.style.bold
+    assert next(span for span in spans if span.text == 'red').style.fg == '#ff0000'
+    # Adjacent spans always differ in style
+    assert all(a.style != b.style for a, b in zip(spans, spans[1:]))
+
+
+def test_highlight_rules():
+    spans = dict((span.text, span.style) for span in format_output(SAMPLE))
+    assert spans['/var/log/auth.log'] == RULE_STYLES['path']
+    assert spans['4211'] == spans['pid=77'] == RULE_STYLES['pid']
+    assert spans['./run.sh'] == RULE_STYLES['path']
+    assert spans['app: ERROR cannot open ~/cache: Permission denied'] == RULE_STYLES['error']
+    # Text the program coloured itself keeps its colours
+    assert spans['/etc/hosts'] == RULE_STYLES['path']._replace(bold=True)
+
+    plain = dict((span.text, span.style) for span in format_output(
+        'terror and a/b and http://host/x C:\\Temp\\a.txt\n'))
+    assert 'C:\\Temp\\a.txt' in plain
+    assert all(style == DEFAULT_STYLE for text, style in plain.items() if text != 'C:\\Temp\\a.txt')
+
+
+def test_chunking_does_not_change_output():
+    expected = texts(format_output(SAMPLE * 3))
+    for seed in range(20):
+        rng = random.Random(seed)
+        data = SAMPLE * 3
+        formatter = OutputFormatter()
+        spans = []
+        position = 0
+        while position < len(data):
+            step = rng.randint(1, 12)
+            spans.extend(formatter.feed(data[position:position + step]))
+            position += step
+        spans.extend(formatter.flush())
+        # Same text and styles, although split at line boundaries differently
+        merged = []
+        for text, style in texts(spans):
+            if merged and merged[-1][1] == style:
+                merged[-1] = (merged[-1][0] + text, style)
+            else:
+                merged.append((text, style))
+        assert merged == expected
+
+
+def test_long_lines_are_emitted_in_pieces(monkeypatch):
+    monkeypatch.setattr(formatting, 'MAX_PENDING', 100)
+    formatter = OutputFormatter(highlight=False)
+    assert formatter.feed('x' * 50) == []
+    spans = formatter.feed('x' * 60 + '\x1b[3')
+    assert ''.join(span.text for span in spans) == 'x' * 110
+    spans = formatter.feed('1mred') + formatter.flush()
+    assert spans[0].text == 'red' and spans[0].style.fg == PALETTE[1]
+
+
+def test_paths_are_whole_runs():
+    def highlighted(text):
+        return [span.text for span in format_output(text) if span.style != DEFAULT_STYLE]
+    assert highlighted('--prefix=/usr/local and ../up and ~/home\n') == ['/usr/local', '../up', '~/home']
+    # Nothing starts inside a run that isn't a path, or inside one that is
+    assert highlighted('a/ß/x and x/y,../z\n') == []
+    assert highlighted('see /a,./b and /@~/c\n') == ['/a,./b', '/@~/c']
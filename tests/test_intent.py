@@ -0,0 +1,32 @@
+"""
+Tests for the CommandIntent pipeline object.
+"""
+
+
+def test_parse_intent_fills_fields():
+    from engine.preprocessor import parse_intent
+    from engine.mapper import map_intent
+    intent = parse_intent('  Create Folder Test  ')
+    assert intent.text == 'Create Folder Test'
+    assert intent.lower == 'create folder test'
+    assert intent.tokens == ['create', 'folder', 'test']
+    assert intent.mode == 'nl' and intent.action == 'create'
+    assert intent.confidence == 0.9
+    assert map_intent(intent) == 'mkdir test' and intent.command == 'mkdir test'
+
+
+def test_direct_intent_passes_through():
+    from engine.preprocessor import parse_intent
+    from engine.mapper import map_intent
+    intent = parse_intent('ls -la')
+    assert intent.mode == 'direct' and intent.confidence == 1.0
+    assert map_intent(intent) == 'ls -la'
+
+
+def test_intent_is_slotted_and_matches_legacy_tuple():
+    import pytest
+    from engine.preprocessor import parse_intent, preprocess_input
+    intent = parse_intent('delete file notes.txt')
+    with pytest.raises(AttributeError):
+        intent.extra = 1
+    assert intent.as_tuple() == preprocess_input('delete file notes.txt')
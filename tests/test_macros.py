@@ -0,0 +1,101 @@
+"""
+Tests for user macros and aliases.
+"""
+import json
+import os
+
+import pytest
+
+from engine.macros import MacroTable, compile_macros
+
+CONFIG = {
+    'aliases': {'ll': 'ls -la'},
+    'macros': {
+        'deploy logs {service}': ['cd /srv/{service}', 'tail -n 200 logs/deploy.log'],
+        'grep code {pattern} {paths*}': 'grep -rn {pattern} {paths}',
+        'big files': 'find . -size +100M -exec ls -lh {} \\;',
+        'say {word}': 'echo {word}',
+    },
+}
+
+
+def test_aliases_keep_trailing_arguments():
+    table = MacroTable(config=CONFIG)
+    assert table.expand('ll').steps == ['ls -la']
+    assert table.expand('LL docs "my dir"').steps == ['ls -la docs "my dir"']
+    assert table.expand('list files') is None
+
+
+def test_parameters_and_rest():
+    table = MacroTable(config=CONFIG)
+    expansion = table.expand('deploy logs API')
+    assert expansion.steps == ['cd /srv/API', 'tail -n 200 logs/deploy.log']
+    assert expansion.values == {'service': 'API'}
+    assert table.expand('grep code TODO src lib').steps == ['grep -rn TODO src lib']
+    assert table.expand('big files').steps == ['find . -size +100M -exec ls -lh {} \\;']
+    assert table.expand('deploy logs') is None
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX shell quoting')
+def test_captured_values_are_quoted():
+    table = MacroTable(config=CONFIG)
+    assert table.expand('say a;rm').steps == ["echo 'a;rm'"]
+    assert table.expand('say $(id)').steps == ["echo '$(id)'"]
+    assert table.expand('grep code TODO src "my dir"').steps == ["grep -rn TODO src 'my dir'"]
+
+
+def test_invalid_definitions_rejected():
+    for config in ({'macros': {'a {x*} b': 'echo'}}, {'macros': {'a {x} {x}': 'echo'}},
+                   {'macros': {'a': []}}, ['not', 'a', 'dict']):
+        with pytest.raises(ValueError):
+            compile_macros(config)
+
+
+def test_many_macros_do_not_slow_expansion():
+    config = {'macros': {f'task {i} {{arg}}': f'echo {i} {{arg}}' for i in range(20000)}}
+    table = MacroTable(config=config)
+    assert table.count == 20000
+    assert table.expand('task 12345 now').steps == ['echo 12345 now']
+
+
+def test_hot_reload(tmp_path):
+    path = tmp_path / 'macros.json'
+    path.write_text(json.dumps({'aliases': {'hi': 'echo one'}}))
+    table = MacroTable(str(path), reload_interval=0)
+    assert table.expand('hi').steps == ['echo one']
+
+    path.write_text(json.dumps({'aliases': {'hi': 'echo two'}}))
+    os.utime(path, ns=(0, 10 ** 18))  # Make sure the mtime differs on coarse filesystems
+    assert table.expand('hi').steps == ['echo two']
+
+    path.write_text('{broken')
+    os.utime(path, ns=(0, 2 * 10 ** 18))
+    assert table.expand('hi').steps == ['echo two']
+    assert table.error
+
+    path.unlink()
+    assert table.expand('hi') is None
+
+
+def test_engine_runs_macro_steps_without_nl_parsing(tmp_path, monkeypatch):
+    from engine import CommandEngine
+    import engine.executor as executor
+    monkeypatch.setattr(executor, 'parse_intent', lambda text: pytest.fail('NL parser ran'))
+    (tmp_path / 'srv').mkdir()
+    table = MacroTable(config={'macros': {
+        'enter {name}': ['cd {name}', 'pwd'],
+        'fail then echo': ['false', 'echo unreachable'],
+        'wipe {name}': ['echo about to', 'rm -r {name}'],
+    }})
+    engine = CommandEngine(cwd=str(tmp_path), macros=table)
+
+    success, output, _ = engine.process_input('enter srv')
+    assert success and output.strip().endswith('srv')
+    assert engine.cwd == str(tmp_path / 'srv')
+
+    success, output, _ = engine.process_input('fail then echo')
+    assert not success and 'unreachable' not in output
+
+    success, _, prompt = engine.process_input('wipe old')
+    assert not success and 'Are you sure' in prompt
+    assert engine.pending_command == 'echo about to && rm -r old'
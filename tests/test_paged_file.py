@@ -0,0 +1,132 @@
+"""
+Tests for the paged file viewer and the read intent that uses it.
+"""
+import pytest
+
+import system.paged_file as paged_file
+from system.paged_file import PagedFile, PagedFileCache
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Many index blocks even for a small file
+    monkeypatch.setattr(paged_file, 'INDEX_BLOCK_SIZE', 64)
+
+
+@pytest.fixture
+def log_file(tmp_path):
+    path = tmp_path / 'server.log'
+    path.write_text(''.join(f'line {i}\n' for i in range(1000)))
+    return path
+
+
+def test_head_tail_and_ranges(log_file, small_blocks):
+    with PagedFile(str(log_file)) as paged:
+        assert paged.head(2) == ['line 0', 'line 1']
+        assert paged.tail(3) == ['line 997', 'line 998', 'line 999']
+        assert paged.lines(500, 2) == ['line 500', 'line 501']
+        assert paged.lines(998, 10) == ['line 998', 'line 999']
+        assert paged.lines(1000, 1) == []
+        assert paged.line_count == 1000
+        assert paged.index_progress() == 1.0
+
+
+def test_lines_without_waiting_for_index(log_file):
+    with PagedFile(str(log_file), build_index=False) as paged:
+        assert paged.line_count is None
+        assert paged.lines(750, 1, wait=False) == ['line 750']
+
+
+def test_no_trailing_newline_and_empty_file(tmp_path):
+    path = tmp_path / 'a.txt'
+    path.write_bytes(b'first\r\nsecond')
+    with PagedFile(str(path)) as paged:
+        assert paged.tail(5) == ['first', 'second']
+        assert paged.lines(1, 1) == ['second']
+        assert paged.line_count == 2
+
+    empty = tmp_path / 'empty.txt'
+    empty.write_bytes(b'')
+    with PagedFile(str(empty)) as paged:
+        assert paged.head(5) == [] and paged.tail(5) == [] and paged.line_count == 0
+
+
+def test_search_numbers_lines(log_file, small_blocks):
+    with PagedFile(str(log_file)) as paged:
+        assert paged.search('LINE 99', limit=3, ignore_case=True) == \
+            [(99, 'line 99'), (990, 'line 990'), (991, 'line 991')]
+        assert paged.search(r'line 12\d$', regex=True, limit=2, start_line=500) == []
+        assert paged.search('line 5', limit=2, start_line=500) == [(500, 'line 500'), (501, 'line 501')]
+
+
+def test_long_lines_are_truncated(tmp_path, monkeypatch):
+    monkeypatch.setattr(paged_file, 'MAX_LINE_LENGTH', 10)
+    path = tmp_path / 'blob.bin'
+    path.write_bytes(b'x' * 100)
+    with PagedFile(str(path)) as paged:
+        assert paged.head(1) == ['x' * 10 + '...']
+
+
+def test_cache_reuses_until_file_changes(log_file):
+    cache = PagedFileCache(max_files=1)
+    first = cache.open(str(log_file))
+    assert cache.open(str(log_file)) is first
+    log_file.write_text('changed\n')
+    second = cache.open(str(log_file))
+    assert second is not first and second.head(1) == ['changed']
+    cache.close_all()
+
+
+def test_nl_partial_views_map_to_commands():
+    from engine.preprocessor import parse_intent
+    from engine.mapper import map_intent
+    intent = parse_intent('show the last 100 lines of server.log')
+    assert intent.action == 'read' and intent.components['view'] == ('tail', 100)
+    assert map_intent(intent) in ('tail -n 100 server.log',
+                                  'powershell -Command "Get-Content server.log -Tail 100"')
+    assert parse_intent('show lines 10 to 20 of data.csv').components['view'] == ('range', 10, 20)
+    assert parse_intent('search for timeout in app.log').components['view'] == ('search', 'timeout')
+    assert parse_intent('open server.log').components['filename'] == 'server.log'
+
+
+def test_engine_serves_reads_natively(log_file, monkeypatch):
+    from engine import CommandEngine
+    import engine.executor as executor
+    monkeypatch.setattr(executor, 'PAGE_LINES', 300)
+    engine = CommandEngine(cwd=str(log_file.parent))
+
+    assert engine.process_input('show the last 2 lines of server.log')[1] == 'line 998\nline 999\n'
+    # No action word in front: "last" must not be corrected to "list" (or run the login history)
+    assert engine.process_input('last 100 lines of server.log')[1].splitlines()[0] == 'line 900'
+    assert engine.process_input('first 2 lines of server.log')[1] == 'line 0\nline 1\n'
+    assert engine.process_input('show lines 10 to 11 of server.log')[1] == 'line 9\nline 10\n'
+    assert engine.process_input('search for line 99 in server.log')[1].startswith('100:line 99\n')
+
+    output = engine.process_input('open server.log')[1]
+    assert output.splitlines()[-1] == 'line 299'
+    assert engine.next_page().splitlines()[0] == 'line 300'
+    assert engine.next_page().splitlines()[-1] == 'line 899'
+    assert engine.next_page().splitlines()[-1] == 'line 999'
+    assert engine.next_page() == ''
+    engine.cleanup()
+
+
+def test_small_reads(log_file, small_blocks, monkeypatch):
+    monkeypatch.setattr(paged_file, 'READ_SIZE', 7)
+    with PagedFile(str(log_file)) as paged:
+        assert paged.tail(3) == ['line 997', 'line 998', 'line 999']
+        assert paged.lines(500, 2) == ['line 500', 'line 501']
+        assert paged.search('line 99', limit=2) == [(99, 'line 99'), (990, 'line 990')]
+        assert paged.search('^line 5$', regex=True) == [(5, 'line 5')]
+
+
+def test_file_truncated_while_open(log_file):
+    with PagedFile(str(log_file)) as paged:
+        assert not paged.changed()
+        with open(log_file, 'r+b') as f:
+            f.truncate(20)
+        assert paged.changed()
+        # Short reads instead of SIGBUS
+        assert paged.lines(900, 2) == []
+        assert paged.search('line 9') == []
+        assert paged.head(2) == ['line 0', 'line 1']
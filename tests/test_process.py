@@ -0,0 +1,135 @@
+"""
+Tests for process execution, resource accounting and limits.
+"""
+import os
+import sys
+import time
+
+import pytest
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason='relies on wait4/setrlimit')
+PYTHON = f'"{sys.executable}"'
+
+
+def test_run_process_reports_usage():
+    from system.process import run_process
+    result = run_process(f'{PYTHON} -c "print(sum(range(3000000)))"')
+    assert result['exit_code'] == 0 and result['stdout'].strip() == str(sum(range(3000000)))
+    usage = result['usage']
+    assert usage['wall_time'] > 0
+    assert usage['user_time'] + usage['system_time'] > 0
+    assert usage['max_rss'] > 1024 * 1024
+
+
+@posix_only
+def test_cpu_limit_stops_runaway_command():
+    from system.process import ResourceLimits, run_process
+    start = time.monotonic()
+    result = run_process(f'{PYTHON} -c "while True: pass"', timeout=20,
+                         limits=ResourceLimits(cpu_seconds=1))
+    assert result['exit_code'] != 0 and not result['timed_out']
+    assert time.monotonic() - start < 10
+
+
+def test_limits_policy_precedence():
+    from system.process import LimitsPolicy, ResourceLimits
+    find_limits = ResourceLimits(cpu_seconds=60)
+    risky_limits = ResourceLimits(nice=10)
+    policy = LimitsPolicy(by_intent={'find': find_limits}, by_risk={'high': risky_limits})
+    assert policy.limits_for('find', 'high') is find_limits
+    assert policy.limits_for('delete', 'high') is risky_limits
+    assert policy.limits_for('list', 'safe') is None
+
+
+def test_engine_returns_structured_result():
+    from engine import CommandEngine
+    engine = CommandEngine()
+    result = engine.execute_command('echo hello')
+    success, output, error = result
+    assert success and output.strip() == 'hello'
+    assert result.exit_code == 0 and result.usage['wall_time'] > 0
+    assert engine.last_result is result
+
+
+@posix_only
+def test_background_usage_is_tracked():
+    from engine import CommandEngine
+    engine = CommandEngine()
+    success, output, _ = engine.execute_command(f'bg {PYTHON} -c "pass"')
+    pid = int(output.rsplit(' ', 1)[1])
+    deadline = time.monotonic() + 10
+    while engine.background_usage(pid)[0] is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+    exit_code, usage = engine.background_usage(pid)
+    assert exit_code == 0 and usage['max_rss'] > 0
+    engine.cleanup()
+
+
+@posix_only
+def test_timeout_keeps_partial_output_and_kills_group(tmp_path):
+    from system.process import run_process
+    marker = tmp_path / 'survivor'
+    # The grandchild would create the marker if it outlived the timeout
+    command = f'echo started; (sleep 3; touch "{marker}") & sleep 30'
+    start = time.monotonic()
+    result = run_process(command, timeout=0.5)
+    assert result['timed_out']
+    assert result['stdout'].strip() == 'started'
+    assert time.monotonic() - start < 5
+    time.sleep(3.5)
+    assert not marker.exists()
+
+
+def test_timeout_policy_per_intent_and_adaptive():
+    from system.process import TimeoutPolicy
+    policy = TimeoutPolicy(default=30, by_intent={'find': 120}, adaptive=True,
+                           min_samples=3, multiplier=2, min_timeout=1)
+    assert policy.timeout_for('find . -name x', 'find') == 120
+    assert policy.timeout_for('make build') == 30
+
+    for wall_time in (10, 12, 50):
+        policy.record('make build', wall_time)
+    assert policy.timeout_for('make build') == 100  # p95 of history * 2
+    assert policy.timeout_for('make test') == 100  # Falls back to the program's history
+
+    for _ in range(50):
+        policy.record('make build', 0.1)
+    assert policy.timeout_for('make build') == 1  # Clamped to min_timeout
+
+
+@posix_only
+def test_engine_timeout_returns_partial_result():
+    from engine import CommandEngine
+    from system.process import TimeoutPolicy
+    engine = CommandEngine(timeout_policy=TimeoutPolicy(default=0.5))
+    result = engine.execute_command('echo partial; sleep 30')
+    success, output, error = result
+    assert not success and result.timed_out
+    assert output.strip() == 'partial' and 'timed out after 0.5 seconds' in error
+
+
+@posix_only
+def test_timeout_covers_background_jobs_holding_output():
+    from system.process import run_process
+    start = time.monotonic()
+    result = run_process('echo hi; sleep 6 &', timeout=1)
+    assert result['timed_out'] and result['stdout'].strip() == 'hi'
+    assert time.monotonic() - start < 4
+
+
+def test_adaptive_timeout_stays_near_default():
+    from system.process import TimeoutPolicy
+    policy = TimeoutPolicy(default=30, adaptive=True, min_samples=1)
+    for _ in range(10):
+        policy.record('./runaway', 10000)
+    assert policy.timeout_for('./runaway') == 120
+
+
+@posix_only
+def test_limits_are_set_before_the_command_runs():
+    from system.process import ResourceLimits, run_process
+    limits = ResourceLimits(cpu_seconds=7, address_space=512 * 1024 * 1024)
+    result = run_process('ulimit -t; ulimit -v', limits=limits)
+    assert result['stdout'].split() == ['7', str(512 * 1024)]
+    result = run_process([sys.executable, '-c', 'bytearray(1024 ** 3)'], limits=limits)
+    assert result['exit_code'] != 0 and 'MemoryError' in result['stderr']
@@ -0,0 +1,93 @@
+"""
+Tests for fuzzy target resolution.
+"""
+import os
+import time
+
+
+def test_resolve_statuses(tmp_path):
+    from engine.resolver import TargetResolver
+    for name in ('Games', 'games_old', 'notes.txt', 'Docs', 'docs'):
+        (tmp_path / name).mkdir()
+    resolver = TargetResolver()
+
+    assert resolver.resolve('notes.txt', str(tmp_path)) == ('exact', 'notes.txt')
+    assert resolver.resolve('GAMES', str(tmp_path)) == ('corrected', 'Games')
+    status, ranked = resolver.resolve('game', str(tmp_path))
+    assert status == 'ambiguous' and ranked[0][0] == 'Games'
+    assert [score for _, score in ranked] == sorted((s for _, s in ranked), reverse=True)
+    assert resolver.resolve('DOCS', str(tmp_path))[0] == 'ambiguous'  # Two case variants
+    assert resolver.resolve('zzz', str(tmp_path)) == ('missing', [])
+    assert resolver.resolve('x', str(tmp_path / 'nope')) == ('missing', [])
+
+
+def test_exact_name_skips_the_index(tmp_path):
+    from engine.resolver import TargetResolver
+    (tmp_path / 'notes.txt').write_text('notes')
+    resolver = TargetResolver()
+    assert resolver.resolve('notes.txt', str(tmp_path)) == ('exact', 'notes.txt')
+    assert not resolver._indexes
+    assert resolver.resolve('note.txt', str(tmp_path))[0] == 'ambiguous'
+    assert str(tmp_path) in resolver._indexes
+
+
+def test_index_invalidated_by_mtime(tmp_path):
+    from engine.resolver import TargetResolver
+    resolver = TargetResolver()
+    first = resolver.index_for(str(tmp_path))
+    assert resolver.index_for(str(tmp_path)) is first
+
+    (tmp_path / 'new').mkdir()
+    past = time.time() + 5
+    os.utime(tmp_path, (past, past))  # Guarantee a distinct mtime
+    second = resolver.index_for(str(tmp_path))
+    assert second is not first and second.names == ['new']
+
+
+def test_search_large_directory_is_fast():
+    from engine.resolver import DirectoryIndex
+    index = DirectoryIndex([f'file_{i:05d}.log' for i in range(20000)] + ['server.log'])
+    start = time.perf_counter()
+    ranked = index.search('servr.log')
+    elapsed = time.perf_counter() - start
+    assert ranked[0][0] == 'server.log'
+    assert elapsed < 0.05
+
+
+def test_common_trigrams_keep_exact_scores():
+    from engine.resolver import DirectoryIndex, trigrams
+    names = [f'file_{i:05d}.log' for i in range(5000)] + ['server.log', 'servers.log']
+    ranked = DirectoryIndex(names).search('servr.log')
+    assert [name for name, _ in ranked] == ['server.log', 'servers.log']
+    query = trigrams('servr.log')
+    for name, score in ranked:
+        grams = trigrams(name)
+        assert score == round(2.0 * len(query & grams) / (len(query) + len(grams)), 3)
+
+
+def test_engine_asks_for_clarification(tmp_path, monkeypatch):
+    from engine import CommandEngine
+    (tmp_path / 'Games').mkdir()
+    (tmp_path / 'games_old').mkdir()
+    monkeypatch.chdir(tmp_path)
+    engine = CommandEngine()
+
+    success, output, error = engine.process_input('show files in folder game')
+    assert not success and "Did you mean: 'Games'" in error
+
+    success, output, error = engine.process_input('go to folder GAMES')
+    assert success
+
+
+def test_copy_destination_is_not_resolved(tmp_path):
+    from engine import CommandEngine
+    (tmp_path / 'backup').mkdir()
+    (tmp_path / 'notes.txt').write_text('notes')
+    (tmp_path / 'src').mkdir()
+    engine = CommandEngine(cwd=str(tmp_path))
+
+    success, output, error = engine.process_input('please copy file notes.txt to backup2')
+    assert 'Did you mean' not in error
+
+    success, output, error = engine.process_input('please move folder sr to backup2')
+    assert not success and "Did you mean: 'src'" in error
@@ -0,0 +1,56 @@
+"""
+Tests for the read-only command result cache.
+"""
+
+
+def test_classify_command():
+    from engine.result_cache import classify_command
+    assert classify_command('ls -la') == ('list', ['.'])
+    assert classify_command('cat "my file.txt"') == ('read', ['my file.txt'])
+    assert classify_command('uname -a') == ('sysinfo', [])
+    assert classify_command('rm file') == (None, [])
+    assert classify_command('cat a > b') == (None, [])
+
+
+def test_cache_keyed_on_file_state(tmp_path):
+    from engine.result_cache import ResultCache
+    target = tmp_path / 'notes.txt'
+    target.write_text('one')
+    cache = ResultCache()
+
+    key, result = cache.lookup('cat notes.txt', cwd=str(tmp_path))
+    assert result is None
+    cache.store(key, (True, 'one', ''))
+    assert cache.lookup('cat notes.txt', cwd=str(tmp_path))[1] == (True, 'one', '')
+
+    target.write_text('one two')
+    assert cache.lookup('cat notes.txt', cwd=str(tmp_path))[1] is None
+
+
+def test_cache_bounds_and_ttl():
+    from engine.result_cache import ResultCache
+    cache = ResultCache(max_entries=2, max_bytes=10, ttls={'sysinfo': 0})
+    key, _ = cache.lookup('uname -a')
+    cache.store(key, (True, 'Linux', ''))
+    assert cache.lookup('uname -a')[1] is None  # Expired immediately
+
+    cache = ResultCache(max_entries=2, max_bytes=10)
+    for command in ('uname', 'hostname', 'whoami'):
+        key, _ = cache.lookup(command)
+        cache.store(key, (True, 'abcd', ''))
+    stats = cache.stats()
+    assert stats['entries'] == 2 and stats['bytes'] == 8
+
+
+def test_engine_reuses_and_invalidates(tmp_path, monkeypatch):
+    from engine import CommandEngine, ResultCache
+    monkeypatch.chdir(tmp_path)
+    engine = CommandEngine(result_cache=ResultCache())
+
+    first = engine.execute_command('ls -la')
+    assert engine.execute_command('ls -la') == first
+    assert engine.result_cache.stats()['hits'] == 1
+
+    engine.execute_command('echo hi > new.txt')
+    assert engine.result_cache.stats()['entries'] == 0
+    assert 'new.txt' in engine.execute_command('ls -la')[1]
@@ -0,0 +1,21 @@
+"""
+Tests for safety checks and confirmation prompts.
+"""
+
+
+def test_get_affected_paths():
+    from engine.safety import get_affected_paths
+    assert get_affected_paths('rm -rf build "old logs"') == ['build', 'old logs']
+    assert get_affected_paths('mv a b dest') == ['a', 'b']
+    assert get_affected_paths('ls -la') == []
+
+
+def test_confirmation_prompt_includes_impact():
+    from engine.safety import get_confirmation_prompt
+    impact = {'files': 45, 'dirs': 3, 'bytes': 234 * 1024 * 1024, 'exact': True, 'done': True}
+    prompt = get_confirmation_prompt('rm -r dir', 'high', impact)
+    assert 'Files affected: 45 files (234.0 MB)' in prompt
+
+    impact.update(exact=False, done=False)
+    prompt = get_confirmation_prompt('rm -r dir', 'high', impact)
+    assert 'at least 45 files' in prompt
@@ -0,0 +1,121 @@
+"""
+Tests for the multi-session engine host.
+"""
+import os
+import time
+
+import pytest
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason='uses sleep/pwd')
+
+
+def test_sessions_are_isolated(tmp_path):
+    from engine import SessionManager
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    manager = SessionManager()
+    first = manager.create_session(cwd=str(tmp_path))
+    second = manager.create_session(cwd=str(tmp_path), env=dict(os.environ, GREETING='hi'))
+
+    assert manager.process_input(first, 'cd a')[0]
+    assert manager.process_input(second, 'cd b')[0]
+    assert manager.get(first).cwd == str(tmp_path / 'a')
+    assert manager.get(second).cwd == str(tmp_path / 'b')
+    assert manager.process_input(first, 'cd missing')[2].startswith('cd: no such directory')
+
+    assert manager.get(second).execute_command('echo $GREETING')[1].strip() == 'hi'
+    assert list(manager.get(first).history) == ['cd a', 'cd missing']
+    manager.close_all()
+
+
+@posix_only
+def test_shared_result_cache_keeps_sessions_apart(tmp_path):
+    from engine import SessionManager, ResultCache
+    for user in ('ha', 'hb'):
+        (tmp_path / user).mkdir()
+        (tmp_path / user / 'n.txt').write_text(f'notes of {user}\n')
+    manager = SessionManager(result_cache=ResultCache())
+    first = manager.create_session(cwd=str(tmp_path), env=dict(os.environ, HOME=str(tmp_path / 'ha')))
+    second = manager.create_session(cwd=str(tmp_path), env=dict(os.environ, HOME=str(tmp_path / 'hb')))
+
+    assert manager.get(first).execute_command('cat ~/n.txt')[1] == 'notes of ha\n'
+    assert manager.get(second).execute_command('cat ~/n.txt')[1] == 'notes of hb\n'
+    manager.close_all()
+
+
+def test_shared_structures_are_not_copied():
+    from engine import SessionManager
+    manager = SessionManager()
+    first = manager.get(manager.create_session())
+    second = manager.get(manager.create_session())
+    assert first.target_resolver is second.target_resolver
+    assert first.timeout_policy is second.timeout_policy
+    manager.close_all()
+
+
+@posix_only
+def test_idle_sessions_are_evicted_and_reaped():
+    from engine import SessionManager
+    manager = SessionManager(idle_timeout=60)
+    idle = manager.create_session()
+    active = manager.create_session()
+    output = manager.get(idle).execute_command('bg sleep 30')[1]
+    job = manager.get(idle).running_processes[int(output.rsplit(' ', 1)[1])]['process']
+
+    manager.get(active)
+    assert manager.evict_idle(now=time.monotonic() + 61) == [idle, active]
+    assert job.returncode is not None  # Reaped, not left running
+    assert len(manager) == 0
+
+
+def test_session_limit_and_overhead():
+    from engine.session import SessionManager, measure_session_overhead
+    manager = SessionManager(max_sessions=1)
+    manager.create_session('one')
+    with pytest.raises(RuntimeError):
+        manager.create_session()
+    assert manager.process_input('nope', 'ls')[2] == 'Unknown session: nope'
+    manager.close_all()
+
+    assert measure_session_overhead(50) < 16 * 1024
+
+
+@posix_only
+def test_cd_in_a_command_list_runs_in_the_shell(tmp_path):
+    from engine import CommandEngine
+    (tmp_path / 'build').mkdir()
+    (tmp_path / 'build' / 'x.txt').write_text('hi')
+    engine = CommandEngine(cwd=str(tmp_path))
+    success, output, _ = engine.execute_command('cd build && cat x.txt')
+    assert success and output == 'hi'
+    assert engine.cwd == str(tmp_path)  # Only a lone cd moves the engine
+    assert engine.execute_command('cd "build"')[0] and engine.cwd == str(tmp_path / 'build')
+
+
+def test_confirmation_can_arrive_on_another_thread(tmp_path):
+    import threading
+    from engine import SessionManager
+    (tmp_path / 'old').mkdir()
+    (tmp_path / 'keep').mkdir()
+    manager = SessionManager()
+    session = manager.create_session(cwd=str(tmp_path))
+    replies = []
+
+    def ask(text):
+        replies.append(manager.process_input(session, text))
+
+    for text, confirmed in (('delete folder keep', False), ('delete folder old', True)):
+        worker = threading.Thread(target=ask, args=(text,))
+        worker.start()
+        worker.join()
+        assert 'Are you sure' in replies[-1][2]
+        answer = []
+        worker = threading.Thread(target=lambda: answer.append(manager.confirm(session, confirmed)))
+        worker.start()
+        worker.join()
+        assert answer[0][0] is confirmed, answer
+
+    assert (tmp_path / 'keep').exists() and not (tmp_path / 'old').exists()
+    assert manager.confirm(session)[2] == 'Nothing to confirm'
+    assert manager.confirm('missing')[2] == 'Unknown session: missing'
+    manager.close_all()
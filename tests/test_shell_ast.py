@@ -0,0 +1,103 @@
+"""
+Tests for the shell command parser and its use by safety checks and execution.
+"""
+import os
+
+import pytest
+
+from engine.shell_ast import (parse_command, iter_simple_commands, effective_words, simple_argv,
+                              Subshell, ShellSyntaxError)
+
+posix_only = pytest.mark.skipif(os.name != 'posix', reason='POSIX shell semantics')
+
+
+def argvs(command):
+    return [simple.argv for simple in iter_simple_commands(parse_command(command))]
+
+
+def test_lists_and_pipelines():
+    tree = parse_command('echo hi && rm -rf /tmp/x || ls | wc -l; date &')
+    assert [separator for _, separator in tree.items] == ['&&', '||', ';', '&']
+    assert len(tree.items[2][0].commands) == 2
+    assert argvs('echo hi && rm -rf /tmp/x') == [['echo', 'hi'], ['rm', '-rf', '/tmp/x']]
+
+
+def test_quotes_and_escapes():
+    assert argvs('''echo "a b" 'c d' e\\ f "x\\"y"''') == [['echo', 'a b', 'c d', 'e f', 'x"y']]
+    word = parse_command('echo "$HOME"').items[0][0].commands[0].words[1]
+    assert word.quoted and word.expands
+
+
+def test_redirections():
+    simple = parse_command('sort < in.txt 2>&1 >> out.txt').items[0][0].commands[0]
+    assert simple.argv == ['sort']
+    assert [(r.fd, r.op, r.target.value) for r in simple.redirects] == \
+        [(None, '<', 'in.txt'), (2, '>&', '1'), (None, '>>', 'out.txt')]
+    assert simple.text == 'sort < in.txt 2>&1 >> out.txt'
+
+
+def test_subshells_groups_and_substitutions():
+    tree = parse_command('(cd build && rm -rf out) > log; { make; }')
+    assert isinstance(tree.items[0][0].commands[0], Subshell)
+    assert tree.items[1][0].commands[0].brace
+    assert argvs('(cd build && rm -rf out) > log; { make; }') == \
+        [['cd', 'build'], ['rm', '-rf', 'out'], ['make']]
+    assert argvs('echo $(rm -rf ~) `whoami`')[1:] == [['rm', '-rf', '~'], ['whoami']]
+
+
+def test_effective_words_skip_wrappers():
+    def program(command):
+        simple = next(iter_simple_commands(parse_command(command)))
+        return [word.value for word in effective_words(simple)]
+    assert program('sudo -u root rm -rf x') == ['rm', '-rf', 'x']
+    assert program('LANG=C nice -n 5 timeout 10 rm y') == ['rm', 'y']
+    assert argvs('if true; then rm x; fi')[1] == ['then', 'rm', 'x']
+
+
+def test_syntax_errors():
+    for command in ('echo "open', "echo 'open", 'ls &&', '(ls', 'cat <<EOF\nhi\nEOF', ')'):
+        with pytest.raises(ShellSyntaxError):
+            parse_command(command)
+
+
+def test_parse_is_memoized():
+    assert parse_command('ls -la | head') is parse_command('ls -la | head')
+
+
+def test_simple_argv():
+    assert simple_argv(parse_command('ls -la "my dir"')) == ['ls', '-la', 'my dir']
+    for command in ('ls > out', 'ls | wc', 'ls *.py', 'echo hi', 'cd x', 'A=1 env', 'ls; ls'):
+        assert simple_argv(parse_command(command)) is None, command
+
+
+def test_windows_syntax_keeps_backslashes():
+    tree = parse_command('del /s /q "C:\\Program Files\\x" & dir', posix=False)
+    assert [s.argv for s in iter_simple_commands(tree)] == \
+        [['del', '/s', '/q', 'C:\\Program Files\\x'], ['dir']]
+
+
+def test_safety_checks_every_simple_command():
+    from engine.safety import is_safe_command, get_affected_paths
+    assert is_safe_command('ls; shutdown now')[1] == 'high'
+    assert is_safe_command('echo $(rm -rf ~)')[1] == 'high'
+    assert is_safe_command('sudo rm notes.txt')[1] == 'high'
+    assert is_safe_command('echo hi && rm -rf "/"')[1] == 'critical'
+    assert is_safe_command('ls -la | grep rm') == (True, 'safe', '')
+    assert get_affected_paths('cd build && rm -rf out "old logs"') == ['out', 'old logs']
+
+
+@posix_only
+def test_engine_runs_plain_commands_without_shell(tmp_path, monkeypatch):
+    from engine import CommandEngine
+    import engine.executor as executor
+    seen = []
+    run_process = executor.run_process
+    monkeypatch.setattr(executor, 'run_process', lambda command, **kw: (seen.append(command),
+                                                                         run_process(command, **kw))[1])
+    (tmp_path / 'a file.txt').write_text('hello\n')
+    engine = CommandEngine(cwd=str(tmp_path), direct_exec=True)
+
+    assert engine.execute_command('cat "a file.txt"')[1] == 'hello\n'
+    assert engine.execute_command('cat "a file.txt" | wc -l')[1].strip() == '1'
+    assert not engine.execute_command('no-such-program-xyz')[0]
+    assert seen == [['cat', 'a file.txt'], 'cat "a file.txt" | wc -l', 'no-such-program-xyz']
@@ -0,0 +1,46 @@
+"""
+Tests for typo-tolerant input normalization.
+"""
+
+
+def test_corrects_vocabulary_typos():
+    from engine.preprocessor import SpellingCorrector
+    corrector = SpellingCorrector()
+    assert corrector.correct('lsit files') == 'list files'
+    assert corrector.correct('delte folder temp') == 'delete folder temp'
+    assert corrector.correct('naviagte to drive d') == 'navigate to drive d'
+    assert corrector.stats()['corrected'] == 3
+
+
+def test_leaves_names_and_existing_actions_alone():
+    from engine.preprocessor import SpellingCorrector
+    corrector = SpellingCorrector()
+    assert corrector.correct('create folder fine') == 'create folder fine'  # Name after 'folder'
+    assert corrector.correct('open fine') == 'open fine'  # Already has an action
+    assert corrector.correct('cd tmp') == 'cd tmp'
+
+
+def test_typos_reach_the_right_action():
+    from engine.preprocessor import parse_intent
+    assert parse_intent('lsit files').action == 'list'
+    intent = parse_intent('delte folder temp')
+    assert intent.action == 'delete' and intent.components['target'] == 'temp'
+    assert intent.text == 'delte folder temp'  # Original text is preserved
+
+
+def test_serialized_index_round_trip(tmp_path):
+    from engine.preprocessor import SpellingCorrector
+    path = str(tmp_path / 'lexicon.json')
+    SpellingCorrector().save(path)
+    assert SpellingCorrector.load(path).correct('remvoe file a.txt') == 'remove file a.txt'
+
+
+def test_real_commands_and_words_are_not_corrected(monkeypatch):
+    import engine.preprocessor as preprocessor
+    from engine.mapper import map_intent
+    # Programs on PATH stay commands whatever the test machine has installed
+    monkeypatch.setattr(preprocessor, 'is_program', lambda name: name in ('head', 'more', 'stat'))
+    for text in ('head -n 5 notes.txt', 'more notes.txt', 'stat notes.txt', 'mode con', 'take a note'):
+        intent = preprocessor.parse_intent(text)
+        assert intent.action is None, text
+        assert map_intent(intent) == text
@@ -1,5 +1,411 @@
 """
 Output formatting and syntax highlighting.
 """
+import functools
+import re
+from collections import namedtuple
+from itertools import accumulate, chain, compress, repeat
+from operator import add, attrgetter, eq, getitem, itemgetter, lt, mul, sub
+
+
 def highlight_error(text):
     return f'[ERROR] {text}'
+
+def format_size(num_bytes):
+    """Format a byte count for humans, e.g. 234.0 MB"""
+    size = float(num_bytes)
+    for unit in ('bytes', 'KB', 'MB', 'GB', 'TB'):
+        if size < 1024 or unit == 'TB':
+            return f'{int(size)} bytes' if unit == 'bytes' else f'{size:.1f} {unit}'
+        size /= 1024
+
+
+# Colours are '#rrggbb' strings (None = the widget's default) so a GUI can use them as-is
+Style = namedtuple('Style', 'fg bg bold italic underline inverse')
+DEFAULT_STYLE = Style(None, None, False, False, False, False)
+Span = namedtuple('Span', 'text style')
+
+# ANSI colours 0-15, tuned for the terminal's dark background
+PALETTE = (
+    '#3f4451', '#e05561', '#8cc265', '#d18f52', '#4aa5f0', '#c162de', '#42b3c2', '#d7dae0',
+    '#4f5666', '#ff616e', '#a5e075', '#f0a45d', '#4dc4ff', '#de73ff', '#4cd1e0', '#e6e6e6',
+)
+
+# Rule-based highlighting for text the program did not colour itself
+RULE_STYLES = {
+    'error': DEFAULT_STYLE._replace(fg='#ff6b6b', bold=True),
+    'path': DEFAULT_STYLE._replace(fg='#61afef'),
+    'pid': DEFAULT_STYLE._replace(fg='#e5c07b'),
+}
+
+# Each rule is its own pass with a pattern that starts with a literal, so the regex
+# engine skips straight to candidates (a leading alternation or character class is
+# tried at every position, several times slower); error lines are one pass over the
+# error words the text contains. What may come before a match is checked by a
+# lookbehind after the literal, so the matches need no further Python checks
+ERROR_WORDS = ('error', 'fail', 'fatal', 'panic', 'traceback', 'exception', 'denied', 'cannot',
+               'no such file', 'not found')
+ERROR_WORD = r'{0}(?<![^\W_]{0})'  # Not in the middle of a word; matched against lowercased text
+# A path runs from a '/' to the first character that can't be in one, and counts from the
+# dot or tilde for ./x, ../x and ~/x. It isn't a path in the middle of a word, URL or another
+# path; the lookbehinds check that, and which empty group matched says where the path starts
+PATH_PATTERN = re.compile(
+    r'/(?:(?<![A-Za-z0-9/.~:_-]/)()'  # /x
+    r'|(?<=[.~]/)(?<![A-Za-z0-9/.~:_-][.~]/)()'  # ./x, ~/x
+    r'|(?<=\.\./)(?<![A-Za-z0-9/.~:_-]\.\./)()'  # ../x
+    r'|)[\w.@%+=,-]+(?:/[\w.@%+=,-]*)*')
+WINDOWS_PATH_PATTERN = re.compile(r':\\[^\s"<>|:*?]*')
+PID_PATTERN = re.compile(r'pid(?<![^\W_]pid)[=: ] ?\d+')  # Matched against lowercased text
+PID_PATTERN_IGNORECASE = re.compile(PID_PATTERN.pattern, re.IGNORECASE)
+BRACKET_PID_PATTERN = re.compile(r'\[(?<=[^\W_]\[)(\d+)\]')  # sshd[1234]: the number
+
+# CSI sequences (SGR ends in 'm'), OSC strings (window titles, hyperlinks) and 2-byte escapes
+ESCAPE_PATTERN = re.compile(
+    r'\x1b(?:\[([0-9;:?]*)[ -/]*([@-~])|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])')
+MAX_PENDING = 64 * 1024  # Emit an unfinished line once it grows past this
+MAX_CACHED_TRANSITIONS = 4096
+
+
+def _color_256(n):
+    if n < 16:
+        return PALETTE[n]
+    if n < 232:
+        n -= 16
+        levels = [0 if v == 0 else 55 + v * 40 for v in (n // 36, n // 6 % 6, n % 6)]
+        return '#{:02x}{:02x}{:02x}'.format(*levels)
+    gray = 8 + (n - 232) * 10
+    return f'#{gray:02x}{gray:02x}{gray:02x}'
+
+
+def _extended_color(codes, i):
+    """Parse 5;n or 2;r;g;b after a 38/48 code; returns (colour, next index)"""
+    if i < len(codes) and codes[i] == 5 and i + 1 < len(codes):
+        return _color_256(min(codes[i + 1], 255)), i + 2
+    if i < len(codes) and codes[i] == 2 and i + 3 < len(codes):
+        r, g, b = (min(c, 255) for c in codes[i + 1:i + 4])
+        return f'#{r:02x}{g:02x}{b:02x}', i + 4
+    return None, len(codes)
+
+
+def apply_sgr(style, params):
+    """The Style after an SGR sequence with the given parameter string, e.g. '1;31'"""
+    codes = [int(code) if code.isdigit() else 0 for code in re.split('[;:]', params)] if params else [0]
+    fg, bg, bold, italic, underline, inverse = style
+    i = 0
+    while i < len(codes):
+        code = codes[i]
+        i += 1
+        if code == 0:
+            fg, bg, bold, italic, underline, inverse = DEFAULT_STYLE
+        elif code == 1:
+            bold = True
+        elif code == 3:
+            italic = True
+        elif code == 4:
+            underline = True
+        elif code == 7:
+            inverse = True
+        elif code == 22:
+            bold = False
+        elif code == 23:
+            italic = False
+        elif code == 24:
+            underline = False
+        elif code == 27:
+            inverse = False
+        elif 30 <= code <= 37:
+            fg = PALETTE[code - 30]
+        elif 90 <= code <= 97:
+            fg = PALETTE[code - 90 + 8]
+        elif 40 <= code <= 47:
+            bg = PALETTE[code - 40]
+        elif 100 <= code <= 107:
+            bg = PALETTE[code - 100 + 8]
+        elif code == 38:
+            fg, i = _extended_color(codes, i)
+        elif code == 48:
+            bg, i = _extended_color(codes, i)
+        elif code == 39:
+            fg = None
+        elif code == 49:
+            bg = None
+    return Style(fg, bg, bold, italic, underline, inverse)
+
+
+class _StyleState(dict):
+    """
+    A Style and where each escape sequence leads from it: state[(final, params)]
+    is the next state, so following a chunk's escapes is a dict lookup apiece
+    """
+    __slots__ = ('style', 'states')
+
+    def __init__(self, style, states):
+        super().__init__()
+        self.style = style
+        self.states = states  # Style -> _StyleState, shared by the states of one formatter
+        if len(states) >= MAX_CACHED_TRANSITIONS:
+            states.clear()
+        states[style] = self
+
+    def __missing__(self, key):
+        final, params = key
+        # Cursor movement, titles etc. have no place in a log view
+        style = apply_sgr(self.style, params) if final == 'm' else self.style
+        state = self.states.get(style) or _StyleState(style, self.states)
+        if len(self) >= MAX_CACHED_TRANSITIONS:
+            self.clear()
+        self[key] = state
+        return state
+
+
+class OutputFormatter:
+    """
+    Incremental formatter turning raw program output into styled spans
+
+    feed() takes output as it arrives and returns [Span(text, style)] for the
+    complete lines seen so far; flush() returns the rest once the output ends.
+    ANSI SGR state carries across chunks and lines, other escape sequences are
+    dropped. Lines are highlighted by RULE_STYLES (error lines, paths, PIDs)
+    wherever the program left the foreground colour at its default. Adjacent
+    spans with the same style are merged, so a widget can insert each span
+    with one call.
+    """
+
+    def __init__(self, highlight=True):
+        self.highlight = highlight
+        self.style = DEFAULT_STYLE
+        self._pending = ''
+        # Style -> _StyleState; output reuses a handful of styles and sequences
+        self._states = {}
+        self._rule_styles = {}
+
+    def feed(self, chunk):
+        """Spans for the complete lines now available (an unfinished line is kept)"""
+        text = self._pending + chunk if self._pending else chunk
+        end = text.rfind('\n') + 1
+        if not end and len(text) > MAX_PENDING:
+            # A very long line goes out in pieces, but never cut an escape sequence in half
+            end = len(text)
+            escape = text.rfind('\x1b', end - 64)
+            if escape >= 0 and not ESCAPE_PATTERN.match(text, escape):
+                end = escape
+        self._pending = text[end:]
+        return self._format(text[:end]) if end else []
+
+    def flush(self):
+        """Spans for whatever is left, e.g. a final line without a newline"""
+        text, self._pending = self._pending, ''
+        return self._format(text) if text else []
+
+    def reset(self):
+        self.style = DEFAULT_STYLE
+        self._pending = ''
+
+    def format(self, text):
+        """Format a complete output in one go"""
+        text, self._pending = self._pending + text, ''
+        return self._format(text) if text else []
+
+    def _format(self, text):
+        if '\r' in text:
+            text = text.replace('\r\n', '\n')
+        if '\x1b' in text:
+            texts, styles = self._split_escapes(text)
+            plain = ''.join(texts)
+        else:
+            plain, texts, styles = text, [text], [self.style]
+        bounds, rules = self._find_marks(plain) if self.highlight else ([], None)
+
+        # The work per span is done by map() and slicing rather than a Python loop:
+        # a log chunk easily has thousands of PIDs and paths
+        if bounds and len(texts) == 1 and styles[0].fg is None:
+            style = styles[0]
+            bounds = [0, *bounds, len(plain)]
+            texts = list(map(plain.__getitem__, map(slice, bounds, bounds[1:])))
+            styles = [style] * len(texts)
+            rule_styles = self._rule_styles_for(style)
+            styles[1::2] = map(rule_styles.__getitem__, map(rules.__getitem__, bounds[1:-1:2]))
+        elif bounds and len(texts) > 1:
+            return self._cut_runs(plain, texts, styles, bounds, rules)
+        spans = list(map(tuple.__new__, repeat(Span), zip(texts, styles)))
+        if not all(texts):
+            spans = list(filter(itemgetter(0), spans))
+            styles = list(map(itemgetter(1), spans))
+        if any(map(eq, styles, styles[1:])):
+            # Merge neighbours that look the same
+            merged = spans[:1]
+            for span in spans[1:]:
+                if span.style == merged[-1].style:
+                    merged[-1] = Span(merged[-1].text + span.text, span.style)
+                else:
+                    merged.append(span)
+            spans = merged
+        return spans
+
+    def _cut_runs(self, plain, texts, styles, bounds, rules):
+        """Spans for differently styled runs of text, cut around the marks in the uncoloured ones"""
+        marks = list(zip(zip(bounds[0::2], bounds[1::2]), map(rules.__getitem__, bounds[0::2])))
+        runs = [(end, style) for end, style, piece in zip(accumulate(map(len, texts)), styles, texts)
+                if piece]
+
+        # Span boundaries and styles, merging neighbours that look the same
+        ends = []
+        styles = []
+        mark_index = 0
+        start = 0
+        for end, style in runs:
+            if style.fg is not None or mark_index == len(marks):
+                if styles and styles[-1] == style:
+                    ends[-1] = end
+                else:
+                    ends.append(end)
+                    styles.append(style)
+                start = end
+                continue
+            # Cut the run around the marks that fall inside it
+            while mark_index < len(marks) and marks[mark_index][0][1] <= start:
+                mark_index += 1
+            position = start
+            rule_styles = self._rule_styles_for(style)
+            while mark_index < len(marks) and marks[mark_index][0][0] < end:
+                (mark_start, mark_end), rule = marks[mark_index]
+                if mark_start > position:
+                    if styles and styles[-1] == style:
+                        ends[-1] = mark_start
+                    else:
+                        ends.append(mark_start)
+                        styles.append(style)
+                position = mark_end if mark_end < end else end
+                rule_style = rule_styles[rule]
+                if styles and styles[-1] == rule_style:
+                    ends[-1] = position
+                else:
+                    ends.append(position)
+                    styles.append(rule_style)
+                if mark_end > end:
+                    break
+                mark_index += 1
+            if end > position:
+                if styles and styles[-1] == style:
+                    ends[-1] = end
+                else:
+                    ends.append(end)
+                    styles.append(style)
+            start = end
+
+        if not ends or not ends[-1]:
+            return []
+        texts = [plain[a:b] for a, b in zip([0] + ends, ends)]
+        return list(map(Span, texts, styles))
+
+    def _split_escapes(self, text):
+        """
+        Remove escape sequences, applying SGR ones to self.style
+        Returns: ([text between escape sequences], [style of each])
+        """
+        # split() gives [text, params, final, text, params, final, ..., text]
+        parts = ESCAPE_PATTERN.split(text)
+        state = self._states.get(self.style) or _StyleState(self.style, self._states)
+        states = list(accumulate(zip(parts[2::3], parts[1::3]), getitem, initial=state))
+        self.style = states[-1].style
+        return parts[0::3], list(map(attrgetter('style'), states))
+
+    @staticmethod
+    def _find_marks(text):
+        """
+        What to highlight, as sorted non-overlapping ranges
+        Returns: ([start, end, start, end, ...], {start: rule})
+        """
+        folded = lower = text.lower()
+        flags = 0
+        if len(lower) != len(text):
+            # Lowercasing changed offsets (rare Unicode), search the text itself
+            lower, flags = text, re.IGNORECASE
+        bounds = []
+        rules = {}
+
+        # Error lines, found from their first error word to the end of the line
+        words = tuple(word for word in ERROR_WORDS if word in folded)
+        matches = list(_error_line_pattern(words, flags).finditer(lower)) if words else None
+        if matches:
+            starts = list(map(add, map(text.rfind, repeat('\n'), repeat(0), map(re.Match.start, matches)),
+                              repeat(1)))
+            errors = list(zip(starts, map(re.Match.end, matches)))
+            # Tokens inside an error line are part of it: blank the lines out, keeping offsets
+            text = _blank(text, errors)
+            lower = _blank(lower, errors) if lower is folded and 'pid' in folded else text
+            bounds += chain.from_iterable(errors)
+            rules.update(zip(starts, repeat('error')))
+
+        # Tokens seldom overlap (a PID inside a path, ./x after a non-ASCII letter in one)
+        tokens = []
+        if '/' in text:
+            matches = list(PATH_PATTERN.finditer(text))
+            groups = list(map(attrgetter('lastindex'), matches))  # None for runs that aren't paths
+            matches = list(compress(matches, groups))
+            groups = list(filter(None, groups))
+            tokens += zip(map(sub, map(re.Match.end, matches, groups), groups), map(re.Match.end, matches))
+        rules.update(zip(map(itemgetter(0), tokens), repeat('path')))
+        if ':\\' in text:
+            for match in WINDOWS_PATH_PATTERN.finditer(text):
+                start = match.start() - 1
+                if start >= 0 and text[start].isalpha() and (not start or not text[start - 1].isalnum()):
+                    tokens.append((start, match.end()))
+                    rules[start] = 'path'
+        if 'pid' in folded:
+            pattern = PID_PATTERN_IGNORECASE if flags else PID_PATTERN
+            pids = list(map(re.Match.span, pattern.finditer(lower)))
+            tokens += pids
+            rules.update(zip(map(itemgetter(0), pids), repeat('pid')))
+        if '[' in text:
+            pids = list(map(re.Match.span, BRACKET_PID_PATTERN.finditer(text), repeat(1)))
+            tokens += pids
+            rules.update(zip(map(itemgetter(0), pids), repeat('pid')))
+        tokens.sort()
+        if any(map(lt, map(itemgetter(0), tokens[1:]), map(itemgetter(1), tokens))):
+            # Overlapping tokens keep the first
+            kept = []
+            position = 0
+            for token in tokens:
+                if token[0] >= position:
+                    kept.append(token)
+                    position = token[1]
+            tokens = kept
+        bounds += chain.from_iterable(tokens)
+        bounds.sort()
+        return bounds, rules
+
+    def _rule_styles_for(self, style):
+        """{rule: style} for highlighting text that has the given style"""
+        result = self._rule_styles.get(style)
+        if result is None:
+            result = self._rule_styles[style] = {
+                rule: style._replace(fg=rule_style.fg, bold=style.bold or rule_style.bold)
+                for rule, rule_style in RULE_STYLES.items()}
+        return result
+
+
+@functools.lru_cache(maxsize=64)
+def _error_line_pattern(words, flags=0):
+    """Matches the rest of a line from the first of the given ERROR_WORDS in it"""
+    return re.compile('(?:' + '|'.join(ERROR_WORD.format(re.escape(word)) for word in words) + r')[^\n]*',
+                      flags)
+
+
+def _blank(text, ranges):
+    """text with the given sorted (start, end) ranges replaced by spaces"""
+    bounds = [0, *chain.from_iterable(ranges), len(text)]
+    parts = [''] * (2 * len(ranges) + 1)
+    parts[0::2] = map(text.__getitem__, map(slice, bounds[0::2], bounds[1::2]))
+    parts[1::2] = map(mul, repeat(' '), map(sub, bounds[2::2], bounds[1::2]))
+    return ''.join(parts)
+
+
+def format_output(text, highlight=True):
+    """[Span(text, style)] for a complete output"""
+    return OutputFormatter(highlight).format(text)
+
+
+def strip_ansi(text):
+    """text without ANSI escape sequences"""
+    return ESCAPE_PATTERN.sub('', text) if '\x1b' in text else text